@@ -2,12 +2,31 @@
 #
 # A tool for fetching Logilica reports, extracting their contents, and
 # presenting them in various ways.
+from datetime import timedelta
 import inspect
+import re
 from typing import Callable, List
 
 import click
 
 
+class Duration(click.ParamType):
+    """Click parameter type for a duration, specified as a number of seconds,
+    optionally suffixed with a unit (e.g., "90", "15m", "12h", or "2d").
+    """
+
+    name = "duration"
+    UNITS = {"": "seconds", "s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+    def convert(self, value, param, ctx) -> timedelta:
+        if isinstance(value, timedelta):
+            return value
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(value))
+        if not match:
+            self.fail(f"{value!r} is not a valid duration (e.g., 90s, 15m, 12h, 2d)")
+        return timedelta(**{self.UNITS[match[2]]: float(match[1])})
+
+
 def compose_options(cmd_func: Callable, opt_list: List[Callable]) -> Callable:
     """Helper function which composes a list of click.options into a single
     decorator.
@@ -85,5 +104,22 @@ def common_options(f):
                 show_default=True,
                 help="Use SSO/OAuth dialog instead of specifying a username and password for Logilica access",
             ),
+            click.option(
+                "--reuse-login/--no-reuse-login",
+                default=True,
+                show_default=True,
+                help="Cache the Logilica login between runs and reuse it until it expires",
+            ),
         ],
     )
+
+
+def browser_daemon_option(f):
+    """Option for the commands which can use the `browser serve` daemon."""
+
+    return click.option(
+        "--browser-daemon/--no-browser-daemon",
+        default=True,
+        show_default=True,
+        help="Use the browser started by `browser serve`, if it is running",
+    )(f)
@@ -8,6 +8,7 @@ from jsonschema import ValidationError
 import yaml
 
 from logilica_cli import sort_click_command_parameters
+from logilica_cli.browser_daemon import browser
 from logilica_cli.configuration_schema import validate_configuration
 from logilica_cli.data_sources import data_sources
 from logilica_cli.weekly_report import weekly_report
@@ -106,7 +107,7 @@ def cli(
 
 
 command: Command
-for command in [weekly_report, data_sources]:
+for command in [weekly_report, data_sources, browser]:
     cli.add_command(command)
 
 if __name__ == "__main__":
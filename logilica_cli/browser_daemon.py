@@ -0,0 +1,173 @@
+#
+# This module contains the `browser` subcommands, which keep a logged-in
+# Chromium running between invocations of the tool, so that other commands can
+# connect to it (using the Chrome DevTools Protocol) instead of launching a
+# browser and logging in each time.
+#
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+import signal
+from typing import Optional
+
+import click
+import platformdirs
+from playwright.async_api import async_playwright
+
+from logilica_cli import common_options, sort_click_command_parameters
+from logilica_cli.page_login import LoginPage
+from logilica_cli.update_gdoc import APPLICATION_NAME
+
+DAEMON_INFO_FILE_NAME = "browser_daemon.json"
+DAEMON_PROFILE_DIR_NAME = "browser_profile"
+DEFAULT_DAEMON_PORT = 9222
+
+
+def get_daemon_info_file() -> Path:
+    """Get the Path to the file describing the running browser daemon."""
+    cache_dir = platformdirs.user_cache_path(APPLICATION_NAME, ensure_exists=True)
+    return cache_dir / DAEMON_INFO_FILE_NAME
+
+
+def get_daemon_endpoint(logilica_credentials: dict[str, str]) -> Optional[str]:
+    """Returns the CDP endpoint of the running browser daemon, if there is one
+    and it is logged in with the same credentials (domain and user).
+    """
+    info_file = get_daemon_info_file()
+    if not info_file.exists():
+        return None
+    info = json.loads(info_file.read_text())
+    try:
+        os.kill(info["pid"], 0)
+    except OSError:
+        logging.debug("Ignoring stale browser daemon information in %s", info_file)
+        return None
+    if info["domain"] != logilica_credentials["domain"] or info[
+        "username"
+    ] != logilica_credentials.get("username"):
+        logging.debug("The browser daemon is logged in with other credentials")
+        return None
+    logging.debug("Using the browser daemon at %s", info["endpoint"])
+    return info["endpoint"]
+
+
+async def serve_browser(
+    credentials: dict[str, str], oauth: bool, reuse_login: bool, port: int
+) -> None:
+    """Launches the browser and logs it in (see serve()), then keeps it
+    running until SIGINT or SIGTERM is received.
+    """
+    cache_dir = platformdirs.user_cache_path(APPLICATION_NAME, ensure_exists=True)
+    profile_dir = cache_dir / DAEMON_PROFILE_DIR_NAME
+    info_file = get_daemon_info_file()
+    endpoint = f"http://127.0.0.1:{port}"
+
+    # Stop gracefully on SIGTERM (e.g., from `browser stop`) as on Ctrl-C.
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopped.set)
+    async with async_playwright() as playwright:
+        # Use a visible window only if an SSO login turns out to be required.
+        for headless in (True, False) if oauth else (True,):
+            context = await playwright.chromium.launch_persistent_context(
+                profile_dir,
+                headless=headless,
+                accept_downloads=True,
+                args=[
+                    f"--remote-debugging-port={port}",
+                    "--remote-debugging-address=127.0.0.1",
+                ],
+            )
+            login_page = LoginPage(page=context.pages[0], credentials=credentials)
+            if reuse_login and await login_page.has_session():
+                logging.info("Reusing the browser's Logilica login")
+                break
+            await context.clear_cookies()
+            if not oauth:
+                await login_page.navigate()
+                await login_page.login_with_email()
+                break
+            if not headless:
+                await login_page.navigate()
+                await login_page.login_with_sso()
+                break
+            await context.close()
+
+        info_file.write_text(
+            json.dumps(
+                {
+                    "endpoint": endpoint,
+                    "pid": os.getpid(),
+                    "domain": credentials["domain"],
+                    "username": credentials["username"],
+                }
+            )
+        )
+        click.echo(f"Browser serving at {endpoint}; press Ctrl-C to stop.")
+        try:
+            await stopped.wait()
+            click.echo("Stopping browser.")
+        finally:
+            info_file.unlink(missing_ok=True)
+            try:
+                await context.close()
+            except Exception as err:
+                # Ctrl-C is also delivered to the browser, which may be gone.
+                logging.debug("Closing the browser failed: %s", err)
+
+
+@click.group()
+def browser() -> None:
+    """Manages a long-lived, logged-in browser shared by other commands."""
+
+
+@sort_click_command_parameters
+@browser.command()
+@common_options
+@click.option(
+    "--port",
+    "-P",
+    type=click.IntRange(min=1, max=65535),
+    default=DEFAULT_DAEMON_PORT,
+    show_default=True,
+    help="Local port for the Chrome DevTools Protocol endpoint",
+)
+def serve(
+    username: str,
+    password: str,
+    domain: str,
+    oauth: bool,
+    reuse_login: bool,
+    port: int,
+) -> None:
+    """Runs a logged-in browser until interrupted.
+
+    \f
+
+    While it runs, the other commands connect to this browser instead of
+    launching their own, and they reuse its login.  The browser's profile is
+    kept in the user cache directory, so the login also survives restarts of
+    the daemon (unless --no-reuse-login is specified).
+
+    Note that any local process can control the browser via its endpoint.
+    """
+    credentials = {"username": username, "password": password, "domain": domain}
+    asyncio.run(serve_browser(credentials, oauth, reuse_login, port))
+
+
+@browser.command()
+def stop() -> None:
+    """Stops the running browser daemon."""
+    info_file = get_daemon_info_file()
+    if not info_file.exists():
+        click.echo("No browser daemon is running.", err=True)
+        return
+    pid = json.loads(info_file.read_text())["pid"]
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        info_file.unlink(missing_ok=True)
+        click.echo("The browser daemon is no longer running.", err=True)
@@ -0,0 +1,60 @@
+#
+# This module contains the reading and writing of the index files of the
+# persistent caches, which may be updated by several runs at once:  each run
+# merges its changes into the index under an exclusive lock (see locked()).
+#
+from contextlib import contextmanager
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+@contextmanager
+def locked(index_path: Path) -> Iterator[None]:
+    """Holds an exclusive lock on the index for the duration of the block, so
+    that it is read, merged, and written by one run at a time.  The lock is
+    taken on a separate lock file, which is left in place, since the index
+    itself is replaced when it is written.
+    """
+    with open(index_path.with_suffix(".lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Closing the file releases the lock.
+        yield
+
+
+def read_index(index_path: Path, description: str) -> dict[str, dict[str, Any]]:
+    """Returns the contents of the index, which are empty if it does not
+    exist or is corrupt.
+    """
+    if not index_path.exists():
+        return {}
+    try:
+        return json.loads(index_path.read_text())
+    except ValueError:
+        logging.warning("Ignoring corrupt %s index", description)
+        return {}
+
+
+def write_index(index_path: Path, index: dict[str, dict[str, Any]]) -> None:
+    """Writes the index, replacing the previous one atomically:  it is written
+    to a temporary file of its own, which is then renamed over the index.
+    """
+    fd, temp_name = tempfile.mkstemp(
+        dir=index_path.parent, prefix=f".{index_path.name}."
+    )
+    try:
+        with os.fdopen(fd, "w") as temp_file:
+            json.dump(index, temp_file, indent=2)
+        os.replace(temp_name, index_path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
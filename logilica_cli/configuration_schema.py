@@ -68,6 +68,69 @@ schema = {
                     },
                     "additionalProperties": False,
                 },
+                "logilica": {
+                    "type": "object",
+                    "properties": {
+                        "storage_state_file": {
+                            "type": "string",
+                            "description": "Path to the file caching the Logilica login",
+                        },
+                        "download_cache_dir": {
+                            "type": "string",
+                            "description": "Path to the directory caching exported dashboards",
+                        },
+                        "image_cache_dir": {
+                            "type": "string",
+                            "description": "Path to the directory caching rendered dashboard images",
+                        },
+                        "request_filter": {
+                            "type": "object",
+                            "description": "Requests to block while exporting dashboards",
+                            "properties": {
+                                "block_resource_types": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                },
+                                "allow_resource_types": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                },
+                                "block_hosts": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                },
+                                "allow_hosts": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                },
+                                "dry_run": {"type": "boolean"},
+                            },
+                            "additionalProperties": False,
+                        },
+                    },
+                    "additionalProperties": False,
+                },
+                "docling": {
+                    "type": "object",
+                    "properties": {
+                        "profiles": {
+                            "type": "object",
+                            "description": "Named docling pipeline profiles (see --convert-profile)",
+                            "additionalProperties": {
+                                "type": "object",
+                                "properties": {
+                                    "do_ocr": {"type": "boolean"},
+                                    "do_table_structure": {"type": "boolean"},
+                                    "table_mode": {"enum": ["fast", "accurate"]},
+                                    "generate_page_images": {"type": "boolean"},
+                                    "generate_picture_images": {"type": "boolean"},
+                                },
+                                "additionalProperties": False,
+                            },
+                        },
+                    },
+                    "additionalProperties": False,
+                },
             },
             "additionalProperties": False,
         },
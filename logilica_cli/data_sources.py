@@ -1,13 +1,39 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Optional
+
 import click
 
-from logilica_cli import common_options, sort_click_command_parameters
+from logilica_cli import (
+    browser_daemon_option,
+    common_options,
+    sort_click_command_parameters,
+)
+from logilica_cli.browser_daemon import get_daemon_endpoint
 from logilica_cli.page_settings import SettingsPage
-from logilica_cli.playwright_session import LogilicaSession
+from logilica_cli.playwright_session import get_storage_state_file, LogilicaSession
+
+
+async def sync_integrations(
+    *,
+    oauth: bool,
+    logilica_credentials: dict[str, str],
+    storage_state_file: Optional[Path],
+    cdp_endpoint: Optional[str],
+    integrations: dict[str, Any],
+) -> None:
+    """Logs into Logilica and synchronizes the integrations."""
+    async with LogilicaSession(
+        oauth, logilica_credentials, storage_state_file, cdp_endpoint=cdp_endpoint
+    ) as page:
+        settings_page = SettingsPage(page=page)
+        await settings_page.sync_integrations(integrations=integrations)
 
 
 @sort_click_command_parameters
 @click.command()
 @common_options
+@browser_daemon_option
 @click.pass_context
 def data_sources(
     context: click.Context,
@@ -15,6 +41,8 @@ def data_sources(
     password: str,
     domain: str,
     oauth: bool,
+    reuse_login: bool,
+    browser_daemon: bool,
 ) -> None:
     """Synchronizes configuration of integrations with the configuration file.
 
@@ -50,10 +78,22 @@ def data_sources(
         "password": password,
         "domain": domain,
     }
+    storage_state_file = (
+        get_storage_state_file(configuration.get("config", {}), logilica_credentials)
+        if reuse_login
+        else None
+    )
+    cdp_endpoint = get_daemon_endpoint(logilica_credentials) if browser_daemon else None
     try:
-        with LogilicaSession(oauth, logilica_credentials) as page:
-            settings_page = SettingsPage(page=page)
-            settings_page.sync_integrations(integrations=configuration["integrations"])
+        asyncio.run(
+            sync_integrations(
+                oauth=oauth,
+                logilica_credentials=logilica_credentials,
+                storage_state_file=storage_state_file,
+                cdp_endpoint=cdp_endpoint,
+                integrations=configuration["integrations"],
+            )
+        )
 
     except Exception as err:
         click.echo(f"Unexpected exception, {type(err).__name__}: {err}", err=True)
@@ -0,0 +1,152 @@
+#
+# This module contains a persistent cache of the dashboard PDFs exported from
+# Logilica, so that dashboards which were exported recently need not be
+# exported again.
+#
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+from pathlib import Path
+import shutil
+from typing import Any
+
+import platformdirs
+
+from logilica_cli.cache_index import locked, read_index, write_index
+from logilica_cli.export_plan import normalize_dashboard_url
+from logilica_cli.update_gdoc import APPLICATION_NAME
+
+DEFAULT_DOWNLOAD_CACHE_DIR_NAME = "pdf_cache"
+
+
+def get_download_cache_dir(config: dict[str, Any]) -> Path:
+    """Get the Path to the directory holding the cached PDFs.
+
+    The default is a subdirectory of the user "cache directory"; it can be
+    overridden with the `download_cache_dir` key under "config" -> "logilica".
+    """
+    configured = config.get("logilica", {}).get("download_cache_dir")
+    if configured:
+        return Path(configured).expanduser()
+    cache_root = platformdirs.user_cache_path(APPLICATION_NAME, ensure_exists=True)
+    return cache_root / DEFAULT_DOWNLOAD_CACHE_DIR_NAME
+
+
+class DownloadCache:
+    """Content-addressed cache of exported dashboard PDFs.
+
+    Each PDF is stored under the hash of its contents; an index maps the
+    (normalized) dashboard URL, which includes the dashboard's `variables`,
+    i.e., its filters, to the hash and to the time at which the dashboard was
+    exported.  Entries older than `max_age` are considered stale and are not
+    reused.  The PDF of an entry which is replaced is removed (unless another
+    entry refers to it); other files in the directory, which may belong to
+    other runs or to the user, are left alone.  Several runs (e.g., an hourly
+    and a daily report) may use the cache at once:  each save merges the
+    entries which this instance stored into the index as it is on disk (see
+    cache_index).
+    """
+
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, cache_dir: Path, max_age: timedelta):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / self.INDEX_FILE_NAME
+        self.index = read_index(self.index_path, "download cache")
+        # The entries stored by this instance since the index was last saved
+        self.stored: dict[str, dict[str, Any]] = {}
+        # The hashes of the PDFs of the entries replaced by this instance
+        self.replaced: set[str] = set()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(normalize_dashboard_url(url).encode()).hexdigest()
+
+    def fetch(self, url: str, path: Path) -> bool:
+        """Copies the cached PDF for the dashboard to `path`, if there is a
+        fresh and intact one; returns whether it did.
+        """
+        entry = self.index.get(self.key(url))
+        if not entry:
+            return False
+        exported_at = datetime.fromisoformat(entry["exported_at"])
+        age = datetime.now(timezone.utc) - exported_at
+        if age > self.max_age:
+            logging.debug("Cached export of %s is stale (%s old)", url, age)
+            return False
+        blob = self.cache_dir / f"{entry['sha256']}.pdf"
+        if not blob.exists() or self.digest(blob) != entry["sha256"]:
+            logging.warning("Cached export of %s is missing or corrupt", url)
+            return False
+        shutil.copyfile(blob, path)
+        logging.debug("Reusing export of %s from %s (%s old)", url, blob, age)
+        return True
+
+    def store(self, url: str, path: Path) -> None:
+        """Records the freshly exported PDF for the dashboard."""
+        digest = self.digest(path)
+        blob = self.cache_dir / f"{digest}.pdf"
+        if not blob.exists():
+            shutil.copyfile(path, blob)
+        previous = self.index.get(self.key(url))
+        if previous and previous["sha256"] != digest:
+            self.replaced.add(previous["sha256"])
+        self.index[self.key(url)] = self.stored[self.key(url)] = {
+            "url": url,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "sha256": digest,
+            "size": blob.stat().st_size,
+        }
+        self.save()
+
+    def restore(self, teams: dict[str, Any], base_dir_path: Path) -> dict[str, Any]:
+        """Copies the fresh cached PDFs of the teams' dashboards into the
+        downloads directory.
+
+        Returns the teams configuration reduced to the dashboards which still
+        need to be exported.
+        """
+        stale_teams = {}
+        reused = 0
+        for team, dashboards in teams.items():
+            stale = {
+                dashboard: options
+                for dashboard, options in dashboards["team_dashboards"].items()
+                if not self.fetch(options["url"], base_dir_path / options["filename"])
+            }
+            reused += len(dashboards["team_dashboards"]) - len(stale)
+            stale_teams[team] = {**dashboards, "team_dashboards": stale}
+        logging.info("Reusing %d cached dashboard export(s)", reused)
+        return stale_teams
+
+    def save(self) -> None:
+        """Merges the entries stored by this instance into the index on disk,
+        writes the index, and removes the PDFs of the replaced entries which
+        are no longer referenced by it.
+
+        Of two entries for the same dashboard, the more recently exported one
+        is kept, and the PDF of the other one is removed.
+        """
+        with locked(self.index_path):
+            self.index = read_index(self.index_path, "download cache")
+            for key, entry in self.stored.items():
+                current = self.index.get(key)
+                if current and current["exported_at"] > entry["exported_at"]:
+                    self.replaced.add(entry["sha256"])
+                    continue
+                if current and current["sha256"] != entry["sha256"]:
+                    self.replaced.add(current["sha256"])
+                self.index[key] = entry
+            write_index(self.index_path, self.index)
+            referenced = {entry["sha256"] for entry in self.index.values()}
+            for digest in self.replaced - referenced:
+                (self.cache_dir / f"{digest}.pdf").unlink(missing_ok=True)
+        self.stored.clear()
+        self.replaced.clear()
+
+    @staticmethod
+    def digest(path: Path) -> str:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
@@ -0,0 +1,99 @@
+#
+# This module contains the planning of the dashboard exports:  dashboards which
+# are configured for several teams (or several times for one team) with the
+# same URL and filters are exported and rendered only once, and the result is
+# shared by every entry which references them.
+#
+import base64
+import json
+from typing import Any, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# (team, dashboard, options) for one entry in the teams configuration
+DashboardEntry = Tuple[str, str, dict[str, Any]]
+
+
+def normalize_dashboard_url(url: str) -> str:
+    """Returns a canonical form of the dashboard URL, so that URLs which differ
+    only in the case of the scheme and host, a trailing slash, the order of the
+    query parameters, or the encoding of the `variables` parameter (base64
+    encoded JSON) compare equal.
+    """
+    parts = urlsplit(url.strip())
+    query = []
+    for name, value in sorted(parse_qsl(parts.query, keep_blank_values=True)):
+        if name == "variables":
+            try:
+                value = normalize_variables(value)
+            except ValueError:
+                pass
+        query.append((name, value))
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path.rstrip("/"),
+            urlencode(query),
+            "",
+        )
+    )
+
+
+def normalize_variables(value: str) -> str:
+    """Returns a canonical form of a `variables` parameter value:  the base64
+    encoding (standard alphabet, padded) of its JSON, with sorted keys and
+    without whitespace.
+
+    The value may use either base64 alphabet, with or without padding; a "+"
+    which was not percent-encoded in the URL reads as a space and is restored.
+
+    Raises:
+      ValueError: If the value is not base64 encoded JSON.
+    """
+    value = value.replace(" ", "+").replace("-", "+").replace("_", "/")
+    data = base64.b64decode(value + "=" * (-len(value) % 4), validate=True)
+    variables = json.loads(data)
+    return base64.b64encode(
+        json.dumps(variables, sort_keys=True, separators=(",", ":")).encode()
+    ).decode()
+
+
+def export_key(options: dict[str, Any]) -> str:
+    """Returns the key identifying the export of a dashboard entry:  its
+    normalized URL, or its file name if it has no URL.
+    """
+    url = options.get("url")
+    return normalize_dashboard_url(url) if url else f"file:{options['filename']}"
+
+
+class ExportJob(NamedTuple):
+    """A unique dashboard export and the configuration entries which share
+    it; the first entry is the one which is exported.
+    """
+
+    url: Optional[str]
+    entries: list[DashboardEntry]
+
+
+def dashboard_entries(teams: dict[str, Any]) -> list[DashboardEntry]:
+    """Flattens the teams configuration into its entries, in configuration
+    order.
+    """
+    return [
+        (team, dashboard, options)
+        for team, dashboards in teams.items()
+        for dashboard, options in dashboards["team_dashboards"].items()
+    ]
+
+
+def plan_exports(teams: dict[str, Any]) -> list[ExportJob]:
+    """Groups the dashboards of the teams configuration by their export key,
+    in configuration order.
+    """
+    jobs: dict[str, ExportJob] = {}
+    for team, dashboard, options in dashboard_entries(teams):
+        key = export_key(options)
+        if key not in jobs:
+            jobs[key] = ExportJob(options.get("url"), [])
+        jobs[key].entries.append((team, dashboard, options))
+    return list(jobs.values())
@@ -0,0 +1,170 @@
+#
+# This module contains a persistent cache of the dashboard images rendered from
+# the PDFs, so that unchanged dashboards need not be rendered again by later
+# runs (e.g., runs with a different output type, or over the same local PDFs).
+#
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+from pathlib import Path
+import threading
+from typing import Any, Optional, Union
+
+import platformdirs
+
+from logilica_cli.cache_index import locked, read_index, write_index
+from logilica_cli.image_encoding import get_extension
+from logilica_cli.update_gdoc import APPLICATION_NAME
+
+DEFAULT_IMAGE_CACHE_DIR_NAME = "image_cache"
+
+
+def get_image_cache_dir(config: dict[str, Any]) -> Path:
+    """Get the Path to the directory holding the cached images.
+
+    The default is a subdirectory of the user "cache directory"; it can be
+    overridden with the `image_cache_dir` key under "config" -> "logilica".
+    """
+    configured = config.get("logilica", {}).get("image_cache_dir")
+    if configured:
+        return Path(configured).expanduser()
+    cache_root = platformdirs.user_cache_path(APPLICATION_NAME, ensure_exists=True)
+    return cache_root / DEFAULT_IMAGE_CACHE_DIR_NAME
+
+
+class ImageCache:
+    """Cache of rendered dashboard images, limited in size.
+
+    Each image (or each tile of a tiled image) is stored in a file named by
+    its key, which is derived from the hash of the PDF contents and the
+    settings with which it was rendered; an index maps the key to the files,
+    their total size, and the time at which the entry was last used.  When the
+    total size exceeds `max_size` bytes, the least recently used entries are
+    evicted.  Only the files of the entries which this instance evicted or
+    replaced are removed, so other files in the directory (e.g., those of
+    another run in progress) are left alone.  The cache may be used from
+    several threads, and by several runs at once:  each save merges the
+    entries which this instance stored, used, or dropped into the index as it
+    is on disk (see cache_index), so that the runs don't lose each other's
+    entries.
+    """
+
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / self.INDEX_FILE_NAME
+        self.index = read_index(self.index_path, "image cache")
+        # The entries stored or used, and those evicted or found missing, by
+        # this instance since the index was last saved
+        self.updated: dict[str, dict[str, Any]] = {}
+        self.dropped: dict[str, dict[str, Any]] = {}
+        # The files of the entries evicted or replaced by this instance
+        self.removed: set[str] = set()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(pdf_digest: str, settings: dict[str, Any]) -> str:
+        """Returns the key of the image rendered from the PDF with the given
+        hash with the given settings.
+        """
+        identity = json.dumps([pdf_digest, settings], sort_keys=True)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Union[bytes, list[bytes]]]:
+        """Returns the cached image (or list of tiles), if there is an intact
+        one, marking it as recently used.
+        """
+        with self.lock:
+            entry = self.index.get(key)
+            if not entry:
+                return None
+            try:
+                images = [
+                    (self.cache_dir / name).read_bytes() for name in entry["files"]
+                ]
+            except OSError:
+                logging.warning("Cached image %s is missing", key)
+                self.drop(key)
+                self.save()
+                return None
+            entry["used_at"] = datetime.now(timezone.utc).isoformat()
+            self.updated[key] = entry
+            self.save()
+        logging.debug("Reusing cached image %s", key)
+        return images[0] if entry["tiles"] is None else images
+
+    def put(self, key: str, image: Union[bytes, list[bytes]]) -> None:
+        """Stores the image (or list of tiles), evicting the least recently
+        used entries as needed to keep the cache within its size limit.
+        """
+        tiles = None if isinstance(image, bytes) else len(image)
+        images = [image] if tiles is None else image
+        suffixes = [""] if tiles is None else [f".{i}" for i in range(1, tiles + 1)]
+        names = [
+            f"{key}{suffix}.{get_extension(contents)}"
+            for suffix, contents in zip(suffixes, images)
+        ]
+        with self.lock:
+            for name, contents in zip(names, images):
+                (self.cache_dir / name).write_bytes(contents)
+            if key in self.index:
+                self.removed.update(self.index[key]["files"])
+            self.index[key] = self.updated[key] = {
+                "files": names,
+                "tiles": tiles,
+                "size": sum(len(contents) for contents in images),
+                "used_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.dropped.pop(key, None)
+            self.save()
+
+    def evict(self) -> None:
+        """Removes the least recently used entries from the index until the
+        cache is within its size limit.
+        """
+        total = sum(entry["size"] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda e: e[1]["used_at"]):
+            if total <= self.max_size:
+                break
+            logging.debug("Evicting cached image %s", key)
+            self.drop(key)
+            total -= entry["size"]
+
+    def drop(self, key: str) -> None:
+        """Removes the entry from the index, marking its files for removal."""
+        entry = self.dropped[key] = self.index.pop(key)
+        self.updated.pop(key, None)
+        self.removed.update(entry["files"])
+
+    def save(self) -> None:
+        """Merges the changes of this instance into the index on disk,
+        evicts entries as needed, writes the index, and removes the images of
+        the evicted and replaced entries which are no longer referenced by it.
+
+        An entry which another run has used (or stored) more recently than this
+        instance is kept as that run left it.
+        """
+        with locked(self.index_path):
+            self.index = read_index(self.index_path, "image cache")
+            for key, entry in self.dropped.items():
+                current = self.index.get(key)
+                if current and current["used_at"] <= entry["used_at"]:
+                    del self.index[key]
+            for key, entry in self.updated.items():
+                current = self.index.get(key)
+                if not current or current["used_at"] <= entry["used_at"]:
+                    self.index[key] = entry
+            self.evict()
+            write_index(self.index_path, self.index)
+            referenced = {
+                name for entry in self.index.values() for name in entry["files"]
+            }
+            for name in self.removed - referenced:
+                (self.cache_dir / name).unlink(missing_ok=True)
+        self.updated.clear()
+        self.dropped.clear()
+        self.removed.clear()
@@ -0,0 +1,127 @@
+#
+# This module contains the encoding of the dashboard images:  by default, they
+# are encoded as PNG files with MuPDF's default settings; since dashboards are
+# mostly flat colors and text, they can often be made much smaller by reducing
+# them to a palette, by compressing them harder, or by encoding them as
+# (lossless or lossy) WebP or as JPEG files, using Pillow.
+#
+from collections import Counter
+from io import BytesIO
+import logging
+from typing import Literal, NamedTuple, Optional
+
+from PIL import Image
+import pymupdf
+
+ImageFormat = Literal["png", "webp", "jpeg"]
+
+# The default JPEG quality (MuPDF's)
+JPEG_QUALITY = 95
+
+# The MIME type and file extension of each format
+IMAGE_TYPES: dict[ImageFormat, tuple[str, str]] = {
+    "png": ("image/png", "png"),
+    "webp": ("image/webp", "webp"),
+    "jpeg": ("image/jpeg", "jpg"),
+}
+
+
+def get_image_format(image: bytes) -> ImageFormat:
+    """Returns the format of the encoded image, from its signature."""
+    if image.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if image.startswith(b"RIFF") and image[8:12] == b"WEBP":
+        return "webp"
+    return "png"
+
+
+def get_mime_type(image: bytes) -> str:
+    return IMAGE_TYPES[get_image_format(image)][0]
+
+
+def get_extension(image: bytes) -> str:
+    return IMAGE_TYPES[get_image_format(image)][1]
+
+
+class ImageEncoder(NamedTuple):
+    """Settings for encoding the dashboard images.
+
+    Args:
+      format: the image file format
+      quality: for JPEG, and for lossy WebP, the quality from 1 to 100; if
+        unspecified, WebP images are lossless, and JPEG images use MuPDF's
+        default quality
+      compression: the compression effort, from 0 (fastest) to 9 (smallest):
+        the zlib level for PNG, scaled to the method (0 to 6) for WebP
+      colors: if specified, PNG and WebP images are reduced to a palette of at
+        most this many colors (up to 256); JPEG images are not
+    """
+
+    format: ImageFormat = "png"
+    quality: Optional[int] = None
+    compression: Optional[int] = None
+    colors: Optional[int] = None
+
+    @property
+    def is_default(self) -> bool:
+        return self == ImageEncoder()
+
+    def encode(self, pix: pymupdf.Pixmap) -> bytes:
+        """Encodes the pixmap."""
+        if self.is_default:
+            return pix.tobytes(output="png")
+        if self.format == "jpeg":
+            return pix.tobytes(output="jpg", jpg_quality=self.quality or JPEG_QUALITY)
+        mode = "RGBA" if pix.alpha else "RGB"
+        if pix.n - pix.alpha == 1:
+            mode = "LA" if pix.alpha else "L"
+        return self.save(Image.frombytes(mode, (pix.width, pix.height), pix.samples))
+
+    def save(self, image: Image.Image) -> bytes:
+        """Encodes the Pillow image."""
+        if self.colors is not None and self.format != "jpeg":
+            image = image.quantize(colors=self.colors)
+        elif self.format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        options: dict
+        if self.format == "png":
+            options = {"optimize": self.compression is None}
+            if self.compression is not None:
+                options["compress_level"] = self.compression
+        elif self.format == "webp":
+            options = {"lossless": self.quality is None}
+            if self.quality is not None:
+                options["quality"] = self.quality
+            if self.compression is not None:
+                options["method"] = round(self.compression * 6 / 9)
+        else:
+            options = {"quality": self.quality or JPEG_QUALITY}
+        data = BytesIO()
+        image.save(data, format=self.format.upper(), **options)
+        return data.getvalue()
+
+
+def report_encoding(encoder: ImageEncoder, stats: Counter) -> None:
+    """Logs the number and size of the images encoded, and, for settings
+    other than the default, the bytes saved compared with the default PNG
+    encoding, if they were measured.
+    """
+    if not stats["images"]:
+        return
+    if encoder.is_default or not stats["png_bytes"]:
+        logging.info(
+            "Encoded %d images as %s: %d bytes",
+            stats["images"],
+            encoder.format.upper(),
+            stats["bytes"],
+        )
+        return
+    saved = stats["png_bytes"] - stats["bytes"]
+    logging.info(
+        "Encoded %d images as %s: %d bytes, %d bytes (%.0f%%) smaller than PNG",
+        stats["images"],
+        encoder.format.upper(),
+        stats["bytes"],
+        saved,
+        100 * saved / stats["png_bytes"],
+    )
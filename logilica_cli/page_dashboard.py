@@ -1,13 +1,156 @@
+import asyncio
 import logging
 import pathlib
-from typing import Any
+import shutil
+from typing import Any, Awaitable, Callable, Literal, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
 
-from playwright.sync_api import Page
+try:
+    from typing import TypeAlias  # Python 3.10+
+except ImportError:
+    from typing_extensions import TypeAlias  # Python 3.9
+
+from playwright.async_api import APIResponse, Page, Request, Response
+
+from logilica_cli import profiling
+from logilica_cli.download_cache import DownloadCache
+from logilica_cli.export_plan import (
+    DashboardEntry,
+    ExportJob,
+    normalize_dashboard_url,
+    plan_exports,
+)
+from logilica_cli.run_manifest import RunManifest
+
+# (team, dashboard) -> description of the failure
+DownloadFailures: TypeAlias = dict[Tuple[str, str], str]
+
+# How an export is obtained:  by driving the export dialog and the resulting
+# download, by capturing the PDF from the response to the request made by the
+# web UI, or by replaying a captured request for the other dashboards.
+ExportMode: TypeAlias = Literal["dialog", "network", "replay"]
+
+
+def fan_out(job: ExportJob, base_dir_path: pathlib.Path) -> None:
+    """Copies the PDF exported for the job's first entry to the files of the
+    other entries which share the export.
+    """
+    source = base_dir_path / job.entries[0][2]["filename"]
+    for _, _, options in job.entries[1:]:
+        target = base_dir_path / options["filename"]
+        if target != source:
+            shutil.copyfile(source, target)
+
+
+def record_failure(failures: DownloadFailures, job: ExportJob, err: Exception) -> None:
+    """Attributes the failure of an export to every entry sharing it."""
+    for team, dashboard, _ in job.entries:
+        failures[(team, dashboard)] = f"{type(err).__name__}: {err}"
+
+
+def report_downloads(downloaded: dict[str, int], failures: DownloadFailures) -> None:
+    """Logs the number of dashboards downloaded for each team.
+
+    Raises:
+      RuntimeError: If any dashboards could not be downloaded.
+    """
+    for team, count in downloaded.items():
+        logging.info(
+            "Downloaded %d dashboard%s for '%s' team",
+            count,
+            "s" if count > 1 else "",
+            team,
+        )
+
+    if failures:
+        logging.error("Failed to download %d dashboard(s)", len(failures))
+        for (team, dashboard), failure in failures.items():
+            logging.error("'%s' for team '%s': %s", dashboard, team, failure)
+        raise RuntimeError(failures)
+
+
+def is_pdf_response(response: Response | APIResponse) -> bool:
+    content_type = response.headers.get("content-type", "")
+    return response.ok and content_type.startswith("application/pdf")
+
+
+def dashboard_identity(url: str) -> list[str]:
+    """Returns the values which identify a dashboard export:  the dashboard ID
+    (the last element of the URL path, or the `chartId` parameter) and the
+    `variables` parameter with the dashboard's filters, if any.
+    """
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    dashboard_id = query.get("chartId", [parts.path.rstrip("/").rsplit("/", 1)[-1]])
+    return dashboard_id[:1] + query.get("variables", [])[:1]
+
+
+class ExportRequest(NamedTuple):
+    """The request made by the web UI to export a dashboard, captured so that
+    it can be replayed for other dashboards.
+    """
+
+    method: str
+    url: str
+    headers: dict[str, str]
+    post_data: Optional[str]
+    identity: list[str]
+    # The URL of the dashboard whose export this is
+    dashboard_url: str
+
+    # Headers which are supplied by the request context itself
+    CONTEXT_HEADERS = ("content-length", "cookie", "host")
+
+    @classmethod
+    async def capture(cls, request: Request, dashboard_url: str):
+        headers = {
+            name: value
+            for name, value in (await request.all_headers()).items()
+            if not name.startswith(":") and name not in cls.CONTEXT_HEADERS
+        }
+        return cls(
+            method=request.method,
+            url=request.url,
+            headers=headers,
+            post_data=request.post_data,
+            identity=dashboard_identity(dashboard_url),
+            dashboard_url=dashboard_url,
+        )
+
+    def for_dashboard(self, dashboard_url: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Returns the URL and the body of the export request for another
+        dashboard, obtained by substituting its identity into this request.
+
+        Returns None if this request does not contain the identity of its own
+        dashboard, since then the substitution cannot be relied on, or if the
+        substitution leaves the request unchanged although the dashboard is a
+        different one (e.g., the dashboards differ only in a parameter which
+        is not part of their identity), since then the request would export
+        this request's dashboard again.
+        """
+        identity = dashboard_identity(dashboard_url)
+        if len(identity) != len(self.identity):
+            return None
+        url, body = self.url, self.post_data or ""
+        for old, new in zip(self.identity, identity):
+            forms = ((old, new), (quote(old), quote(new)))
+            if not any(old_form in url or old_form in body for old_form, _ in forms):
+                return None
+            for old_form, new_form in forms:
+                url = url.replace(old_form, new_form)
+                body = body.replace(old_form, new_form)
+        if (url, body) == (self.url, self.post_data or "") and normalize_dashboard_url(
+            dashboard_url
+        ) != normalize_dashboard_url(self.dashboard_url):
+            return None
+        return url, body or None
 
 
 class DashboardPage:
+    """Page Object to handle the export of dashboards."""
 
     PDF_EXPORT_TIMEOUT = 60000
+    RETRY_DELAY = 5  # seconds before the first retry of a failed export
 
     def __init__(self, page: Page):
         # PDF generation might take longer than default 30000 ms timeout, so modify for this page in global
@@ -17,38 +160,186 @@ class DashboardPage:
         self.export_pdf_button = page.get_by_role("button", name="Export PDF")
         self.download_button = page.get_by_role("button", name="Download").nth(1)
         self.close_download_button = page.get_by_role("button", name="Close").nth(1)
+        self.export_request: Optional[ExportRequest] = None
 
-    def download_dashboard_to(self, path: pathlib.Path) -> None:
-        self.export_pdf_button.click()
+    async def download_dashboard_to(self, path: pathlib.Path) -> None:
+        await self.export_pdf_button.click()
         # download file and close the dialog afterwards
-        with self.page.expect_download() as download_info:
-            self.download_button.click()
-            download = download_info.value
-            download.save_as(path)
-            self.close_download_button.click()
+        async with self.page.expect_download() as download_info:
+            await self.download_button.click()
+        download = await download_info.value
+        await download.save_as(path)
+        await self.close_download_button.click()
         logging.debug("Download stored in '%s'", path)
 
-    def download_team_dashboards(
+    async def capture_dashboard_to(self, path: pathlib.Path) -> Request:
+        """Exports the dashboard, reading the PDF from the network response to
+        the export request instead of waiting for the download dialog.
+
+        Returns the export request.
+        """
+        async with self.page.expect_response(is_pdf_response) as response_info:
+            await self.export_pdf_button.click()
+        response = await response_info.value
+        path.write_bytes(await response.body())
+        logging.debug("Captured export stored in '%s'", path)
+        return response.request
+
+    async def replay_export_to(
+        self, export_request: ExportRequest, dashboard_url: str, path: pathlib.Path
+    ) -> bool:
+        """Exports the dashboard by replaying a captured export request,
+        without loading the dashboard; returns whether the replay succeeded.
+        """
+        replay = export_request.for_dashboard(dashboard_url)
+        if not replay:
+            logging.debug("The export request cannot be adapted to %s", dashboard_url)
+            return False
+        url, body = replay
+        response = await self.page.context.request.fetch(
+            url,
+            method=export_request.method,
+            headers=export_request.headers,
+            data=body,
+            timeout=self.PDF_EXPORT_TIMEOUT,
+        )
+        if not is_pdf_response(response):
+            logging.debug("Replayed export request failed: %s", response.status)
+            return False
+        path.write_bytes(await response.body())
+        logging.debug("Replayed export stored in '%s'", path)
+        return True
+
+    async def export_dashboard_to(
+        self, dashboard_url: str, path: pathlib.Path, export_mode: ExportMode
+    ) -> None:
+        if self.export_request and export_mode == "replay":
+            if await self.replay_export_to(self.export_request, dashboard_url, path):
+                return
+            logging.debug("Falling back to exporting '%s' from its page", path)
+
+        with profiling.span("goto", url=dashboard_url):
+            await self.page.goto(url=dashboard_url)
+        if export_mode == "dialog":
+            await self.download_dashboard_to(path=path)
+            return
+
+        request = await self.capture_dashboard_to(path=path)
+        if export_mode == "replay" and not self.export_request:
+            export_request = await ExportRequest.capture(request, dashboard_url)
+            if export_request.for_dashboard(dashboard_url):
+                self.export_request = export_request
+            else:
+                logging.debug("The export request cannot be replayed: %s", request)
+
+    async def export_dashboard_with_retries(
+        self,
+        dashboard_url: str,
+        path: pathlib.Path,
+        export_mode: ExportMode,
+        retries: int,
+    ) -> None:
+        """Exports the dashboard, retrying up to `retries` times after delays
+        which double each time; raises the exception from the last attempt.
+        """
+        for attempt in range(retries):
+            try:
+                await self.export_dashboard_to(dashboard_url, path, export_mode)
+                return
+            except Exception as err:
+                delay = self.RETRY_DELAY * 2**attempt
+                logging.warning(
+                    "Exporting '%s' failed (%s: %s); retrying in %g seconds",
+                    path.name,
+                    type(err).__name__,
+                    err,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+        await self.export_dashboard_to(dashboard_url, path, export_mode)
+
+    async def download_team_dashboards(
         self,
         teams: dict[str, Any],
         base_dir_path: pathlib.Path,
         *,
         menu_dropdown="Custom Reports",
+        concurrency: int = 1,
+        cache: Optional[DownloadCache] = None,
+        export_mode: ExportMode = "dialog",
+        retries: int = 0,
+        manifest: Optional[RunManifest] = None,
+        on_downloaded: Optional[Callable[[DashboardEntry], Awaitable[None]]] = None,
     ) -> None:
-        for team, dashboards in teams.items():
-            for dashboard, options in dashboards["team_dashboards"].items():
+        """Downloads the dashboards of all teams.
+
+        The dashboards are placed in a work queue which is served by
+        `concurrency` tasks, each driving its own page opened in the browser
+        context of this page (and so sharing its login).  Dashboards which are
+        configured more than once (with equivalent URLs) are exported only
+        once.  A failed export is retried up to `retries` times.  Each
+        downloaded dashboard is recorded in the cache and in the run manifest,
+        if they are provided.
+
+        In "replay" export mode, the first export request captured by any of
+        the pages is shared with the others.
+
+        Raises:
+          RuntimeError: If any dashboards could not be downloaded; all the
+            other dashboards are downloaded regardless.
+        """
+        jobs: asyncio.Queue[ExportJob] = asyncio.Queue()
+        for job in plan_exports(teams):
+            jobs.put_nowait(job)
+        workers = [self]
+        for _ in range(min(concurrency, jobs.qsize()) - 1):
+            page = await self.page.context.new_page()
+            workers.append(DashboardPage(page=page))
+
+        def shared_export_request() -> Optional[ExportRequest]:
+            return next((w.export_request for w in workers if w.export_request), None)
+
+        logging.debug("Downloading dashboards using %d page(s)", len(workers))
+
+        failures: DownloadFailures = {}
+        downloaded: dict[str, int] = {team: 0 for team in teams}
+
+        async def serve(worker: DashboardPage) -> None:
+            while not jobs.empty():
+                job = jobs.get_nowait()
+                team, dashboard, options = job.entries[0]
                 logging.debug(
                     "Downloading dashboard '%s / %s' for team '%s'",
                     menu_dropdown,
                     dashboard,
                     team,
                 )
-                self.page.goto(url=options["url"])
-                self.download_dashboard_to(path=base_dir_path / options["filename"])
-
-            logging.info(
-                "Downloaded %d dashboard%s for '%s' team",
-                len(dashboards["team_dashboards"]),
-                "s" if len(dashboards["team_dashboards"]) > 1 else "",
-                team,
-            )
+                worker.export_request = shared_export_request()
+                try:
+                    with profiling.span("export", dashboard=dashboard):
+                        await worker.export_dashboard_with_retries(
+                            job.url,
+                            base_dir_path / options["filename"],
+                            export_mode,
+                            retries,
+                        )
+                    fan_out(job, base_dir_path)
+                except Exception as err:
+                    record_failure(failures, job, err)
+                    continue
+                for team, dashboard, options in job.entries:
+                    downloaded[team] += 1
+                    if cache:
+                        cache.store(options["url"], base_dir_path / options["filename"])
+                    if manifest:
+                        manifest.record(team, dashboard, options, "downloaded")
+                    if on_downloaded:
+                        await on_downloaded((team, dashboard, options))
+
+        try:
+            await asyncio.gather(*(serve(worker) for worker in workers))
+        finally:
+            for worker in workers[1:]:
+                await worker.page.close()
+
+        report_downloads(downloaded, failures)
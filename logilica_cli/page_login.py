@@ -2,13 +2,15 @@ import logging
 from typing import Any
 
 import click
-from playwright.sync_api import expect, Page
+from playwright.async_api import expect, Page, TimeoutError
 
 
 class LoginPage:
     """Page Object to handle interactions with Login Page."""
 
+    LOGILICA_HOME = "https://logilica.io/"
     LOGILICA_LOGIN = "https://logilica.io/login"
+    SESSION_CHECK_TIMEOUT = 15000
 
     def __init__(self, page: Page, credentials: dict[str, Any]):
         self.page = page
@@ -19,33 +21,49 @@ class LoginPage:
         self.email_field = page.locator("#email")
         self.password_field = page.locator("#password")
         self.login_button = page.get_by_role("button", name="Login")
+        # Either the login choices or the navigation panel are shown on the
+        # main page, depending on whether the browser has a valid session.
+        self.session_indicator = self.email_login_button.or_(
+            page.get_by_role("link", name="Settings")
+        ).first
 
-    def navigate(self):
-        self.page.goto(self.LOGILICA_LOGIN)
+    async def navigate(self):
+        await self.page.goto(self.LOGILICA_LOGIN)
 
-    def login_with_email(self):
+    async def has_session(self) -> bool:
+        """Checks whether the browser is already logged into Logilica (e.g.,
+        using a cached storage state).
+        """
+        await self.page.goto(self.LOGILICA_HOME)
+        try:
+            await self.session_indicator.wait_for(timeout=self.SESSION_CHECK_TIMEOUT)
+        except TimeoutError:
+            return False
+        return not await self.email_login_button.is_visible()
+
+    async def login_with_email(self):
         logging.info("Logging into Logilica via email")
-        self.email_login_button.click()
-        self.domain_field.fill(self.credentials["domain"])
-        self.email_field.fill(self.credentials["username"])
-        self.password_field.fill(self.credentials["password"])
-        self.login_button.click()
+        await self.email_login_button.click()
+        await self.domain_field.fill(self.credentials["domain"])
+        await self.email_field.fill(self.credentials["username"])
+        await self.password_field.fill(self.credentials["password"])
+        await self.login_button.click()
 
         try:
-            expect(self.page).not_to_have_url(self.LOGILICA_LOGIN)
+            await expect(self.page).not_to_have_url(self.LOGILICA_LOGIN)
         except AssertionError:
             logging.error("Login failed")
             raise ValueError("Login credentials rejected")
         logging.debug("Login to Logilica complete")
 
-    def login_with_sso(self):
+    async def login_with_sso(self):
         logging.info("Logging into Logilica via SSO")
-        self.sso_login_button.click()
-        self.domain_field.fill(self.credentials["domain"])
-        self.login_button.click()
+        await self.sso_login_button.click()
+        await self.domain_field.fill(self.credentials["domain"])
+        await self.login_button.click()
 
         click.echo("Please complete the SSO login in the Chromium window.")
-        self.page.wait_for_url(
+        await self.page.wait_for_url(
             "**/*redirect*", timeout=120000
         )  # "https://logilica.io/thirdPartyLogin/redirect"
         click.echo(
@@ -56,4 +74,4 @@ class LoginPage:
         # can return to navigation, so wait for the main page to appear before
         # returning control to the caller.  (The main page is locally unique in
         # that its URL ends in a slash (https://logilica.io/).
-        self.page.wait_for_url(lambda s: s.endswith("/"))
+        await self.page.wait_for_url(lambda s: s.endswith("/"))
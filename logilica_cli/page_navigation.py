@@ -1,7 +1,7 @@
 import logging
 from typing import Optional
 
-from playwright.sync_api import Page, TimeoutError
+from playwright.async_api import Page, TimeoutError
 
 
 class NavigationPanel:
@@ -12,7 +12,7 @@ class NavigationPanel:
     def __init__(self, page: Page):
         self.page = page
 
-    def navigate(self, *, menu_dropdown: Optional[str], link_name: str) -> None:
+    async def navigate(self, *, menu_dropdown: Optional[str], link_name: str) -> None:
         """Opens a link in navigation panel.
 
         Opens a link, opens a dropdown first if provided.
@@ -30,7 +30,7 @@ class NavigationPanel:
         if menu_dropdown:
             for first_try in (True, False):
                 try:
-                    link_locator.wait_for(
+                    await link_locator.wait_for(
                         state="visible", timeout=self.DROPDOWN_TIMEOUT
                     )
                     break
@@ -39,7 +39,7 @@ class NavigationPanel:
                         raise
 
                     logging.debug("Opening dropdown '%s' first", menu_dropdown)
-                    self.page.get_by_role("link", name=menu_dropdown).click()
+                    await self.page.get_by_role("link", name=menu_dropdown).click()
 
         # open link
-        link_locator.click()
+        await link_locator.click()
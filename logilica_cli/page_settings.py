@@ -2,14 +2,14 @@ from collections import defaultdict
 from functools import partial
 import logging
 import re
-from typing import Any, Callable, Generator, Optional, Tuple
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional, Tuple
 
 try:
     from typing import TypeAlias  # Python 3.10+
 except ImportError:
     from typing_extensions import TypeAlias  # Python 3.9
 
-from playwright.sync_api import expect, Locator, Page
+from playwright.async_api import expect, Locator, Page
 
 from logilica_cli.page_navigation import NavigationPanel
 
@@ -22,8 +22,21 @@ class SettingsPage:
     Provides interactions with Settings / Integrations.
     """
 
+    # Upper bounds for the UI to reflect changes; the waits end as soon as the
+    # UI is observed to be ready, polling every POLL_INTERVAL.
     IMPORT_TIMEOUT = 9000
     AVAILABLE_LIST_TIMEOUT = 54000
+    POLL_INTERVAL = 1000
+    # The number of consecutive polls which must see the same (non-zero)
+    # number of table rows for the list of available entities to be ready.
+    STABLE_POLLS = 3
+    # The list of available entities, relative to its search field:  the
+    # outermost ancestor which contains no other search field (so that it does
+    # not contain the list of imported entities, which has its own).
+    AVAILABLE_LIST_SELECTOR = (
+        "xpath=ancestor::*"
+        "[count(.//input[starts-with(@placeholder, 'Search ')]) = 1][last()]"
+    )
 
     def __init__(self, page: Page):
 
@@ -52,7 +65,7 @@ class SettingsPage:
             "input[placeholder='Search board...']"
         ).nth(1)
 
-    def open_integration_configuration(
+    async def open_integration_configuration(
         self, *, integration: str, connector: str
     ) -> None:
         """Opens Integration Configuration.
@@ -64,14 +77,14 @@ class SettingsPage:
         logging.debug(
             "Opening integration '%s', connector type:'%s'", integration, connector
         )
-        self.page.locator("div.items-center").filter(has_text=connector).filter(
+        await self.page.locator("div.items-center").filter(has_text=connector).filter(
             has_text=integration
         ).get_by_role("button", name="Configure").click()
-        expect(
+        await expect(
             self.page.get_by_role("heading", name=f"{connector} Settings")
         ).to_be_visible()
 
-    def sync_integrations(self, integrations: dict[str, Any]) -> None:
+    async def sync_integrations(self, integrations: dict[str, Any]) -> None:
         """Synchronizes integration configuration from file to UI.
 
         Updates Logilica integration configuration for all connectors specified
@@ -99,14 +112,14 @@ class SettingsPage:
             )
 
             # open configuration UI
-            NavigationPanel(self.page).navigate(
+            await NavigationPanel(self.page).navigate(
                 link_name="Integrations", menu_dropdown="Settings"
             )
-            self.open_integration_configuration(
+            await self.open_integration_configuration(
                 integration=integration_name, connector=connector
             )
             # process public repositories
-            self.process_repositories(
+            await self.process_repositories(
                 connector=connector,
                 integration_name=integration_name,
                 repositories=public_repos,
@@ -114,7 +127,7 @@ class SettingsPage:
                 failures=sync_failures,
             )
             # process membership-based repositories
-            self.process_repositories(
+            await self.process_repositories(
                 connector=connector,
                 integration_name=integration_name,
                 repositories=member_repos,
@@ -125,7 +138,7 @@ class SettingsPage:
                 failures=sync_failures,
             )
             # process membership based boards
-            self.process_boards(
+            await self.process_boards(
                 connector=connector,
                 integration_name=integration_name,
                 boards=boards,
@@ -149,14 +162,19 @@ class SettingsPage:
 
     # helpers
 
-    def wait_for_available_entities(
+    async def wait_for_available_entities(
         self,
         *,
         entity_ids: list[str],
         entity_type: str,
-    ) -> Generator[str, None, None]:
+        available_search_field: Locator,
+    ) -> AsyncGenerator[str, None]:
         """Waits for Integration / Settings / Available Repositories or
         Available Boards, afterwards yields the list.
+
+        Only the rows of the list of available entities (located from its
+        search field) are counted, since the rows of the imported entities
+        are shown before the available ones have loaded.
         """
         if entity_ids:
             logging.debug(
@@ -164,18 +182,45 @@ class SettingsPage:
                 self.AVAILABLE_LIST_TIMEOUT,
                 f"{entity_type}s" if len(entity_ids) > 1 else entity_type,
             )
-            self.page.wait_for_timeout(self.AVAILABLE_LIST_TIMEOUT)
-            yield from entity_ids
+            available_list = available_search_field.locator(
+                self.AVAILABLE_LIST_SELECTOR
+            )
+            await self.wait_for_stable_count(
+                available_list.get_by_role("row"),
+                timeout=self.AVAILABLE_LIST_TIMEOUT,
+            )
+            for entity_id in entity_ids:
+                yield entity_id
+
+    async def wait_for_stable_count(self, locator: Locator, *, timeout: int) -> int:
+        """Waits until the number of elements matching the locator is non-zero
+        and has not changed for STABLE_POLLS polls, or until the timeout (in
+        milliseconds) expires; returns the last count.
 
-    def process_entities(
+        The lists are populated asynchronously, so a stable count indicates
+        that the table has finished loading.
+        """
+        last_count, stable_polls = None, 0
+        for _ in range(max(1, timeout // self.POLL_INTERVAL)):
+            count = await locator.count()
+            stable_polls = stable_polls + 1 if count and count == last_count else 0
+            if stable_polls >= self.STABLE_POLLS - 1:
+                return count
+            last_count = count
+            await self.page.wait_for_timeout(self.POLL_INTERVAL)
+        logging.debug("The number of rows did not settle within %d ms", timeout)
+        return last_count
+
+    async def process_entities(
         self,
         *,
         connector: str,
         integration_name: str,
         entity_ids: list[str],
-        search_function: Callable[[str, str, Locator], bool],
-        add_function: Callable[[str, str, Locator], None],
-        check_function: Callable[[list[str]], list[str]],
+        search_function: Callable[..., Awaitable[bool]],
+        add_function: Callable[..., Awaitable[bool]],
+        check_function: Callable[..., Awaitable[list[Tuple[str, str]]]],
+        available_search_field: Locator,
         failures: IntegrationSyncFailures,
     ) -> None:
         """Makes sure that entities (could be a repository slug, or a board
@@ -188,11 +233,13 @@ class SettingsPage:
         added_entities: list[str] = []
         entity_type = self.entity_type(connector)
 
-        for entity_id in self.wait_for_available_entities(
-            entity_ids=entity_ids, entity_type=entity_type
+        async for entity_id in self.wait_for_available_entities(
+            entity_ids=entity_ids,
+            entity_type=entity_type,
+            available_search_field=available_search_field,
         ):
-            if not search_function(entity_id=entity_id):
-                if add_function(entity_id=entity_id):
+            if not await search_function(entity_id=entity_id):
+                if await add_function(entity_id=entity_id):
                     added_entities.append(entity_id)
                 else:
                     failures[(connector, integration_name)].append(
@@ -201,17 +248,17 @@ class SettingsPage:
                             f"❌{entity_type} {entity_id} was not in the list of available {entity_type}s or import failed.",
                         )
                     )
-        missing_entries = check_function(entity_ids=added_entities)
+        missing_entries = await check_function(entity_ids=added_entities)
         if missing_entries:
             failures[(connector, integration_name)].extend(missing_entries)
 
-    def process_repositories(
+    async def process_repositories(
         self,
         *,
         connector: str,
         integration_name: str,
         repositories: list[str],
-        add_function: Callable[[str, str, Locator], bool],
+        add_function: Callable[..., Awaitable[bool]],
         failures: IntegrationSyncFailures,
     ) -> None:
         """Adds all repositories into connector setup as membership or public
@@ -230,23 +277,24 @@ class SettingsPage:
             entity_type=entity_type,
             search_function=search_repository,
         )
-        self.process_entities(
+        await self.process_entities(
             connector=connector,
             integration_name=integration_name,
             entity_ids=repositories,
             search_function=search_repository,
             add_function=partial(add_function, entity_type=entity_type),
             check_function=check_repositories,
+            available_search_field=self.search_available_repos_field,
             failures=failures,
         )
 
-    def process_boards(
+    async def process_boards(
         self,
         *,
         connector: str,
         integration_name: str,
         boards: list[str],
-        add_function: Callable[[str, str, Locator], bool],
+        add_function: Callable[..., Awaitable[bool]],
         failures: IntegrationSyncFailures,
     ) -> None:
         """Adds all boards into connector setup as membership boards."""
@@ -263,55 +311,64 @@ class SettingsPage:
             entity_type=entity_type,
             search_function=search_board,
         )
-        self.process_entities(
+        await self.process_entities(
             connector=connector,
             integration_name=integration_name,
             entity_ids=boards,
             search_function=search_board,
             add_function=partial(add_function, entity_type=entity_type),
             check_function=check_boards,
+            available_search_field=self.search_available_boards_field,
             failures=failures,
         )
 
-    def has_entity_imported(
+    async def has_entity_imported(
         self, *, entity_id: str, entity_type: str, search_field: Locator
     ) -> bool:
-        search_field.fill(entity_id)
+        await search_field.fill(entity_id)
 
         # here we need to find the innermost div element that exactly matches repository slug
-        found = self.page.get_by_text(text=entity_id, exact=True).nth(0).is_visible()
+        found = (
+            await self.page.get_by_text(text=entity_id, exact=True).nth(0).is_visible()
+        )
         if found:
             logging.debug("✅%s '%s' is imported", entity_type, entity_id)
 
-        search_field.clear()
+        await search_field.clear()
         return found
 
-    def check_imported_entities(
+    async def check_imported_entities(
         self,
         *,
         entity_ids: list[str],
         entity_type: str,
-        search_function: Callable[[str, str, Locator], bool],
-    ) -> list[(str, str)]:
+        search_function: Callable[..., Awaitable[bool]],
+    ) -> list[Tuple[str, str]]:
         if not entity_ids:
             return []
 
         logging.debug(
-            "Waiting %d milliseconds for %d newly added %s to be reflected in the UI",
+            "Waiting up to %d milliseconds for %d newly added %s to be reflected in the UI",
             self.IMPORT_TIMEOUT,
             len(entity_ids),
             entity_type,
         )
-        # we should not run a generic wait however the UI doesn't give us other option
-        self.page.wait_for_timeout(self.IMPORT_TIMEOUT)
+        # The UI doesn't signal the completion of an import, so poll for the
+        # entries until they all appear or the timeout expires.
+        pending = list(entity_ids)
+        for _ in range(max(1, self.IMPORT_TIMEOUT // self.POLL_INTERVAL)):
+            await self.page.wait_for_timeout(self.POLL_INTERVAL)
+            pending = [
+                entry for entry in pending if not await search_function(entity_id=entry)
+            ]
+            if not pending:
+                break
         missing_entries = [
-            (entry, f"❌{entity_type} {entry} was not imported.")
-            for entry in entity_ids
-            if not search_function(entity_id=entry)
+            (entry, f"❌{entity_type} {entry} was not imported.") for entry in pending
         ]
         return missing_entries
 
-    def add_public_repository(
+    async def add_public_repository(
         self,
         *,
         entity_id: str,
@@ -319,22 +376,22 @@ class SettingsPage:
         host="https://github.com",
     ) -> bool:
         logging.debug("⏳ Adding public %s at '%s/%s'", entity_type, host, entity_id)
-        self.add_public_repository_dialog_button.click()
-        self.add_public_repository_input.fill(f"{host}/{entity_id}.git")
-        self.add_public_repository_confirm_button.click()
+        await self.add_public_repository_dialog_button.click()
+        await self.add_public_repository_input.fill(f"{host}/{entity_id}.git")
+        await self.add_public_repository_confirm_button.click()
         # as UI refresh is triggered independently of the click and there is no guarantee the repository will be added
         # at the top of the page, we don't validate the action success here but later
         return True
 
-    def add_membership_entity(
+    async def add_membership_entity(
         self, *, entity_id: str, entity_type: str, search_field: Locator
     ) -> bool:
         logging.debug("⏳📝 Adding %s '%s'", entity_type, entity_id)
-        search_field.fill(entity_id)
-        locator = self.control_button(entity_id, order=1)
+        await search_field.fill(entity_id)
+        locator = await self.control_button(entity_id, order=1)
         if locator:
-            locator.click()
-            self.page.get_by_text("Add", exact=True).click()
+            await locator.click()
+            await self.page.get_by_text("Add", exact=True).click()
             return True
 
         return False
@@ -344,7 +401,7 @@ class SettingsPage:
             return "💻 Repository"
         return "📝 Board"
 
-    def control_button(self, entity_id: str, *, order=0) -> Optional[Locator]:
+    async def control_button(self, entity_id: str, *, order=0) -> Optional[Locator]:
         """Finds control button.
 
         As there might be multiple buttons (up to 2), the function provides
@@ -375,14 +432,14 @@ class SettingsPage:
 
         # there might be the same slug in both imported repositories and available repositories
         # in that case, we want to be able to select one specifically
-        count = locator.count()
+        count = await locator.count()
         if count == 1:
             return locator
         if count == 2:
             return locator.nth(order)
         if count > 2:
             raise RuntimeError(
-                f"There should be up to 2 rows with {entity_id} however the script has found {locator.count()} instead. Details {str(locator)}"
+                f"There should be up to 2 rows with {entity_id} however the script has found {count} instead. Details {str(locator)}"
             )
 
         return None
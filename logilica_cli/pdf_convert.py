@@ -1,12 +1,97 @@
-from functools import partialmethod
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cached_property, partialmethod
 import logging
+import multiprocessing
 from pathlib import Path
-from typing import Any, Literal
+import time
+from typing import Any, Literal, NamedTuple, Optional, TYPE_CHECKING, Union
 
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling_core.types.doc import ImageRefMode
+import pymupdf
+
+from logilica_cli import profiling
+from logilica_cli.image_encoding import get_extension
+from logilica_cli.pdf_markdown import pdf_to_markdown
+from logilica_cli.run_manifest import RunManifest
+
+if TYPE_CHECKING:
+    from docling.datamodel.document import ConversionResult
+    from docling.document_converter import DocumentConverter
+
+# The document formats:  markdown and html are converted by docling, and
+# markdown-lite by pdf_markdown (with embedded images, in either case)
+Format = Literal["markdown", "html", "markdown-lite"]
+
+
+class ConvertProfile(NamedTuple):
+    """A named set of docling pipeline options.
+
+    The defaults are those which were always used:  docling's defaults (OCR,
+    and the fast table structure model), plus page and picture images.
+    Generating the picture images takes rendering the pages, whether or not
+    the page images are kept.
+    """
+
+    name: str = "default"
+    do_ocr: bool = True
+    do_table_structure: bool = True
+    table_mode: Literal["fast", "accurate"] = "fast"
+    generate_page_images: bool = True
+    generate_picture_images: bool = True
+
+
+# The built-in profiles; Logilica's PDFs are born-digital, so OCR is overhead.
+CONVERT_PROFILES = {
+    profile.name: profile
+    for profile in (
+        ConvertProfile(),
+        ConvertProfile(
+            "fast",
+            do_ocr=False,
+            generate_page_images=False,
+            generate_picture_images=False,
+        ),
+        ConvertProfile("accurate", do_ocr=False, table_mode="accurate"),
+    )
+}
+
+
+def get_convert_profiles(config: dict[str, Any]) -> dict[str, ConvertProfile]:
+    """Returns the built-in docling pipeline profiles, together with those
+    defined (or redefined) under "config" -> "docling" -> "profiles", whose
+    options override those of the default profile.
+    """
+    configured = config.get("docling", {}).get("profiles", {})
+    return {
+        **CONVERT_PROFILES,
+        **{
+            name: ConvertProfile(name, **options)
+            for name, options in configured.items()
+        },
+    }
+
+
+# The converter of a worker process (see init_worker()), which keeps the docling
+# models loaded from one dashboard to the next
+worker_converter: Optional["PDFConvert"] = None
+
+
+def init_worker(settings: dict[str, Any]) -> None:
+    """Creates the converter of a worker process, with the given PDFConvert
+    settings.
+    """
+    global worker_converter
+    worker_converter = PDFConvert(**settings)
+
+
+def convert_document(arguments: dict[str, Any]) -> float:
+    """Converts a dashboard (see PDFConvert.to_format()) in a worker process;
+    returns the time taken, in seconds.
+    """
+    assert worker_converter is not None
+    start = time.perf_counter()
+    worker_converter.to_format(**arguments)
+    return time.perf_counter() - start
 
 
 class PDFConvert:
@@ -17,32 +102,110 @@ class PDFConvert:
       output_dir_path: where resulting assets are stored
       download_dir_path: where pdfs to be converted are stored
       scale: DPI of the images extracted, in multiplies of 72 DPI
+      jobs: number of dashboards which can be converted at once (by
+        concurrent callers), each in a separate worker process, which loads the
+        docling models once; if it is greater than one, close() the converter
+        (or use it as a context manager) to stop the worker processes
+      profile: the docling pipeline options
+
+    The time taken by each conversion is accumulated in `conversion_times`,
+    by the profile (or format) used (see conversions_summary()).
     """
 
-    def __init__(self, *, output_dir_path: Path, download_dir_path: Path, scale: float):
+    def __init__(
+        self,
+        *,
+        output_dir_path: Path,
+        download_dir_path: Path,
+        scale: float,
+        jobs: int = 1,
+        profile: ConvertProfile = ConvertProfile(),
+    ):
         self.output_dir_path = output_dir_path
         self.download_dir_path = download_dir_path
         self.scale = scale
+        self.profile = profile
+        self.conversion_times: dict[str, list[float]] = defaultdict(list)
+        self.jobs = jobs
+        self.pool = (
+            ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(
+                    {
+                        "output_dir_path": output_dir_path,
+                        "download_dir_path": download_dir_path,
+                        "scale": scale,
+                        "profile": profile,
+                    },
+                ),
+            )
+            if jobs > 1
+            else None
+        )
+
+    def __enter__(self) -> "PDFConvert":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the worker processes, if any."""
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    @cached_property
+    def converter(self) -> "DocumentConverter":
+        """The docling converter, which is created on first use, since merely
+        importing docling takes several seconds.
+        """
+        from docling.datamodel.base_models import InputFormat
+        from docling.datamodel.pipeline_options import (
+            PdfPipelineOptions,
+            TableFormerMode,
+        )
+        from docling.document_converter import DocumentConverter, PdfFormatOption
 
         pipeline_options = PdfPipelineOptions()
-        pipeline_options.images_scale = scale
-        pipeline_options.generate_page_images = True
-        pipeline_options.generate_picture_images = True
+        pipeline_options.images_scale = self.scale
+        pipeline_options.do_ocr = self.profile.do_ocr
+        pipeline_options.do_table_structure = self.profile.do_table_structure
+        pipeline_options.table_structure_options.mode = TableFormerMode(
+            self.profile.table_mode
+        )
+        pipeline_options.generate_page_images = self.profile.generate_page_images
+        pipeline_options.generate_picture_images = self.profile.generate_picture_images
+        logging.debug("Using the docling pipeline profile %s", self.profile)
 
-        self.converter = DocumentConverter(
+        return DocumentConverter(
             format_options={
                 InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
             }
         )
 
-    def write_image(self, *, rawimage: bytes, team: str, dashboard: str) -> None:
+    def write_image(
+        self, *, rawimage: Union[bytes, list[bytes]], team: str, dashboard: str
+    ) -> None:
+        """Stores the dashboard image, with the extension of its format; the
+        tiles of a tiled image are stored in separate files, numbered from the
+        top.
+        """
         self.output_dir_path.mkdir(parents=True, exist_ok=True)
-        filename = f"{team}-{dashboard}.png".lower().replace(" ", "-")
+        if not isinstance(rawimage, bytes):
+            for i, tile in enumerate(rawimage, 1):
+                self.write_image(rawimage=tile, team=team, dashboard=f"{dashboard} {i}")
+            return
+        filename = f"{team}-{dashboard}.{get_extension(rawimage)}"
+        filename = filename.lower().replace(" ", "-")
         imagepath = self.output_dir_path / filename
         logging.info("storing dashboard '%s' at '%s'", dashboard, imagepath)
         imagepath.write_bytes(rawimage)
 
-    def to_images(self, pdf_items: dict[str, dict[str, bytes]]) -> int:
+    def to_images(
+        self, pdf_items: dict[str, dict[str, Union[bytes, list[bytes]]]]
+    ) -> int:
         total: int = 0
         for team, dashboards in pdf_items.items():
             for dashboard, rawimage in dashboards.items():
@@ -54,15 +217,76 @@ class PDFConvert:
     def to_format(
         self,
         *,
-        format: Literal["markdown", "html"],
+        format: Format,
         pdf_path: str,
         team: str,
         dashboard: str,
         embed_images: bool = True,
     ) -> None:
+        """Converts the PDF file, in a worker process if there are any, and
+        writes the document to the output directory.
+        """
+        if self.pool:
+            seconds = self.submit(
+                format=format,
+                pdf_path=pdf_path,
+                team=team,
+                dashboard=dashboard,
+                embed_images=embed_images,
+            ).result()
+            self.record_conversion(format, seconds)
+            return
+
+        start = time.perf_counter()
         self.output_dir_path.mkdir(parents=True, exist_ok=True)
+        if format == "markdown-lite":
+            doc_stem = f"{team}-{dashboard}".lower().replace(" ", "-")
+            pdf: pymupdf.Document
+            with profiling.span("markdown_lite", dashboard=dashboard):
+                with pymupdf.open(pdf_path) as pdf:
+                    markdown = pdf_to_markdown(pdf, self.scale)
+            output_file = self.output_dir_path / f"{doc_stem}-lite.md"
+            output_file.write_text(markdown)
+            logging.debug(
+                "Converted team's '%s' dashboard '%s' into %s (lite mode)",
+                team,
+                dashboard,
+                str(output_file),
+            )
+        else:
+            with profiling.span(
+                "docling_convert", dashboard=dashboard, profile=self.profile.name
+            ):
+                result = self.converter.convert(pdf_path)
+            self.save_document(
+                result,
+                format=format,
+                team=team,
+                dashboard=dashboard,
+                embed_images=embed_images,
+            )
+        self.record_conversion(format, time.perf_counter() - start)
+
+    def submit(self, **arguments: Any) -> "Future[float]":
+        """Submits the conversion of a dashboard (see to_format()) to the
+        worker processes.
+        """
+        assert self.pool is not None
+        return self.pool.submit(convert_document, arguments)
+
+    def save_document(
+        self,
+        result: "ConversionResult",
+        *,
+        format: Literal["markdown", "html"],
+        team: str,
+        dashboard: str,
+        embed_images: bool = True,
+    ) -> None:
+        """Writes the document converted by docling to the output directory."""
+        from docling_core.types.doc import ImageRefMode
 
-        result = self.converter.convert(pdf_path)
+        self.output_dir_path.mkdir(parents=True, exist_ok=True)
         doc_stem = f"{team}-{dashboard}".lower().replace(" ", "-")
         doc_type = "with-images" if embed_images else "with-image-refs"
         extension = "md" if format == "markdown" else "html"
@@ -88,26 +312,89 @@ class PDFConvert:
     def to_format_multiple(
         self,
         *,
-        format: Literal["markdown", "html"],
+        format: Format,
         teams: dict[str, dict[str, Any]],
         embed_images: bool = True,
+        manifest: Optional[RunManifest] = None,
     ) -> int:
-
+        """Converts the teams' dashboards; if a run manifest is provided, the
+        dashboards recorded in it as converted (with the same settings) are
+        skipped, and the others are recorded as they are converted.
+        """
         total = 0
         for team, dashboards in teams.items():
             for dashboard, options in dashboards["team_dashboards"].items():
-                logging.info("Processing items from '%s' for %s", dashboard, team)
-                path = self.download_dir_path / str(options["filename"])
-                self.to_format(
+                total += self.convert_dashboard(
+                    team,
+                    dashboard,
+                    options,
                     format=format,
-                    pdf_path=path,
-                    dashboard=dashboard,
-                    team=team,
                     embed_images=embed_images,
+                    manifest=manifest,
                 )
-                total += 1
         logging.debug("Converted %d dashboards for %d teams", total, len(teams.items()))
         return total
 
+    def record_conversion(self, format: Format, seconds: float) -> None:
+        """Records the time taken by a conversion, under the name of the
+        docling profile (or under "markdown-lite", which does not use docling).
+        """
+        name = format if format == "markdown-lite" else self.profile.name
+        self.conversion_times[name].append(seconds)
+
+    def conversions_summary(self) -> str:
+        """Returns the number of dashboards converted, and the total and mean
+        conversion times, for each profile, one line per profile.
+        """
+        return "\n".join(
+            f"Converted {len(times)} dashboards with profile {name}:"
+            f" {sum(times):.2f}s ({sum(times) / len(times):.2f}s each)"
+            for name, times in self.conversion_times.items()
+        )
+
+    def get_settings(self, format: Format, embed_images: bool) -> dict[str, Any]:
+        """The settings which determine the converted documents, as recorded
+        in the run manifest.
+        """
+        settings: dict[str, Any] = {
+            "format": format,
+            "embed_images": embed_images,
+            "scale": self.scale,
+        }
+        if format != "markdown-lite":
+            settings["profile"] = self.profile._asdict()
+        return settings
+
+    def convert_dashboard(
+        self,
+        team: str,
+        dashboard: str,
+        options: dict[str, Any],
+        *,
+        format: Format,
+        embed_images: bool = True,
+        manifest: Optional[RunManifest] = None,
+    ) -> bool:
+        """Converts one dashboard (see to_format_multiple()); returns whether
+        it was converted, rather than skipped.
+        """
+        settings = self.get_settings(format, embed_images)
+        if manifest and manifest.done(
+            team, dashboard, options, "converted", **settings
+        ):
+            logging.info("Skipping converted '%s' for %s", dashboard, team)
+            return False
+        logging.info("Processing items from '%s' for %s", dashboard, team)
+        self.to_format(
+            format=format,
+            pdf_path=self.download_dir_path / str(options["filename"]),
+            dashboard=dashboard,
+            team=team,
+            embed_images=embed_images,
+        )
+        if manifest:
+            manifest.record(team, dashboard, options, "converted", **settings)
+        return True
+
     to_markdowns = partialmethod(to_format_multiple, format="markdown")
     to_htmls = partialmethod(to_format_multiple, format="html")
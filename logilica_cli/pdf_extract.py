@@ -2,18 +2,208 @@
 # This module contains support functions which extract text and image objects
 # from a PDF file for inclusion in other media.
 #
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+import hashlib
 import logging
+import math
+import multiprocessing
 import pathlib
-from typing import Any, NamedTuple
+import threading
+from typing import (
+    Any,
+    Iterator,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeAlias,
+    Union,
+)
 
+import numpy
 import pymupdf
 
+from logilica_cli import profiling
+from logilica_cli.export_plan import dashboard_entries
+from logilica_cli.image_cache import ImageCache
+from logilica_cli.image_encoding import IMAGE_TYPES, ImageEncoder, report_encoding
+from logilica_cli.run_manifest import RunManifest
+
+# The worker processes are started afresh rather than forked:  the parent runs
+# threads (the extraction threads, and the browser's event loop), and a fork
+# copies whatever locks they hold, which can deadlock the child.
+WORKER_CONTEXT = multiprocessing.get_context("spawn")
+
+# (team, dashboard) -> description of the failure
+ExtractFailures: TypeAlias = dict[Tuple[str, str], str]
+
+# The (PNG, by default) image of a dashboard or, if it is tiled, the images of
+# its tiles, from top to bottom
+DashboardImage: TypeAlias = Union[bytes, list[bytes]]
+
+# How dashboard images which exceed the maximum size are handled:  left as
+# they are (other than logging a warning), split into tiles, or downscaled
+Fit = Literal["none", "tile", "downscale"]
+
+# Google Docs have a maximum image size of 2500 pixels in either dimension.
+GDOCS_MAX_IMAGE_SIZE = 2500
+
+# The minimum width and height of a chart panel, in points
+MIN_CHART_SIZE = 72
+
+
+class PageArea(NamedTuple):
+    """The rendering of a page, of which `length` rows, starting at `offset`,
+    are part of the dashboard image.
+    """
+
+    offset: int
+    length: int
+    pixmap: pymupdf.Pixmap
+
+
+def render_report_image(
+    pdf_path: pathlib.Path, settings: dict[str, Any]
+) -> tuple[DashboardImage, Counter]:
+    """Renders the PDF file as a single image (see PDFExtract.get_report_image())
+    with the given PDFExtract settings; this is the work which is done in the
+    worker processes.  Returns the image and the encoding statistics.
+    """
+    pdf: pymupdf.Document
+    with PDFExtract(**settings) as extract, pymupdf.open(pdf_path) as pdf:
+        return extract.get_report_image(pdf), extract.encoding_stats
+
+
+def render_chart_images(
+    pdf_path: pathlib.Path, settings: dict[str, Any]
+) -> tuple[list[bytes], Counter]:
+    """Renders the charts of the PDF file (see PDFExtract.get_chart_images())
+    with the given PDFExtract settings, in a worker process.  Returns the images
+    and the encoding statistics.
+    """
+    pdf: pymupdf.Document
+    with PDFExtract(**settings) as extract, pymupdf.open(pdf_path) as pdf:
+        return extract.get_chart_images(pdf), extract.encoding_stats
+
+
+def render_page_area(
+    pdf_path: str, page_number: int, settings: dict[str, Any]
+) -> tuple[int, int, bytes]:
+    """Renders a page of the PDF file (see PDFExtract.get_page_area()) with
+    the given PDFExtract settings, in a page worker process.
+
+    Since pixmaps cannot be passed between processes, returns the width and
+    the length of the page's area, and the samples of its rows.
+    """
+    pdf: pymupdf.Document
+    with pymupdf.open(pdf_path) as pdf:
+        area = PDFExtract(**settings).get_page_area(pdf[page_number], page_number)
+    rows = get_row_pixels(area.pixmap)[area.offset : area.offset + area.length]
+    return area.pixmap.width, area.length, rows.tobytes()
+
+
+def report_extractions(failures: ExtractFailures) -> None:
+    """Logs the dashboards which could not be extracted and, if there are any,
+    raises a RuntimeError listing them.
+    """
+    if failures:
+        logging.error("Failed to extract %d dashboard(s)", len(failures))
+        for (team, dashboard), failure in failures.items():
+            logging.error("'%s' for team '%s': %s", dashboard, team, failure)
+        raise RuntimeError(failures)
+
+
+def get_row_pixels(image: pymupdf.Pixmap) -> numpy.ndarray:
+    """Returns a view of the samples of the pixmap as an array of rows of
+    pixels of components.
+    """
+    return numpy.frombuffer(image.samples_mv, dtype=numpy.uint8).reshape(
+        image.height, image.width, image.n
+    )
+
+
+def get_uniform_rows(image: pymupdf.Pixmap) -> numpy.ndarray:
+    """Returns an array of flags indicating which rows of the pixmap are
+    "blank", i.e., have pixels which are all the same.
+    """
+    pixels = get_row_pixels(image)
+    return (pixels == pixels[:, :1]).all(axis=(1, 2))
+
 
 class PDFExtract:
 
-    def __init__(self, scale: float = 1.0):
-        """Encapsulation of PDF extraction."""
+    def __init__(
+        self,
+        scale: float = 1.0,
+        jobs: int = 1,
+        clip: bool = False,
+        fit: Fit = "none",
+        max_size: int = GDOCS_MAX_IMAGE_SIZE,
+        encoder: ImageEncoder = ImageEncoder(),
+        cache: Optional[ImageCache] = None,
+        max_gap: Optional[int] = None,
+        page_jobs: int = 1,
+        compare_with_png: bool = False,
+    ):
+        """Encapsulation of PDF extraction.
+
+        If `jobs` is greater than one, up to that many PDFs are rendered at
+        once, each in a separate process; if `page_jobs` is greater than one,
+        up to that many pages of each PDF are rendered at once, each in a
+        separate process.  The worker processes do not start processes of
+        their own, so at most one of them may be greater than one (and there
+        are never more worker processes than it specifies).  In either case,
+        close() (or use the object as a context manager) to stop the worker
+        processes.  If `clip` is
+        true, only the content region of each page is rendered (see
+        get_content_clip()).  Images larger than `max_size` pixels are handled
+        according to `fit` (see get_report_image()).  If `max_gap` is
+        specified, blank bands taller than that many points are shortened to
+        that height (see compact_blank_bands()).  The images are encoded
+        by `encoder`, and the number of images and bytes encoded are
+        accumulated in `encoding_stats`; if `compare_with_png` is true, so are,
+        for settings other than the default, the bytes which the default PNG
+        encoding would have taken (at the cost of encoding each image twice).  If
+        `cache` is specified, images are taken from it instead of being
+        rendered, where possible, and the rendered images are stored in it.
+        """
+
+        self.max_gap = max_gap
+        self.set_scale(scale)
+
+        self.clip = clip
+        self.fit = fit
+        self.max_size = max_size
+        self.encoder = encoder
+        self.compare_with_png = compare_with_png
+        self.encoding_stats: Counter = Counter()
+        self.cache = cache
+        if jobs > 1 and page_jobs > 1:
+            raise ValueError("jobs and page_jobs cannot both be greater than one")
+        self.jobs = jobs
+        self.pool = (
+            ProcessPoolExecutor(max_workers=jobs, mp_context=WORKER_CONTEXT)
+            if jobs > 1
+            else None
+        )
+        self.page_jobs = page_jobs
+        self.page_pool = (
+            ProcessPoolExecutor(max_workers=page_jobs, mp_context=WORKER_CONTEXT)
+            if page_jobs > 1
+            else None
+        )
+
+        # Images rendered (or being rendered), keyed by the hash of the PDF
+        # contents; once an image has been saved, it is read back from its file
+        # (with the number of its tiles, if it is tiled) instead of being kept
+        self.rendered: dict[str, Future[DashboardImage]] = {}
+        self.saved: dict[str, tuple[pathlib.Path, Optional[int]]] = {}
+        self.lock = threading.Lock()
 
+    def set_scale(self, scale: float) -> None:
+        """Sets the scale of the rendering, and the sizes derived from it."""
         # Choosing a higher image DPI produces a finer quality image but a larger
         # amount of data; it also affects the sizes of the headers and footers; so,
         # everything is parameterized by SCALE.
@@ -21,12 +211,54 @@ class PDFExtract:
         self.REPORT_HEADER_HEIGHT = int(84 * self.SCALE)
         self.PAGE_HEADER_HEIGHT = int(12 * self.SCALE)
         self.PAGE_FOOTER_HEIGHT = int(43 * self.SCALE)
+        self.MAX_GAP_HEIGHT = (
+            None if self.max_gap is None else int(self.max_gap * self.SCALE)
+        )
+
+    @property
+    def image_settings(self) -> dict[str, Any]:
+        """The settings which determine the images rendered from a PDF file,
+        as recorded in the run manifest.
+        """
+        return {
+            "scale": self.SCALE,
+            "fit": self.fit,
+            "max_size": self.max_size,
+            "encoder": self.encoder._asdict(),
+            "max_gap_height": self.MAX_GAP_HEIGHT,
+        }
+
+    @property
+    def render_settings(self) -> dict[str, Any]:
+        """The settings which determine the images rendered from a PDF file,
+        including the derived header and footer sizes, as used in the image
+        cache key.  (Clipping does not change the images.)
+        """
+        return {
+            **self.image_settings,
+            "report_header_height": self.REPORT_HEADER_HEIGHT,
+            "page_header_height": self.PAGE_HEADER_HEIGHT,
+            "page_footer_height": self.PAGE_FOOTER_HEIGHT,
+        }
+
+    def __enter__(self) -> "PDFExtract":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the worker processes, if any."""
+        for pool in (self.pool, self.page_pool):
+            if pool:
+                pool.shutdown(cancel_futures=True)
 
     def get_pdf_objects(
         self,
         teams: dict[str, dict[str, Any]],
         download_dir_path: pathlib.Path,
-    ) -> dict[str, dict[str, bytes]]:
+        manifest: Optional[RunManifest] = None,
+    ) -> dict[str, dict[str, DashboardImage]]:
         """Extract content from the configured PDF files.
 
         Assumes that the teams configuration is a dictionary whose keys are the
@@ -44,52 +276,340 @@ class PDFExtract:
         Returns a hierarchical set of dictionaries:
         - the first level keys are the teams' names
         - the second level keys are the Dashboard names
-        - the values are the contents of the Dashboards as PNG images
-        """
-        results = {}
-        for team, dashboards in teams.items():
-            team_results = {}
-            for dashboard, options in dashboards["team_dashboards"].items():
-                logging.info("Extracting items from '%s' for %s", dashboard, team)
-                pdf: pymupdf.Document
-                with pymupdf.open(download_dir_path / options["filename"]) as pdf:
-                    team_results[dashboard] = self.get_report_image(pdf)
-            results[team] = team_results
+        - the values are the contents of the Dashboards as PNG images (or, if
+          they are tiled, as lists of PNG images)
+
+        Identical PDFs (e.g., the copies of a dashboard which is configured for
+        several teams) are rendered only once.  If a run manifest is provided,
+        each image is also saved in the manifest's directory and recorded in it,
+        and the images recorded in it (at the same scale) are read back instead
+        of being extracted again.
+
+        Up to `jobs` dashboards are extracted at once.  A dashboard which
+        cannot be extracted does not prevent the extraction of the others; the
+        failures are reported, once every dashboard has been attempted, by
+        raising a RuntimeError.
+        """
+        results: dict[str, dict[str, DashboardImage]] = {team: {} for team in teams}
+        for team, dashboard, image in self.iter_pdf_objects(
+            teams, download_dir_path, manifest
+        ):
+            results[team][dashboard] = image
         return results
 
-    def get_report_image(self, pdf: pymupdf.Document) -> bytes:
+    def iter_pdf_objects(
+        self,
+        teams: dict[str, dict[str, Any]],
+        download_dir_path: pathlib.Path,
+        manifest: Optional[RunManifest] = None,
+    ) -> Iterator[tuple[str, str, DashboardImage]]:
+        """Extract content from the configured PDF files, as get_pdf_objects()
+        does, but lazily:  yields the team, the dashboard, and the image of
+        each dashboard in configuration order, extracting no more than `jobs`
+        dashboards ahead of the one which is yielded, so that the images do
+        not all have to be held in memory at once.
+        """
+        entries = iter(dashboard_entries(teams))
+        failures: ExtractFailures = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            in_flight: deque[tuple[str, str, Future[DashboardImage]]] = deque()
+            while True:
+                while len(in_flight) < self.jobs and (entry := next(entries, None)):
+                    team, dashboard, options = entry
+                    future = executor.submit(
+                        self.get_dashboard_image,
+                        team,
+                        dashboard,
+                        options,
+                        download_dir_path,
+                        manifest,
+                    )
+                    in_flight.append((team, dashboard, future))
+                if not in_flight:
+                    break
+                team, dashboard, future = in_flight.popleft()
+                try:
+                    image = future.result()
+                except Exception as err:
+                    failures[(team, dashboard)] = f"{type(err).__name__}: {err}"
+                    continue
+                yield team, dashboard, image
+        report_extractions(failures)
+
+    def get_dashboard_image(
+        self,
+        team: str,
+        dashboard: str,
+        options: dict[str, Any],
+        download_dir_path: pathlib.Path,
+        manifest: Optional[RunManifest] = None,
+    ) -> DashboardImage:
+        """Extract the image of one dashboard (see get_pdf_objects())."""
+        image_path = (manifest.dir_path if manifest else download_dir_path) / (
+            f"{options['filename']}.{self.extension}"
+        )
+        if manifest and manifest.done(
+            team, dashboard, options, "extracted", **self.image_settings
+        ):
+            tiles = manifest.step_details(team, dashboard, "extracted").get("tiles")
+            if all(path.exists() for path in self.get_image_paths(image_path, tiles)):
+                logging.info("Reusing items from '%s' for %s", dashboard, team)
+                return self.read_image(image_path, tiles)
+
+        pdf_path = download_dir_path / options["filename"]
+        with open(pdf_path, "rb") as f:
+            key = hashlib.file_digest(f, "sha256").hexdigest()
+        with self.lock:
+            saved = self.saved.get(key)
+            rendered = self.rendered.get(key)
+            shared = saved is not None or rendered is not None
+            if not shared:
+                rendered = self.rendered[key] = Future()
+        if shared:
+            logging.info("Sharing items from '%s' for %s", dashboard, team)
+        if saved:
+            image = self.read_image(*saved)
+        elif shared:
+            image = rendered.result()
+        else:
+            logging.info("Extracting items from '%s' for %s", dashboard, team)
+            try:
+                with profiling.span("extract", dashboard=dashboard):
+                    rendered.set_result(self.render_cached(pdf_path, key))
+            except Exception as err:
+                rendered.set_exception(err)
+            image = rendered.result()
+        if manifest:
+            tiles = None if isinstance(image, bytes) else len(image)
+            images = [image] if tiles is None else image
+            for path, contents in zip(self.get_image_paths(image_path, tiles), images):
+                path.write_bytes(contents)
+            manifest.record(
+                team,
+                dashboard,
+                options,
+                "extracted",
+                **self.image_settings,
+                **({"tiles": tiles} if tiles is not None else {}),
+            )
+            with self.lock:
+                self.saved.setdefault(key, (image_path, tiles))
+                self.rendered.pop(key, None)
+        return image
+
+    def read_image(
+        self, image_path: pathlib.Path, tiles: Optional[int]
+    ) -> DashboardImage:
+        """Reads back a saved image (or its tiles)."""
+        if tiles is None:
+            return image_path.read_bytes()
+        return [path.read_bytes() for path in self.get_image_paths(image_path, tiles)]
+
+    @staticmethod
+    def get_image_paths(
+        image_path: pathlib.Path, tiles: Optional[int]
+    ) -> list[pathlib.Path]:
+        """Returns the path of the image file or, if the image is tiled, those
+        of the tiles' image files.
+        """
+        if tiles is None:
+            return [image_path]
+        return [
+            image_path.with_suffix(f".{i}{image_path.suffix}")
+            for i in range(1, tiles + 1)
+        ]
+
+    def render_cached(self, pdf_path: pathlib.Path, digest: str) -> DashboardImage:
+        """Renders the PDF file (see render()), unless the image cache holds
+        its image; `digest` is the hash of its contents.
+        """
+        if not self.cache:
+            return self.render(pdf_path)
+        key = self.cache.key(digest, self.render_settings)
+        image = self.cache.get(key)
+        if image is None:
+            image = self.render(pdf_path)
+            self.cache.put(key, image)
+        return image
+
+    def render(self, pdf_path: pathlib.Path) -> DashboardImage:
+        """Renders the PDF file as a single image, in a worker process if there
+        are any.
+        """
+        if self.pool:
+            return self.run_in_worker(render_report_image, pdf_path)
+        pdf: pymupdf.Document
+        with pymupdf.open(pdf_path) as pdf:
+            return self.get_report_image(pdf)
+
+    def run_in_worker(self, function: Any, pdf_path: pathlib.Path) -> Any:
+        """Runs the function (render_report_image() or render_chart_images())
+        on the PDF file in a worker process, with the settings of this object,
+        and returns its result, accumulating the encoding statistics.
+        """
+        settings = {
+            "scale": self.SCALE,
+            "clip": self.clip,
+            "fit": self.fit,
+            "max_size": self.max_size,
+            "encoder": self.encoder,
+            "max_gap": self.max_gap,
+            "compare_with_png": self.compare_with_png,
+        }
+        result, stats = self.pool.submit(function, pdf_path, settings).result()
+        with self.lock:
+            self.encoding_stats.update(stats)
+        return result
+
+    def get_dashboard_charts(
+        self,
+        team: str,
+        dashboard: str,
+        options: dict[str, Any],
+        download_dir_path: pathlib.Path,
+    ) -> list[bytes]:
+        """Extract the images of the charts of one dashboard (see
+        get_chart_images()), in a worker process if there are any.
+        """
+        pdf_path = download_dir_path / options["filename"]
+        logging.info("Extracting charts from '%s' for %s", dashboard, team)
+        with profiling.span("extract_charts", dashboard=dashboard):
+            if self.pool:
+                return self.run_in_worker(render_chart_images, pdf_path)
+            pdf: pymupdf.Document
+            with pymupdf.open(pdf_path) as pdf:
+                return self.get_chart_images(pdf)
+
+    def get_chart_images(self, pdf: pymupdf.Document) -> list[bytes]:
+        """Render each chart panel of the PDF (see get_chart_rects()) as a
+        separate image, from the top of the first page to the bottom of the
+        last.
+
+        This uses only the geometry of the PDF's contents, so it is much
+        cheaper than docling's layout analysis; on the other hand, a panel
+        which is split across pages yields a partial image from each page.
+        """
+        matrix = pymupdf.Matrix(self.SCALE, self.SCALE)
+        images = []
+        for i, page in enumerate(pdf):
+            for title, rect in self.get_chart_rects(page, i):
+                logging.debug("Found chart '%s' on page %d at %s", title, i + 1, rect)
+                with profiling.span("get_pixmap", page=i, chart=title):
+                    pix = page.get_pixmap(matrix=matrix, clip=rect)
+                with profiling.span("encode"):
+                    images.append(self.encode_image(pix))
+        logging.info("Found %d charts", len(images))
+        return images
+
+    def get_chart_rects(
+        self, page: pymupdf.Page, page_number: int
+    ) -> list[tuple[str, pymupdf.Rect]]:
+        """Returns the chart panels of the page, from top to bottom and left
+        to right, each with its title (the first line of text within it, if
+        any).
+
+        The panels are the areas covered by clusters of vector drawings (e.g.,
+        the cards which Logilica draws around its charts) and by raster images,
+        where overlapping areas are merged, which lie between the (report or
+        page) header and the footer, and which are at least MIN_CHART_SIZE
+        points wide and high.
+        """
+        if page_number == 0:
+            header = self.REPORT_HEADER_HEIGHT
+        else:
+            header = self.PAGE_HEADER_HEIGHT
+        top = header / self.SCALE
+        bottom = page.rect.height - self.PAGE_FOOTER_HEIGHT / self.SCALE
+        candidates = [
+            rect
+            for rect in [
+                *page.cluster_drawings(),
+                *(pymupdf.Rect(info["bbox"]) for info in page.get_image_info()),
+            ]
+            if rect.y0 >= top and rect.y1 <= bottom
+        ]
+
+        panels: list[pymupdf.Rect] = []
+        for rect in candidates:
+            # Merge the rectangle with any panels which it overlaps; the
+            # result may overlap other panels, so check again.
+            while overlapping := [p for p in panels if p.intersects(rect)]:
+                for panel in overlapping:
+                    panels.remove(panel)
+                    rect |= panel
+            panels.append(rect)
+
+        charts = []
+        blocks = page.get_text("blocks", sort=True)
+        for panel in sorted(panels, key=lambda r: (r.y0, r.x0)):
+            if min(panel.width, panel.height) < MIN_CHART_SIZE:
+                continue
+            titles = [
+                block[4].strip().splitlines()[0]
+                for block in blocks
+                if block[4].strip() and pymupdf.Rect(block[:4]) in panel
+            ]
+            charts.append((titles[0] if titles else "", panel))
+        return charts
+
+    def get_report_image(self, pdf: pymupdf.Document) -> DashboardImage:
         """Render the PDF, with the pages knitted together, as a single image.
 
         The individual pages' pixmaps are copied to adjacent locations in the
         target pixmap.  In the process, page headers, footers, and trailing
-        whitespace are omitted.  The pixmap is returned as a byte-string.
+        whitespace are omitted, and, if so configured, tall blank bands are
+        shortened.  The pixmap is returned as a byte-string.
+
+        If the pixmap is larger than the maximum size, then, depending on the
+        fit setting, a warning is logged, or the pixmap is downscaled to fit,
+        or it is split into tiles (see get_tile_breaks()), which are returned
+        as a list of byte-strings (even if there is only one).
+
+        A pixmap is downscaled by rendering the pages at a smaller scale (see
+        get_downscale_factor()), so that the full-size pixmap is never created.
         """
+        if self.fit == "downscale":
+            factor = self.get_downscale_factor(pdf)
+            if factor < 1:
+                logging.info("Downscaling dashboard image by %0.2f", factor)
+                downscaled = copy.copy(self)
+                downscaled.set_scale(self.SCALE * factor)
+                return downscaled.knit_report_image(pdf)
+        return self.knit_report_image(pdf)
 
-        class PageArea(NamedTuple):
-            offset: int
-            length: int
-            pixmap: pymupdf.Pixmap
+    def get_downscale_factor(self, pdf: pymupdf.Document) -> float:
+        """Returns the factor by which to reduce the scale of the rendering so
+        that the dashboard image fits within the maximum size (or 1, if it fits
+        at this scale).
 
+        The factor is worked out before rendering, from the width of the pages
+        and the height of their content (as in get_content_clip()), between
+        the header and the footer, which bound the size of the image.  The
+        blank bands which are shortened (see compact_blank_bands()) are only
+        known once the pages are rendered, so, with `max_gap`, the image may
+        end up smaller than the maximum size.
+        """
+        width = max(page.rect.width for page in pdf)
+        height = 0.0
+        for i, page in enumerate(pdf):
+            header = self.REPORT_HEADER_HEIGHT if i == 0 else self.PAGE_HEADER_HEIGHT
+            top = header / self.SCALE
+            footer_top = page.rect.height - self.PAGE_FOOTER_HEIGHT / self.SCALE
+            bottoms = [
+                bbox[3] for _, bbox in page.get_bboxlog() if bbox[1] < footer_top
+            ]
+            height += max(0.0, min(max(bottoms, default=top), footer_top) - top)
+        size = max(width, height) * self.SCALE
+        return min(1.0, self.max_size / size)
+
+    def knit_report_image(self, pdf: pymupdf.Document) -> DashboardImage:
+        """Renders the PDF as a single image at this scale (see
+        get_report_image()).
+        """
         # Calculate and record the length required for each page; track the total
         # length.
-        page_areas: list[PageArea] = []
-        total_length = 0
-        # increase DPI of generated images
-        matrix = pymupdf.Matrix(self.SCALE, self.SCALE)
-        for i, page in enumerate(iter(pdf)):
-            offset = self.REPORT_HEADER_HEIGHT if i == 0 else self.PAGE_HEADER_HEIGHT
-            pix: pymupdf.Pixmap = page.get_pixmap(matrix=matrix)
-            pl = self.strip_trailing_space(pix) - offset
-            page_areas.append(PageArea(offset, pl, pix))
-            total_length += pl
-
-        # Google Docs have a maximum image size of 2500 pixels in either dimension,
-        # so, we need to resize the result accordingly.
-        if total_length > 2500:
-            logging.warning(
-                "Dashboard image height (%s pixels) exceeds the Google Docs limit of 2500",
-                total_length,
-            )
+        page_areas = self.get_page_areas(pdf)
+        total_length = sum(pa.length for pa in page_areas)
 
         # Create the target pixmap based on the characteristics of the first page
         # and the total length of all the pages.
@@ -103,6 +623,7 @@ class PDFExtract:
         # Locate each page region and copy it to the appropriate place in the
         # destination pixmap.
         dest_start = 0
+        page_breaks: list[int] = []
         for pa in page_areas:
             pix = pa.pixmap
             pix.set_origin(0, dest_start - pa.offset)
@@ -110,6 +631,33 @@ class PDFExtract:
             dest_rect = (0, dest_start, pix.width, dest_end)
             d_image.copy(pix, dest_rect)
             dest_start = dest_end
+            page_breaks.append(dest_start)
+
+        if self.MAX_GAP_HEIGHT is not None:
+            with profiling.span("compact_blank_bands"):
+                d_image, page_breaks = self.compact_blank_bands(d_image, page_breaks)
+
+        # Google Docs have a maximum image size, so, we need to resize the
+        # result accordingly.
+        if max(d_image.width, d_image.height) > self.max_size:
+            if self.fit == "downscale":
+                # The pages were rendered at a reduced scale, if need be (see
+                # get_report_image()); only the rounding of the sizes of the
+                # pages' areas remains to be made up for.
+                factor = self.max_size / max(d_image.width, d_image.height)
+                d_image = pymupdf.Pixmap(
+                    d_image,
+                    max(1, int(d_image.width * factor)),
+                    max(1, int(d_image.height * factor)),
+                    None,
+                )
+            elif self.fit == "none":
+                logging.warning(
+                    "Dashboard image size (%d x %d pixels) exceeds the limit of %d",
+                    d_image.width,
+                    d_image.height,
+                    self.max_size,
+                )
 
         logging.debug(
             "Resulting image size (%d dpi):  %d x %d (pixels);   %0.2f x %0.2f (inches)",
@@ -119,28 +667,227 @@ class PDFExtract:
             d_image.width / d_image.xres,
             d_image.height / d_image.yres,
         )
-        return d_image.tobytes(output="png")
+        if self.fit == "tile":
+            tiles = self.split_image(d_image, page_breaks[:-1])
+            with profiling.span("encode", tiles=len(tiles)):
+                return [self.encode_image(tile) for tile in tiles]
+        with profiling.span("encode"):
+            return self.encode_image(d_image)
+
+    def get_page_areas(self, pdf: pymupdf.Document) -> list[PageArea]:
+        """Renders the pages of the PDF, in the page worker processes if there
+        are any (and the PDF was opened from a file and has several pages).
+        """
+        if not (self.page_pool and pdf.name and pdf.page_count > 1):
+            return [self.get_page_area(page, i) for i, page in enumerate(pdf)]
+
+        # Each worker opens the file itself, since documents cannot be shared
+        # between processes (nor, in PyMuPDF, between threads).
+        settings = {"scale": self.SCALE, "clip": self.clip}
+        futures = [
+            self.page_pool.submit(render_page_area, pdf.name, i, settings)
+            for i in range(pdf.page_count)
+        ]
+        page_areas = []
+        for future in futures:
+            width, length, samples = future.result()
+            pix = pymupdf.Pixmap(pymupdf.csRGB, width, length, samples, False)
+            page_areas.append(PageArea(0, length, pix))
+        return page_areas
+
+    def get_page_area(self, page: pymupdf.Page, page_number: int) -> PageArea:
+        """Renders the page, and locates the part of it which belongs in the
+        dashboard image:  below the (report or page) header, and above the
+        trailing whitespace (see strip_trailing_space()).
+        """
+        if page_number == 0:
+            header = self.REPORT_HEADER_HEIGHT
+        else:
+            header = self.PAGE_HEADER_HEIGHT
+        clip, blank_row = self.get_content_clip(page, header)
+        # increase DPI of generated images
+        matrix = pymupdf.Matrix(self.SCALE, self.SCALE)
+        with profiling.span("get_pixmap", page=page_number):
+            pix: pymupdf.Pixmap = page.get_pixmap(matrix=matrix, clip=clip)
+        # A clipped pixmap starts at the row of the page given by its origin.
+        offset = header - pix.y
+        if blank_row is not None:
+            blank_row -= pix.y
+        with profiling.span("strip_trailing_space", page=page_number):
+            length = self.strip_trailing_space(pix, blank_row) - offset
+        return PageArea(offset, length, pix)
+
+    @property
+    def extension(self) -> str:
+        """The file extension of the images."""
+        return IMAGE_TYPES[self.encoder.format][1]
+
+    def encode_image(self, pix: pymupdf.Pixmap) -> bytes:
+        """Encodes the pixmap, accumulating the encoding statistics."""
+        image = self.encoder.encode(pix)
+        stats = Counter(images=1, bytes=len(image))
+        if self.compare_with_png and not self.encoder.is_default:
+            stats["png_bytes"] = len(pix.tobytes(output="png"))
+            logging.debug(
+                "Encoded image as %s: %d bytes (PNG: %d bytes)",
+                self.encoder.format.upper(),
+                stats["bytes"],
+                stats["png_bytes"],
+            )
+        with self.lock:
+            self.encoding_stats.update(stats)
+        return image
+
+    def report_encoding(self) -> None:
+        """Logs the encoding statistics (see image_encoding.report_encoding())."""
+        report_encoding(self.encoder, self.encoding_stats)
+
+    def get_tile_breaks(
+        self, image: pymupdf.Pixmap, page_breaks: list[int]
+    ) -> list[int]:
+        """Returns the rows at which to split the image into tiles which are no
+        taller than the maximum size.
+
+        Each tile ends at the lowest page boundary or "blank" row (i.e., a row
+        of pixels which are all the same) which keeps it within the maximum
+        size, so that charts and text are not cut in half where possible; if
+        there is none, it is cut at the maximum size.
+        """
+        candidates = get_uniform_rows(image)
+        candidates[page_breaks] = True
+        breaks: list[int] = []
+        start = 0
+        while image.height - start > self.max_size:
+            (found,) = numpy.nonzero(candidates[start + 1 : start + self.max_size + 1])
+            start += int(found[-1]) + 1 if found.size else self.max_size
+            breaks.append(start)
+        return breaks
+
+    def compact_blank_bands(
+        self, image: pymupdf.Pixmap, page_breaks: list[int]
+    ) -> tuple[pymupdf.Pixmap, list[int]]:
+        """Shortens the blank bands of the image -- runs of identical rows of
+        pixels which are all the same -- which are taller than the maximum gap
+        height to that height, by dropping their lower rows.
+
+        Returns the compacted image and the page breaks moved accordingly.
+        """
+        pixels = get_row_pixels(image)
+        uniform = get_uniform_rows(image)
+        # A row continues a band if it and the one above it are both uniform
+        # and of the same color.
+        continues = numpy.zeros(image.height, dtype=bool)
+        continues[1:] = (
+            uniform[1:] & uniform[:-1] & (pixels[1:, 0] == pixels[:-1, 0]).all(axis=1)
+        )
+        # Each row's distance from the top of its band (zero outside bands)
+        rows = numpy.arange(image.height)
+        band_top = numpy.maximum.accumulate(numpy.where(continues, 0, rows))
+        keep = rows - band_top < self.MAX_GAP_HEIGHT
+        height = int(numpy.count_nonzero(keep))
+        if height == image.height:
+            return image, page_breaks
+
+        logging.info(
+            "Compacted blank bands of the dashboard image from %d to %d pixels",
+            image.height,
+            height,
+        )
+        compacted = pymupdf.Pixmap(
+            image.colorspace,
+            image.width,
+            height,
+            numpy.ascontiguousarray(pixels[keep]).tobytes(),
+            image.alpha,
+        )
+        compacted.set_dpi(image.xres, image.yres)
+        kept_above = numpy.concatenate(([0], numpy.cumsum(keep)))
+        return compacted, [int(kept_above[row]) for row in page_breaks]
+
+    def split_image(
+        self, image: pymupdf.Pixmap, page_breaks: list[int]
+    ) -> list[pymupdf.Pixmap]:
+        """Splits the image into tiles which fit within the maximum size (see
+        get_tile_breaks()).
+        """
+        breaks = self.get_tile_breaks(image, page_breaks)
+        tiles = []
+        for top, bottom in zip([0, *breaks], [*breaks, image.height]):
+            tile = pymupdf.Pixmap(
+                image.colorspace, (0, 0, image.width, bottom - top), image.alpha
+            )
+            image.set_origin(0, -top)
+            tile.copy(image, tile.irect)
+            tiles.append(tile)
+        image.set_origin(0, 0)
+        if len(tiles) > 1:
+            logging.info("Split dashboard image into %d tiles", len(tiles))
+        return tiles
+
+    def get_content_clip(
+        self, page: pymupdf.Page, header: int
+    ) -> tuple[Optional[pymupdf.Rect], Optional[int]]:
+        """Returns the region of the page to render, if clipping is enabled, and
+        the row of the page (at the scale of the rendering) to be used as the
+        "blank" row by strip_trailing_space(); or (None, None) to render the
+        whole page.
+
+        The region spans the width of the page, from the bottom of the header
+        to the first row below the bottom of the content (that is, of the
+        bounding boxes of the text, images, and drawings which start above the
+        footer), or to the first row of the footer, whichever is higher; so,
+        the header, the footer, and most of the trailing whitespace are never
+        rasterized.
+        """
+        if not self.clip:
+            return None, None
+        footer_row = (page.rect * pymupdf.Matrix(self.SCALE, self.SCALE)).irect.height
+        footer_row -= self.PAGE_FOOTER_HEIGHT
+        footer_top = footer_row / self.SCALE
+        bottoms = [bbox[3] for _, bbox in page.get_bboxlog() if bbox[1] < footer_top]
+        if not bottoms:
+            return None, None
+        blank_row = min(math.ceil(max(bottoms) * self.SCALE) + 1, footer_row)
+        if blank_row <= header + 1:
+            # There is no content below the header; leave it to the usual checks.
+            return None, None
+        clip = pymupdf.Rect(
+            page.rect.x0,
+            header / self.SCALE,
+            page.rect.x1,
+            (blank_row + 2) / self.SCALE,
+        )
+        return clip, blank_row
 
-    def strip_trailing_space(self, pix: pymupdf.Pixmap) -> int:
+    def strip_trailing_space(
+        self, pix: pymupdf.Pixmap, blank_row_idx: Optional[int] = None
+    ) -> int:
         """Returns the height coordinate of the last row of pixels which is
-        different from the first row of the footer; assuming that the first row
-        of the footer is "blank", this returns the height at which to truncate
-        the pixmap to remove the trailing whitespace.
+        different from the first row of the footer (or from the row at
+        `blank_row_idx`, if specified); assuming that the first row of the
+        footer is "blank", this returns the height at which to truncate the
+        pixmap to remove the trailing whitespace.
         """
         # The pixmap is structured as a linear serialization of a three-dimensional
         # array of pixels: "height" rows, by "width" columns, by 'n' items
         # representing (e.g.) red, green, blue, and transparency values as integers.
-        # The stride indicates how many items are in a single row.  Find the index
-        # of the first row of the footer (which we assume is blank), and grab a
-        # reference to it.
-        stride: int = pix.stride
-        footer_row_idx: int = (pix.height - self.PAGE_FOOTER_HEIGHT) * stride
-        blank_row = pix.samples_mv[footer_row_idx : footer_row_idx + stride]
-
-        # Starting at the last row before the footer, work backwards looking for a
-        # row whose values are different from those of a "blank" row.
-        for pos in range(footer_row_idx - stride, 0, -stride):
-            if pix.samples_mv[pos : pos + stride] != blank_row:
-                return pos // stride
-
-        raise ValueError("Page appears to be blank!")
+        # The stride indicates how many items are in a single row.  View the
+        # samples (without copying them) as a two-dimensional array of rows, and
+        # grab the first row of the footer (which we assume is blank).
+        rows = numpy.frombuffer(pix.samples_mv, dtype=numpy.uint8).reshape(
+            pix.height, pix.stride
+        )
+        footer_row_idx: int = (
+            pix.height - self.PAGE_FOOTER_HEIGHT
+            if blank_row_idx is None
+            else blank_row_idx
+        )
+        blank_row = rows[footer_row_idx]
+
+        # Find the last row before the footer (not counting the first row of the
+        # page) whose values are different from those of a "blank" row.
+        differs = (rows[1:footer_row_idx] != blank_row).any(axis=1)
+        (non_blank,) = numpy.nonzero(differs)
+        if not non_blank.size:
+            raise ValueError("Page appears to be blank!")
+        return int(non_blank[-1]) + 1
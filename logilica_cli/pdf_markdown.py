@@ -0,0 +1,126 @@
+#
+# This module contains a lightweight conversion of dashboard PDFs to Markdown,
+# which uses only PyMuPDF's text extraction and table detection (rather than
+# docling's layout models), and which renders images only of the chart panels.
+#
+import base64
+from collections import Counter
+import logging
+from typing import NamedTuple
+
+import pymupdf
+
+from logilica_cli import profiling
+from logilica_cli.pdf_extract import PDFExtract
+
+# Bold text at least this much larger than the body text is taken as a heading.
+HEADING_SIZE_RATIO = 1.2
+
+# The font flag of bold text
+BOLD = pymupdf.TEXT_FONT_BOLD
+
+
+class Item(NamedTuple):
+    """A piece of the Markdown document, located on its page."""
+
+    top: float
+    left: float
+    markdown: str
+
+
+def pdf_to_markdown(pdf: pymupdf.Document, scale: float = 1.0) -> str:
+    """Converts the dashboard PDF to Markdown.
+
+    On each page, between the header and the footer (see PDFExtract), the
+    chart panels (see PDFExtract.get_chart_rects()) become images, embedded
+    as data URIs, and the tables found by PyMuPDF become Markdown tables; the
+    remaining text blocks become paragraphs and headings (see
+    get_block_markdown()).  The pieces are ordered from top to bottom and left
+    to right.
+    """
+    # The header and footer sizes, in points
+    extract = PDFExtract()
+    body_size = get_body_size(pdf)
+    matrix = pymupdf.Matrix(scale, scale)
+    parts = []
+    for i, page in enumerate(pdf):
+        if i == 0:
+            header = extract.REPORT_HEADER_HEIGHT
+        else:
+            header = extract.PAGE_HEADER_HEIGHT
+        body = pymupdf.Rect(
+            page.rect.x0,
+            header,
+            page.rect.x1,
+            page.rect.y1 - extract.PAGE_FOOTER_HEIGHT,
+        )
+        items: list[Item] = []
+        # The areas of the charts and tables, whose text is not repeated
+        covered = []
+        for title, rect in extract.get_chart_rects(page, i):
+            with profiling.span("get_pixmap", page=i, chart=title):
+                png = page.get_pixmap(matrix=matrix, clip=rect).tobytes(output="png")
+            image_data = base64.b64encode(png).decode()
+            items.append(
+                Item(
+                    rect.y0, rect.x0, f"![{title}](data:image/png;base64,{image_data})"
+                )
+            )
+            covered.append(rect)
+        with profiling.span("find_tables", page=i):
+            tables = page.find_tables(clip=body).tables
+        for table in tables:
+            rect = pymupdf.Rect(table.bbox)
+            if not any(rect.intersects(area) for area in covered):
+                items.append(Item(rect.y0, rect.x0, table.to_markdown().strip()))
+                covered.append(rect)
+        for block in page.get_text("dict", sort=True)["blocks"]:
+            rect = pymupdf.Rect(block["bbox"])
+            if block["type"] != 0 or rect not in body:
+                continue
+            if any(rect.intersects(area) for area in covered):
+                continue
+            markdown = get_block_markdown(block, body_size)
+            if markdown:
+                items.append(Item(rect.y0, rect.x0, markdown))
+        parts.extend(item.markdown for item in sorted(items))
+    logging.debug("Converted %d pages to %d Markdown blocks", len(pdf), len(parts))
+    return "\n\n".join(parts) + "\n"
+
+
+def get_body_size(pdf: pymupdf.Document) -> float:
+    """Returns the most common font size of the text of the PDF, by number of
+    characters.
+    """
+    sizes: Counter = Counter()
+    for page in pdf:
+        for block in page.get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    sizes[round(span["size"], 1)] += len(span["text"].strip())
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def get_block_markdown(block: dict, body_size: float) -> str:
+    """Returns the Markdown for a text block:  consecutive lines of bold text
+    which is larger than the body text become a heading, and the other lines
+    become a paragraph, with a line break between lines.
+    """
+    paragraphs: list[tuple[bool, list[str]]] = []
+    for line in block["lines"]:
+        text = "".join(span["text"] for span in line["spans"]).strip()
+        if not text:
+            continue
+        heading = all(
+            span["flags"] & BOLD and span["size"] >= body_size * HEADING_SIZE_RATIO
+            for span in line["spans"]
+            if span["text"].strip()
+        )
+        if paragraphs and paragraphs[-1][0] == heading:
+            paragraphs[-1][1].append(text)
+        else:
+            paragraphs.append((heading, [text]))
+    return "\n\n".join(
+        "## " + " ".join(lines) if heading else "  \n".join(lines)
+        for heading, lines in paragraphs
+    )
@@ -1,50 +1,203 @@
-from typing import Optional
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import tempfile
+from typing import Any, Optional
 
-from playwright.sync_api import BrowserContext, Page, sync_playwright
+import platformdirs
+from playwright.async_api import async_playwright, BrowserContext, Page
 
+from logilica_cli import profiling
 from logilica_cli.page_login import LoginPage
+from logilica_cli.request_filter import RequestFilter
+from logilica_cli.update_gdoc import get_info_file
+
+DEFAULT_STORAGE_STATE_FILE_TEMPLATE = "logilica_session_{domain}_{username}.json"
+
+
+def get_storage_state_file(config: dict[str, Any], credentials: dict[str, str]) -> Path:
+    """Get the Path to the file for caching the Logilica login (i.e., the
+    Playwright storage state with the session cookies).
+
+    The file is kept alongside the Google OAuth token, in the user "cache
+    directory", unless `storage_state_file` is specified under "config" ->
+    "logilica".  The default file name is specific to the domain and user, so
+    that a cached login is never used for the wrong account.
+    """
+    default_file_name = DEFAULT_STORAGE_STATE_FILE_TEMPLATE.format(
+        domain=credentials["domain"],
+        username=credentials.get("username") or "sso",
+    )
+    return get_info_file(
+        config.get("logilica", {}).get("storage_state_file"),
+        re.sub(r"[^\w.@-]", "_", default_file_name),
+        platformdirs.user_cache_path,
+    )
+
+
+def save_storage_state(path: Path, state: dict[str, Any]) -> None:
+    """Writes the storage state (which holds the session cookies) to the file,
+    such that it is never readable by other users:  it is written to a
+    temporary file, which is created with mode 0600, and then renamed over the
+    file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as temp_file:
+            json.dump(state, temp_file)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
 
 
 class PlaywrightSession:
-    """Encapsulation of Playwright Browser for usage in Page Objects."""
+    """Encapsulation of Playwright Browser for usage in Page Objects.
+
+    The session uses the asyncio Playwright API, so that the Page Objects can
+    run concurrently in a single event loop; synchronous commands run their
+    session with asyncio.run().
+    """
 
-    def __init__(self, headless=True):
+    def __init__(
+        self,
+        headless=True,
+        request_filter: Optional[RequestFilter] = None,
+        cdp_endpoint: Optional[str] = None,
+    ):
         self.headless = headless
         self.browser = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.storage_state: Optional[Path] = None
+        self.request_filter = request_filter
+        self.cdp_endpoint = cdp_endpoint
 
-    def __enter__(self):
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=self.headless)
-        self.context = self.browser.new_context(accept_downloads=True)
-        self.page = self.context.new_page()
+    async def __aenter__(self):
+        self.playwright = await async_playwright().start()
+        if self.cdp_endpoint:
+            # Use the default context of the running browser, which holds its
+            # login (see the `browser serve` command).
+            self.browser = await self.playwright.chromium.connect_over_cdp(
+                self.cdp_endpoint
+            )
+            self.context = self.browser.contexts[0]
+            if self.request_filter:
+                await self.request_filter.install(self.context)
+        else:
+            self.browser = await self.playwright.chromium.launch(headless=self.headless)
+            self.context = await self.new_context()
+        self.page = await self.context.new_page()
         return self.page
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        self.browser.close()
-        self.playwright.stop()
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self.cdp_endpoint:
+            # Leave the shared browser running:  close only our page and
+            # disconnect (by stopping Playwright).
+            await self.page.close()
+        else:
+            await self.browser.close()
+        await self.playwright.stop()
+        if self.request_filter:
+            self.request_filter.report()
+
+    async def new_context(self) -> BrowserContext:
+        context = await self.browser.new_context(
+            accept_downloads=True, storage_state=self.storage_state
+        )
+        if self.request_filter:
+            await self.request_filter.install(context)
+        return context
 
 
 class LogilicaSession(PlaywrightSession):
     """Encapsulation of a logged-in Logilica session as an extension of a
     PlaywrightSession.
+
+    If a storage state file is provided, the login is cached in it:  a cached
+    login is reused as long as Logilica accepts it (in which case the browser
+    is headless even for SSO), and the cache is refreshed after each login.
     """
 
-    def __init__(self, oauth: bool, logilica_credentials: dict[str, str]):
-        super().__init__(headless=not oauth)
+    def __init__(
+        self,
+        oauth: bool,
+        logilica_credentials: dict[str, str],
+        storage_state_file: Optional[Path] = None,
+        request_filter: Optional[RequestFilter] = None,
+        cdp_endpoint: Optional[str] = None,
+    ):
+        super().__init__(
+            headless=not oauth,
+            request_filter=request_filter,
+            cdp_endpoint=cdp_endpoint,
+        )
         self.oauth = oauth
         self.credentials = logilica_credentials
+        self.storage_state_file = storage_state_file
 
-    def __enter__(self) -> Page:
+    async def __aenter__(self) -> Page:
         """Start the Playwright session, log into Logilica, and return the
         Playwright Page for additional navigation.
         """
-        page = super().__enter__()
+        if self.cdp_endpoint:
+            return await self.enter_daemon_browser()
+        if self.storage_state_file and self.storage_state_file.exists():
+            self.storage_state = self.storage_state_file
+            self.headless = True
+            page = await super().__aenter__()
+            login_page = LoginPage(page=page, credentials=self.credentials)
+            with profiling.span("check_session"):
+                has_session = await login_page.has_session()
+            if has_session:
+                logging.info("Reusing cached Logilica login")
+                return page
+
+            logging.info("Cached Logilica login has expired")
+            self.storage_state = None
+            if self.oauth:
+                # The SSO dialog needs a visible browser window.
+                await self.browser.close()
+                await self.playwright.stop()
+                self.context = None
+                self.headless = False
+            else:
+                await self.context.close()
+                self.context = await self.new_context()
+                self.page = page = await self.context.new_page()
+        if not self.context:
+            page = await super().__aenter__()
+
+        login_page = LoginPage(page=page, credentials=self.credentials)
+        with profiling.span("login"):
+            await login_page.navigate()
+            if self.oauth:
+                await login_page.login_with_sso()
+            else:
+                await login_page.login_with_email()
+        if self.storage_state_file:
+            save_storage_state(
+                self.storage_state_file, await self.context.storage_state()
+            )
+            logging.debug("Logilica login cached in %s", self.storage_state_file)
+        return page
+
+    async def enter_daemon_browser(self) -> Page:
+        """Connect to the browser daemon, logging in again only if its login
+        has expired (which, for SSO, requires restarting the daemon).
+        """
+        page = await super().__aenter__()
         login_page = LoginPage(page=page, credentials=self.credentials)
-        login_page.navigate()
-        if self.oauth:
-            login_page.login_with_sso()
+        if await login_page.has_session():
+            logging.info("Using the browser daemon's Logilica login")
+        elif self.oauth:
+            raise RuntimeError(
+                "The browser daemon's login has expired; restart `browser serve`"
+            )
         else:
-            login_page.login_with_email()
+            await login_page.navigate()
+            await login_page.login_with_email()
         return page
@@ -0,0 +1,148 @@
+#
+# This module contains the built-in instrumentation of the tool:  the hot
+# paths are wrapped in nested timing spans, which, when profiling is enabled,
+# are recorded and can be written as a Chrome trace-event file (viewable with
+# chrome://tracing or https://ui.perfetto.dev) and summarized in a table.
+# When profiling is not enabled, the spans cost next to nothing.
+#
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+import cProfile
+import json
+import logging
+import os
+from pathlib import Path
+import pstats
+import threading
+import time
+from typing import Any, ContextManager, Iterator, Optional
+
+
+class Profiler:
+    """Recorder of timing spans and, optionally, of cProfile statistics for
+    the spans marked as stages.
+
+    Spans may be recorded concurrently from several threads and asyncio tasks;
+    each thread and task gets its own track in the trace.
+    """
+
+    def __init__(self, cprofile_dir: Optional[Path] = None):
+        self.cprofile_dir = cprofile_dir
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        self.events: list[dict[str, Any]] = []
+        self.tracks: dict[Any, int] = {}
+        self.stage_profiles: dict[str, list[cProfile.Profile]] = defaultdict(list)
+
+    def track(self) -> int:
+        """Returns the ID of the track of the current thread or task."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        thread = threading.current_thread()
+        key = (thread.ident, id(task)) if task else (thread.ident, None)
+        with self.lock:
+            if key not in self.tracks:
+                self.tracks[key] = tid = len(self.tracks) + 1
+                self.events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": os.getpid(),
+                        "tid": tid,
+                        "args": {"name": task.get_name() if task else thread.name},
+                    }
+                )
+            return self.tracks[key]
+
+    @contextmanager
+    def span(self, name: str, stage: bool, args: dict[str, Any]) -> Iterator[None]:
+        tid = self.track()
+        profile = None
+        if stage and self.cprofile_dir:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Only one profiler can be active at a time (in Python 3.12+).
+                logging.debug("Not profiling stage '%s': profiler busy", name)
+                profile = None
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            if profile:
+                profile.disable()
+            with self.lock:
+                self.events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start - self.origin) / 1000,
+                        "dur": (end - start) / 1000,
+                        "pid": os.getpid(),
+                        "tid": tid,
+                        "args": args,
+                    }
+                )
+                if profile:
+                    self.stage_profiles[name].append(profile)
+
+    def write_trace(self, path: Path) -> None:
+        """Writes the spans as a Chrome trace-event (JSON) file."""
+        with self.lock:
+            trace = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+            path.write_text(json.dumps(trace))
+        logging.info("Profile trace written to %s", path)
+
+    def write_stage_profiles(self) -> None:
+        """Writes the cProfile statistics of each stage to `<stage>.prof`."""
+        self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+        for name, profiles in self.stage_profiles.items():
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(self.cprofile_dir / f"{name}.prof")
+        logging.info("Stage profiles written to %s", self.cprofile_dir)
+
+    def summary(self) -> str:
+        """Returns a table of the total, mean, and maximum duration of the
+        spans, by name, in decreasing order of total duration.
+        """
+        durations: dict[str, list[float]] = defaultdict(list)
+        for event in self.events:
+            if event["ph"] == "X":
+                durations[event["name"]].append(event["dur"] / 1e6)
+        width = max((len(name) for name in durations), default=4)
+        lines = [
+            f"{'Span':<{width}}  {'Count':>5}  {'Total s':>9}"
+            f"  {'Mean s':>8}  {'Max s':>8}"
+        ]
+        for name, times in sorted(durations.items(), key=lambda d: -sum(d[1])):
+            lines.append(
+                f"{name:<{width}}  {len(times):>5}  {sum(times):>9.3f}"
+                f"  {sum(times) / len(times):>8.3f}  {max(times):>8.3f}"
+            )
+        return "\n".join(lines)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable(profiler: Optional[Profiler]) -> None:
+    """Sets the Profiler which records the spans (or, if None, disables
+    profiling).
+    """
+    global _profiler
+    _profiler = profiler
+
+
+def span(name: str, *, stage: bool = False, **args: Any) -> ContextManager:
+    """Returns a context manager which times the enclosed code as a span with
+    the given name and arguments, if profiling is enabled.  The spans of
+    stages are also profiled with cProfile, if requested.
+    """
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.span(name, stage, args)
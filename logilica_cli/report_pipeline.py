@@ -0,0 +1,82 @@
+#
+# This module contains the pipeline which runs the stages of the weekly report
+# -- download, processing (extraction or conversion), and output -- so that
+# they overlap:  the stages are connected by bounded queues, and each dashboard
+# is processed as soon as it has been downloaded, while the next ones are still
+# being exported.
+#
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Optional
+
+from logilica_cli.export_plan import DashboardEntry
+
+# Maximum number of dashboards waiting between two stages
+QUEUE_SIZE = 4
+
+# Coroutine function which feeds the dashboards into the pipeline by awaiting
+# the function it is passed for each one, in any order
+Producer = Callable[[Callable[[DashboardEntry], Awaitable[None]]], Awaitable[None]]
+
+
+async def run_pipeline(
+    *,
+    produce: Producer,
+    process: Callable[[DashboardEntry], Any],
+    consume: Callable[[DashboardEntry, Any], None],
+    executor: Executor,
+    concurrency: int = 1,
+    queue_size: int = QUEUE_SIZE,
+) -> None:
+    """Runs the pipeline until the producer is done and every dashboard which
+    it produced has been processed and consumed.
+
+    The CPU-bound `process` function runs in the executor, so that it does not
+    block the event loop (and, so, the downloads); up to `concurrency`
+    dashboards are processed at once (the executor should have as many
+    workers).  `consume` is called in the event loop with the result for each
+    dashboard, in order of completion.
+
+    If the producer fails, the dashboards which it did produce are still
+    processed and consumed before its exception is raised.  If any other stage
+    fails, the pipeline is cancelled.
+    """
+    produced: asyncio.Queue[Optional[DashboardEntry]] = asyncio.Queue(queue_size)
+    processed: asyncio.Queue[Optional[tuple[DashboardEntry, Any]]] = asyncio.Queue(
+        queue_size
+    )
+    producer_error: Optional[Exception] = None
+
+    async def feed() -> None:
+        nonlocal producer_error
+        try:
+            await produce(produced.put)
+        except Exception as err:
+            producer_error = err
+        await produced.put(None)
+
+    async def work() -> None:
+        loop = asyncio.get_running_loop()
+        while (entry := await produced.get()) is not None:
+            result = await loop.run_in_executor(executor, process, entry)
+            await processed.put((entry, result))
+        # Pass the end of the input on to the other workers.
+        await produced.put(None)
+
+    async def work_all() -> None:
+        await asyncio.gather(*(work() for _ in range(concurrency)))
+        await processed.put(None)
+
+    async def drain() -> None:
+        while (item := await processed.get()) is not None:
+            consume(*item)
+
+    tasks = [asyncio.create_task(stage()) for stage in (feed, work_all, drain)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    if producer_error:
+        raise producer_error
@@ -0,0 +1,107 @@
+#
+# This module contains support for blocking the requests made by the Logilica
+# web UI which are not needed to export the dashboards (e.g., analytics,
+# fonts, and avatars), to speed up page loads.
+#
+from collections import Counter
+import logging
+from typing import Any, Iterable, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Route
+
+
+def host_matches(host: str, patterns: Iterable[str]) -> bool:
+    """Returns whether the host is one of the patterns or a subdomain of one."""
+    return any(host == p or host.endswith("." + p) for p in patterns)
+
+
+class RequestFilter:
+    """Route-interception layer for a Playwright BrowserContext.
+
+    A request is blocked if its resource type (e.g., "image", "font") or its
+    host matches a "block" list and neither matches an "allow" list.  In dry
+    run mode, nothing is blocked, but the requests which would have been are
+    counted along with the sizes of their responses, to measure the savings.
+    """
+
+    def __init__(
+        self,
+        *,
+        block_resource_types: Iterable[str] = (),
+        allow_resource_types: Iterable[str] = (),
+        block_hosts: Iterable[str] = (),
+        allow_hosts: Iterable[str] = (),
+        dry_run: bool = False,
+    ):
+        self.block_resource_types = set(block_resource_types)
+        self.allow_resource_types = set(allow_resource_types)
+        self.block_hosts = set(block_hosts)
+        self.allow_hosts = set(allow_hosts)
+        self.dry_run = dry_run
+        self.blocked: Counter[str] = Counter()
+        self.blocked_bytes = 0
+        self.allowed = 0
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> Optional["RequestFilter"]:
+        """Creates a filter from the `request_filter` key under "config" ->
+        "logilica", if there is one.
+        """
+        options = config.get("logilica", {}).get("request_filter")
+        return cls(**options) if options is not None else None
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        if resource_type in self.allow_resource_types or host_matches(
+            host, self.allow_hosts
+        ):
+            return False
+        return resource_type in self.block_resource_types or host_matches(
+            host, self.block_hosts
+        )
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if not self.should_block(request.resource_type, request.url):
+            self.allowed += 1
+            await route.continue_()
+            return
+        self.blocked[request.resource_type] += 1
+        if self.dry_run:
+            response = await route.fetch()
+            self.blocked_bytes += len(await response.body())
+            await route.fulfill(response=response)
+        else:
+            await route.abort("blockedbyclient")
+
+    async def install(self, context: BrowserContext) -> None:
+        """Routes the context's requests through the filter, unless it has
+        nothing to block:  routing disables Playwright's HTTP cache for the
+        context, which would slow down loading the dashboards for nothing.
+        """
+        if not (self.block_resource_types or self.block_hosts):
+            logging.debug("Request filter has nothing to block; not installed")
+            return
+        await context.route("**/*", self.handle)
+
+    def report(self) -> None:
+        """Logs how many requests were (or would have been) blocked."""
+        total = sum(self.blocked.values())
+        details = ", ".join(f"{n} {t}" for t, n in self.blocked.most_common())
+        if self.dry_run:
+            logging.info(
+                "Request filter (dry run) would have blocked %d of %d requests"
+                " (%s), totalling %d bytes",
+                total,
+                total + self.allowed,
+                details or "none",
+                self.blocked_bytes,
+            )
+        else:
+            logging.info(
+                "Request filter blocked %d of %d requests (%s)",
+                total,
+                total + self.allowed,
+                details or "none",
+            )
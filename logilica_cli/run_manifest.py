@@ -0,0 +1,129 @@
+#
+# This module contains the manifest of a `weekly-report` run, which is kept in
+# the run's own directory (together with the files which the run produces) and
+# records the steps completed for each dashboard, so that an interrupted or
+# failed run can be resumed.
+#
+from datetime import datetime, timezone
+import json
+import logging
+from pathlib import Path
+import threading
+from typing import Any, Literal
+
+Step = Literal["downloaded", "extracted", "converted", "uploaded"]
+
+
+class RunManifest:
+    """Record of the steps completed in a run, per dashboard.
+
+    Each step is recorded with its completion time and with any details which
+    affect its result (e.g., the image scale); a step only counts as done for a
+    dashboard if the dashboard's configuration (URL and file name) and those
+    details are unchanged.  Steps which apply to the whole report (i.e.,
+    "uploaded") are recorded under the REPORT key.  The manifest is rewritten
+    atomically after each step, so it survives the run being interrupted;
+    steps may be recorded from several threads.
+    """
+
+    FILE_NAME = "run_manifest.json"
+    REPORT = "*"
+
+    def __init__(self, dir_path: Path, resume: bool = False):
+        self.dir_path = dir_path
+        self.path = dir_path / self.FILE_NAME
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        if resume and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except ValueError:
+                logging.warning("Ignoring corrupt run manifest %s", self.path)
+            logging.info("Resuming the run recorded in %s", self.path)
+
+    @staticmethod
+    def key(team: str, dashboard: str) -> str:
+        return f"{team} / {dashboard}"
+
+    @staticmethod
+    def identity(options: dict[str, Any]) -> dict[str, Any]:
+        return {"url": options.get("url"), "filename": options["filename"]}
+
+    def done(
+        self,
+        team: str,
+        dashboard: str,
+        options: dict[str, Any],
+        step: Step,
+        **details: Any,
+    ) -> bool:
+        entry = self.entries.get(self.key(team, dashboard))
+        if not entry or entry["dashboard"] != self.identity(options):
+            return False
+        record = entry["steps"].get(step)
+        return bool(record) and all(record.get(k) == v for k, v in details.items())
+
+    def record(
+        self,
+        team: str,
+        dashboard: str,
+        options: dict[str, Any],
+        step: Step,
+        **details: Any,
+    ) -> None:
+        key = self.key(team, dashboard)
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry or entry["dashboard"] != self.identity(options):
+                entry = self.entries[key] = {
+                    "dashboard": self.identity(options),
+                    "steps": {},
+                }
+            entry["steps"][step] = {
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+                **details,
+            }
+            self.save()
+
+    def step_details(self, team: str, dashboard: str, step: Step) -> dict[str, Any]:
+        """Returns the details recorded for a step of a dashboard, if it is
+        done.
+        """
+        entry = self.entries.get(self.key(team, dashboard), {})
+        return entry.get("steps", {}).get(step, {})
+
+    def report_step(self, step: Step) -> dict[str, Any]:
+        """Returns the details recorded for a whole-report step, if it is done."""
+        return self.entries.get(self.REPORT, {}).get("steps", {}).get(step, {})
+
+    def record_report_step(self, step: Step, **details: Any) -> None:
+        with self.lock:
+            entry = self.entries.setdefault(self.REPORT, {"steps": {}})
+            entry["steps"][step] = {
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+                **details,
+            }
+            self.save()
+
+    def pending(
+        self, teams: dict[str, Any], step: Step, **details: Any
+    ) -> dict[str, Any]:
+        """Returns the teams configuration reduced to the dashboards for which
+        the step has not been done.
+        """
+        return {
+            team: {
+                **dashboards,
+                "team_dashboards": {
+                    dashboard: options
+                    for dashboard, options in dashboards["team_dashboards"].items()
+                    if not self.done(team, dashboard, options, step, **details)
+                },
+            }
+            for team, dashboards in teams.items()
+        }
+
+    def save(self) -> None:
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(self.entries, indent=2))
+        temp_path.replace(self.path)
@@ -1,18 +1,21 @@
 import base64
 from datetime import datetime
-from io import BytesIO
+from io import BytesIO, StringIO
 import logging
 from pathlib import Path
-from typing import Callable, Literal, Optional, Union
+from typing import Callable, Iterable, Literal, Optional, TextIO, Union
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 import platformdirs
-from yattag import Doc, SimpleDoc
+from yattag import Doc
+
+from logilica_cli import profiling
+from logilica_cli.image_encoding import get_mime_type
 
 APPLICATION_NAME = "Logilica"
 DEFAULT_APP_CREDENTIALS_FILE_NAME = "application_default_credentials.json"
@@ -20,50 +23,70 @@ DEFAULT_GDRIVE_FILE_TEMPLATE = "Logilica_Reports_{:%Y-%m-%d}"
 DEFAULT_TOKEN_FILE_NAME = "token.json"
 
 
-def generate_html(pdf_items: dict[str, dict[str, bytes]]) -> SimpleDoc:
+def generate_html(
+    pdf_items: dict[str, dict[str, Union[bytes, list[bytes]]]],
+) -> StringIO:
     """Generate an HTML document from the set of charts and text extracted from
     the PDF.
     """
-    doc, tag, text = Doc().tagtext()
-    doc.asis("<!DOCTYPE html>")
-    with tag("html"):
-        with tag("body"):
-            with tag("h1"):
-                text("Logilica Weekly Report")
-            add_teams(pdf_items, doc, tag, text)
-
-            # Append something visible, so that GDocs doesn't truncate the
-            # last dashboard image.
-            doc.asis("<hr>")
+    doc = StringIO()
+    write_html(
+        doc, ((team, dashboards.items()) for team, dashboards in pdf_items.items())
+    )
     return doc
 
 
-def add_teams(
-    pdf_items: dict[str, dict[str, bytes]],
-    doc: SimpleDoc,
-    tag: Callable[[str], SimpleDoc.Tag],
-    text: Callable[[str], None],
-):
-    """Add sections to the document for each team.
-
-    The dashboard images are inserted into the document as data URIs.
+def write_html(
+    out: TextIO,
+    teams: Iterable[tuple[str, Iterable[tuple[str, Union[bytes, list[bytes]]]]]],
+) -> None:
+    """Write an HTML document from the teams' dashboard images, as
+    generate_html() does, but incrementally:  the teams and their dashboards
+    may be produced lazily, as (team, dashboards) and (dashboard, image)
+    pairs, and each image is written out before the next one is taken, so
+    that only one dashboard image need be held in memory at a time.
     """
-    for team, dashboards in pdf_items.items():
+    doc, tag, text = Doc().tagtext()
+    doc.asis("<!DOCTYPE html><html><body>")
+    with tag("h1"):
+        text("Logilica Weekly Report")
+    out.write(doc.getvalue())
+    for team, dashboards in teams:
+        doc, tag, text = Doc().tagtext()
         doc.asis("<hr>")
         with tag("h2"):
             text(team)
-        for dashboard, contents in dashboards.items():
-            image_data = base64.b64encode(contents).decode()
-            doc.stag(
-                "img",
-                src="data:image/png;base64," + image_data,
-                width="80%",
-                height="80%",
-            )
+        out.write(doc.getvalue())
+        for dashboard, contents in dashboards:
+            out.write(get_image_html(contents))
+    # Append something visible, so that GDocs doesn't truncate the last
+    # dashboard image.
+    out.write("<hr></body></html>")
+
 
+def get_image_html(contents: Union[bytes, list[bytes]]) -> str:
+    """Generate the markup for a dashboard image.
 
-def upload_doc(doc: str, creds: Credentials, config: dict[str, any]) -> str:
-    """Upload the provided in-memory HTML document to Google Drive.
+    The image is inserted into the document as a data URI; the tiles of a
+    tiled image are inserted one after the other.
+    """
+    doc = Doc()
+    for image in [contents] if isinstance(contents, bytes) else contents:
+        image_data = base64.b64encode(image).decode()
+        doc.stag(
+            "img",
+            src=f"data:{get_mime_type(image)};base64," + image_data,
+            width="80%",
+            height="80%",
+        )
+    return doc.getvalue()
+
+
+def upload_doc(
+    doc: Union[str, Path], creds: Credentials, config: dict[str, any]
+) -> str:
+    """Upload the provided HTML document, in memory or in a file, to Google
+    Drive.
 
     The file is created on the Google Drive with a MIME type of
     `'application/vnd.google-apps.document'`, which causes Google to treat it
@@ -84,9 +107,12 @@ def upload_doc(doc: str, creds: Credentials, config: dict[str, any]) -> str:
     logging.info("Uploading report to %s on Google Drive", filename)
     try:
         service = build("drive", "v3", credentials=creds, cache_discovery=False)
-        media = MediaIoBaseUpload(
-            BytesIO(doc.encode()), mimetype="text/html", resumable=True
-        )
+        if isinstance(doc, Path):
+            media = MediaFileUpload(doc, mimetype="text/html", resumable=True)
+        else:
+            media = MediaIoBaseUpload(
+                BytesIO(doc.encode()), mimetype="text/html", resumable=True
+            )
         request = service.files().create(
             body=file_metadata,
             fields="id",
@@ -97,7 +123,8 @@ def upload_doc(doc: str, creds: Credentials, config: dict[str, any]) -> str:
 
         response = None
         while response is None:
-            status, response = request.next_chunk()
+            with profiling.span("upload_chunk"):
+                status, response = request.next_chunk()
             if status:
                 logging.debug("Uploaded %d%%.", int(status.progress() * 100))
         logging.debug(
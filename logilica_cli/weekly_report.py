@@ -1,26 +1,188 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 import logging
 import os
 from pathlib import Path
 import shutil
 import tempfile
+from typing import Any, Awaitable, Callable, Optional
 
 import click
 
-from logilica_cli import common_options, sort_click_command_parameters
-from logilica_cli.page_dashboard import DashboardPage
-from logilica_cli.pdf_convert import PDFConvert
-from logilica_cli.pdf_extract import PDFExtract
-from logilica_cli.playwright_session import LogilicaSession
+from logilica_cli import (
+    browser_daemon_option,
+    common_options,
+    Duration,
+    profiling,
+    sort_click_command_parameters,
+)
+from logilica_cli.browser_daemon import get_daemon_endpoint
+from logilica_cli.download_cache import DownloadCache, get_download_cache_dir
+from logilica_cli.export_plan import dashboard_entries, DashboardEntry
+from logilica_cli.image_cache import get_image_cache_dir, ImageCache
+from logilica_cli.image_encoding import ImageEncoder, ImageFormat
+from logilica_cli.page_dashboard import DashboardPage, ExportMode
+from logilica_cli.pdf_convert import get_convert_profiles, PDFConvert
+from logilica_cli.pdf_extract import (
+    DashboardImage,
+    ExtractFailures,
+    Fit,
+    PDFExtract,
+    report_extractions,
+)
+from logilica_cli.playwright_session import (
+    get_storage_state_file,
+    LogilicaSession,
+)
+from logilica_cli.report_pipeline import run_pipeline
+from logilica_cli.request_filter import RequestFilter
+from logilica_cli.run_manifest import RunManifest
 from logilica_cli.update_gdoc import (
-    generate_html,
     get_google_credentials,
     upload_doc,
+    write_html,
 )
 
+# The files which a run produces besides its downloads (its manifest, the
+# extracted images and the HTML report) are kept in this subdirectory of the
+# downloads directory, which is removed when the run succeeds.
+RUN_DIR_NAME = ".logilica-cli-run"
+
+# The HTML report is written to this file in the run directory.
+REPORT_FILE_NAME = "report.html"
+
+# The report is copied to the console in chunks of this size (in characters).
+REPORT_CHUNK_SIZE = 1 << 16
+
+
+async def download_dashboards(
+    *,
+    oauth: bool,
+    logilica_credentials: dict[str, str],
+    storage_state_file: Optional[Path],
+    cdp_endpoint: Optional[str],
+    teams: dict[str, Any],
+    base_dir_path: Path,
+    concurrency: int,
+    cache: Optional[DownloadCache],
+    request_filter: Optional[RequestFilter],
+    export_mode: ExportMode,
+    retries: int,
+    manifest: RunManifest,
+    on_downloaded: Callable[[DashboardEntry], Awaitable[None]],
+) -> None:
+    """Logs into Logilica and downloads the teams' dashboards, running up to
+    `concurrency` exports at once in the event loop, and passes each one to
+    `on_downloaded` as soon as it is available.
+
+    Dashboards which the run manifest records as downloaded are skipped; if a
+    cache is provided, so are the dashboards with a fresh export in it.  (No
+    session is started if there is nothing left to download.)
+    """
+    pending = manifest.pending(teams, "downloaded")
+    if cache:
+        stale_teams = cache.restore(pending, base_dir_path)
+        for team, dashboard, options in dashboard_entries(pending):
+            if dashboard not in stale_teams[team]["team_dashboards"]:
+                manifest.record(team, dashboard, options, "downloaded")
+        pending = stale_teams
+    for team, dashboard, options in dashboard_entries(teams):
+        if dashboard not in pending[team]["team_dashboards"]:
+            await on_downloaded((team, dashboard, options))
+    if not any(dashboards["team_dashboards"] for dashboards in pending.values()):
+        logging.info("All dashboards are downloaded; skipping Logilica session")
+        return
+
+    logging.info("Starting session")
+    async with LogilicaSession(
+        oauth,
+        logilica_credentials,
+        storage_state_file,
+        request_filter,
+        cdp_endpoint,
+    ) as page:
+        dashboard_page = DashboardPage(page=page)
+        await dashboard_page.download_team_dashboards(
+            teams=pending,
+            base_dir_path=base_dir_path,
+            concurrency=concurrency,
+            cache=cache,
+            export_mode=export_mode,
+            retries=retries,
+            manifest=manifest,
+            on_downloaded=on_downloaded,
+        )
+
+
+def write_report(
+    teams: dict[str, Any],
+    extractor: PDFExtract,
+    base_dir_path: Path,
+    manifest: RunManifest,
+) -> Path:
+    """Writes the HTML report of the teams' dashboards to a file in the run
+    directory and returns its path.
+
+    The dashboard images are read back (or, if need be, extracted) in
+    configuration order and written out one at a time, so that the report is
+    never held in memory as a whole.
+    """
+    report_path = manifest.dir_path / REPORT_FILE_NAME
+    with open(report_path, "w") as out:
+        write_html(
+            out,
+            (
+                (
+                    team,
+                    (
+                        (dashboard, image)
+                        for _, dashboard, image in extractor.iter_pdf_objects(
+                            {team: dashboards}, base_dir_path, manifest
+                        )
+                    ),
+                )
+                for team, dashboards in teams.items()
+            ),
+        )
+    return report_path
+
 
 @sort_click_command_parameters
 @click.command()
 @common_options
+@browser_daemon_option
+@click.option(
+    "--clip-pages/--no-clip-pages",
+    "clip_pages",
+    default=False,
+    show_default=True,
+    help=(
+        "Render only the content region of each page, below the header and"
+        " above the footer and the trailing whitespace, instead of whole pages"
+    ),
+)
+@click.option(
+    "--convert-profile",
+    "convert_profile",
+    metavar="NAME",
+    default="default",
+    show_default=True,
+    help=(
+        "The docling pipeline profile used for the markdown and html outputs:"
+        " fast (no OCR, page or picture images), accurate (no OCR, accurate table"
+        " structure), or one defined under config -> docling -> profiles"
+    ),
+)
+@click.option(
+    "--download-concurrency",
+    "-c",
+    "download_concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of browser pages used to export dashboards concurrently",
+)
 @click.option(
     "--downloads-temp-dir",
     "-t",
@@ -33,6 +195,86 @@ from logilica_cli.update_gdoc import (
         " if the directory is created by the tool, it will be deleted after the run)"
     ),
 )
+@click.option(
+    "--export-mode",
+    "-E",
+    "export_mode",
+    type=click.Choice(["dialog", "network", "replay"], case_sensitive=False),
+    default="dialog",
+    show_default=True,
+    help="""How dashboards are exported from Logilica:
+
+    dialog: use the export dialog and download the resulting file
+
+    network: read the PDF from the network response to the export request
+    made by the web UI, skipping the download dialog
+
+    replay: as for network, then replay the captured export request for the
+    other dashboards without loading them (falling back to network if the
+    request cannot be adapted to a dashboard)
+    """,
+)
+@click.option(
+    "--fit-images",
+    "-f",
+    "fit_images",
+    type=click.Choice(["none", "tile", "downscale"], case_sensitive=False),
+    default="none",
+    show_default=True,
+    help="""How dashboard images larger than the Google Docs limit of 2500
+    pixels are handled:
+
+    none: leave them as they are (and log a warning)
+
+    tile: split them into several images, at page boundaries or blank rows
+    where possible
+
+    downscale: shrink them to fit
+    """,
+)
+@click.option(
+    "--image-cache-size",
+    "image_cache_size",
+    type=click.IntRange(min=0),
+    metavar="MEGABYTES",
+    help=(
+        "Keep up to this many megabytes of rendered dashboard images in a"
+        " persistent cache, and reuse them instead of rendering unchanged"
+        " dashboards again; if unspecified, the cache is not used"
+    ),
+)
+@click.option(
+    "--image-colors",
+    "image_colors",
+    type=click.IntRange(2, 256),
+    help="Reduce PNG and WebP dashboard images to a palette of this many colors",
+)
+@click.option(
+    "--image-compression",
+    "image_compression",
+    type=click.IntRange(0, 9),
+    help=(
+        "Compression effort for PNG and WebP dashboard images, from 0 (fastest)"
+        " to 9 (smallest)"
+    ),
+)
+@click.option(
+    "--image-format",
+    "image_format",
+    type=click.Choice(["png", "webp", "jpeg"], case_sensitive=False),
+    default="png",
+    show_default=True,
+    help="File format of the dashboard images",
+)
+@click.option(
+    "--image-quality",
+    "image_quality",
+    type=click.IntRange(1, 100),
+    help=(
+        "Quality of JPEG and (lossy) WebP dashboard images, from 1 to 100;"
+        " WebP images are lossless if unspecified"
+    ),
+)
 @click.option(
     "--input",
     "-I",
@@ -42,6 +284,40 @@ from logilica_cli.update_gdoc import (
     show_default=True,
     help="Input source -- download from Logilica or use pre-downloaded files",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    "jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help=(
+        "Number of dashboards whose images are extracted (or which are"
+        " converted) at once, each in a separate process"
+    ),
+)
+@click.option(
+    "--max-age",
+    "-m",
+    "max_age",
+    type=Duration(),
+    help=(
+        "Reuse dashboards exported from Logilica within this time (e.g., 90s,"
+        " 15m, 12h, 2d) from the persistent download cache instead of"
+        " exporting them again; if unspecified, the cache is not used"
+    ),
+)
+@click.option(
+    "--max-gap",
+    "max_gap",
+    type=click.IntRange(min=1),
+    metavar="POINTS",
+    help=(
+        "Shorten blank horizontal bands in the dashboard images which are"
+        " taller than this many points (1/72 inch) to this height; if"
+        " unspecified, they are kept"
+    ),
+)
 @click.option(
     "--output",
     "--output-type",
@@ -51,7 +327,9 @@ from logilica_cli.update_gdoc import (
             "gdoc",
             "console",
             "images-only",
+            "charts-only",
             "markdown",
+            "markdown-lite",
             "html",
             "markdown-with-refs",
             "html-with-refs",
@@ -67,11 +345,17 @@ from logilica_cli.update_gdoc import (
 
     console: HTML with an embedded image representing whole dashboard to stdout
 
-    images-only: Embedded image only as a PNG.
+    images-only: Embedded image only, as a PNG (see --image-format).
+
+    charts-only: An image of each chart panel, as a PNG (see --image-format),
+    found from the layout of the PDF, without docling.
 
     markdown: PDF parsed by docling into Markdown, with images embedded in it.
     Images might represent individual charts.
 
+    markdown-lite: PDF text and tables extracted into Markdown without
+    docling, with images of the charts embedded in it.
+
     html: PDF parsed by docling into HTML, with images embedded in it.  Images
     might represent individual charts.
 
@@ -82,6 +366,54 @@ from logilica_cli.update_gdoc import (
     externally and referenced. Images might represent individual charts.
     """,
 )
+@click.option(
+    "--page-jobs",
+    "page_jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help=(
+        "Number of pages of each dashboard which are rendered at once, each in"
+        " a separate process (cannot be combined with --jobs)"
+    ),
+)
+@click.option(
+    "--profile",
+    "-P",
+    "profile_path",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help=(
+        "Record timing spans for the stages and hot paths of the run, write"
+        " them to this file as Chrome trace events, and print a summary"
+    ),
+)
+@click.option(
+    "--profile-stages-dir",
+    "cprofile_dir",
+    type=click.Path(file_okay=False, writable=True, path_type=Path),
+    help=(
+        "With --profile, also profile the download, process, and output"
+        " stages with cProfile, writing <stage>.prof files to this directory"
+    ),
+)
+@click.option(
+    "--resume",
+    "-R",
+    is_flag=True,
+    default=False,
+    help=(
+        "Resume the previous run using the same downloads directory, skipping"
+        " the steps recorded as completed in its run manifest"
+    ),
+)
+@click.option(
+    "--retries",
+    "-r",
+    type=click.IntRange(min=0),
+    default=2,
+    show_default=True,
+    help="Number of times to retry exporting a dashboard, with exponential backoff",
+)
 @click.option(
     "--scale",
     "-s",
@@ -99,9 +431,29 @@ def weekly_report(
     password: str,
     domain: str,
     oauth: bool,
+    reuse_login: bool,
+    browser_daemon: bool,
+    clip_pages: bool,
+    convert_profile: str,
+    download_concurrency: int,
     downloads_temp_dir: Path,
+    export_mode: ExportMode,
+    fit_images: Fit,
+    image_cache_size: Optional[int],
+    image_colors: Optional[int],
+    image_compression: Optional[int],
+    image_format: ImageFormat,
+    image_quality: Optional[int],
     source: str,
+    jobs: int,
+    max_age: Optional[timedelta],
+    max_gap: Optional[int],
     output: str,
+    page_jobs: int,
+    profile_path: Optional[Path],
+    cprofile_dir: Optional[Path],
+    resume: bool,
+    retries: int,
     scale: int,
 ) -> None:
     """Downloads and processes weekly report for teams specified in the
@@ -140,6 +492,20 @@ def weekly_report(
     }
     output_dir_path = context.obj["output_dir_path"]
 
+    # The options are checked before anything else is done (in particular,
+    # before the Google authorization flow is started).
+    if resume and not downloads_temp_dir:
+        raise click.UsageError("--resume requires --downloads-temp-dir")
+    if jobs > 1 and page_jobs > 1:
+        raise click.UsageError("--page-jobs cannot be combined with --jobs")
+
+    convert_profiles = get_convert_profiles(config)
+    if convert_profile not in convert_profiles:
+        raise click.UsageError(
+            f"Unknown --convert-profile {convert_profile!r}"
+            f" (choose from {', '.join(convert_profiles)})"
+        )
+
     # If needed, get the credentials now to enable "failing early".
     google_credentials = get_google_credentials(config) if output == "gdoc" else None
 
@@ -158,48 +524,178 @@ def weekly_report(
         "" if remove_downloads else " not",
     )
 
+    profiler = profiling.Profiler(cprofile_dir) if profile_path else None
+    profiling.enable(profiler)
+    run_dir_path = downloads_temp_dir / RUN_DIR_NAME
+    run_dir_path.mkdir(exist_ok=True)
+    manifest = RunManifest(run_dir_path, resume=resume)
+    teams = configuration["teams"]
     try:
-        if source == "logilica":
-            logging.info("Starting session")
-            with LogilicaSession(oauth, logilica_credentials) as page:
-                dashboard_page = DashboardPage(page=page)
-                dashboard_page.download_team_dashboards(
-                    teams=configuration["teams"], base_dir_path=downloads_temp_dir
-                )
-
+        extracting = output in ("gdoc", "console", "images-only", "charts-only")
         converter = PDFConvert(
             output_dir_path=output_dir_path,
             download_dir_path=downloads_temp_dir,
             scale=scale,
+            jobs=1 if extracting else jobs,
+            profile=convert_profiles[convert_profile],
         )
-        if output in ("markdown", "html", "markdown-with-refs", "html-with-refs"):
-            o_format = output.removesuffix("-with-refs")
-            embed_images = not output.endswith("-with-refs")
-            converter.to_format_multiple(
-                teams=configuration["teams"],
-                format=o_format,
-                embed_images=embed_images,
-            )
-        else:
-            pdf_items = PDFExtract(scale=scale).get_pdf_objects(
-                teams=configuration["teams"], download_dir_path=downloads_temp_dir
-            )
-            if output == "images-only":
-                converter.to_images(pdf_items=pdf_items)
-            else:
-                doc = generate_html(pdf_items)
-                if output == "gdoc":
-                    url = upload_doc(doc.getvalue(), google_credentials, config)
-                    click.echo(f"Report uploaded to {url}")
-                else:
-                    click.echo(doc.getvalue(), err=False)
+        extractor = PDFExtract(
+            scale=scale,
+            jobs=jobs if extracting else 1,
+            clip=clip_pages,
+            fit=fit_images,
+            encoder=ImageEncoder(
+                image_format, image_quality, image_compression, image_colors
+            ),
+            cache=(
+                ImageCache(get_image_cache_dir(config), image_cache_size << 20)
+                if image_cache_size is not None
+                else None
+            ),
+            max_gap=max_gap,
+            page_jobs=page_jobs if extracting else 1,
+            # Measuring the bytes saved takes a second (PNG) encoding of each
+            # image, so it is only done when they are reported in detail.
+            compare_with_png=(
+                profiler is not None or logging.getLogger().isEnabledFor(logging.DEBUG)
+            ),
+        )
+
+        # The report must be uploaded again if any dashboard changed.
+        uploaded = manifest.report_step("uploaded")
+        if any(
+            dashboards["team_dashboards"]
+            for dashboards in manifest.pending(
+                teams, "extracted", **extractor.image_settings
+            ).values()
+        ):
+            uploaded = {}
+        failures: ExtractFailures = {}
+
+        def process(entry: DashboardEntry) -> Any:
+            team, dashboard, options = entry
+            with profiling.span("process", stage=True, dashboard=dashboard):
+                if not extracting:
+                    return converter.convert_dashboard(
+                        team,
+                        dashboard,
+                        options,
+                        format=output.removesuffix("-with-refs"),
+                        embed_images=not output.endswith("-with-refs"),
+                        manifest=manifest,
+                    )
+                try:
+                    if output == "charts-only":
+                        return extractor.get_dashboard_charts(
+                            team, dashboard, options, downloads_temp_dir
+                        )
+                    image = extractor.get_dashboard_image(
+                        team, dashboard, options, downloads_temp_dir, manifest
+                    )
+                except Exception as err:
+                    # Extract the other dashboards regardless.
+                    failures[(team, dashboard)] = f"{type(err).__name__}: {err}"
+                    return None
+                # The images are saved with the manifest, and the report is
+                # written from the saved images, so they need not be kept.
+                return image if output == "images-only" else None
+
+        def consume(entry: DashboardEntry, result: Optional[DashboardImage]) -> None:
+            team, dashboard, _ = entry
+            if output in ("images-only", "charts-only") and result is not None:
+                converter.write_image(rawimage=result, team=team, dashboard=dashboard)
+
+        async def produce(put: Callable[[DashboardEntry], Awaitable[None]]) -> None:
+            with profiling.span("download", stage=True):
+                if source == "local":
+                    for entry in dashboard_entries(teams):
+                        await put(entry)
+                    return
+                await download_dashboards(
+                    oauth=oauth,
+                    logilica_credentials=logilica_credentials,
+                    storage_state_file=(
+                        get_storage_state_file(config, logilica_credentials)
+                        if reuse_login
+                        else None
+                    ),
+                    cdp_endpoint=(
+                        get_daemon_endpoint(logilica_credentials)
+                        if browser_daemon
+                        else None
+                    ),
+                    teams=teams,
+                    base_dir_path=downloads_temp_dir,
+                    concurrency=download_concurrency,
+                    cache=(
+                        DownloadCache(get_download_cache_dir(config), max_age)
+                        if max_age is not None
+                        else None
+                    ),
+                    request_filter=RequestFilter.from_config(config),
+                    export_mode=export_mode,
+                    retries=retries,
+                    manifest=manifest,
+                    on_downloaded=put,
+                )
+
+        # Only one of them has worker processes.
+        workers = max(extractor.jobs, converter.jobs)
+        with extractor, converter:
+            # Each dashboard is processed while the next ones are downloaded.
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                asyncio.run(
+                    run_pipeline(
+                        produce=produce,
+                        process=process,
+                        consume=consume,
+                        executor=executor,
+                        concurrency=workers,
+                    )
+                )
+            report_extractions(failures)
+            extractor.report_encoding()
+            if converter.conversion_times:
+                click.echo(converter.conversions_summary(), err=True)
+
+            if output == "gdoc" and uploaded:
+                click.echo(f"Report already uploaded to {uploaded['url']}")
+            elif output in ("gdoc", "console"):
+                with profiling.span("output", stage=True):
+                    report_path = write_report(
+                        teams, extractor, downloads_temp_dir, manifest
+                    )
+                    if output == "gdoc":
+                        url = upload_doc(report_path, google_credentials, config)
+                        manifest.record_report_step("uploaded", url=url)
+                        click.echo(f"Report uploaded to {url}")
+                    else:
+                        with open(report_path) as report:
+                            while chunk := report.read(REPORT_CHUNK_SIZE):
+                                click.echo(chunk, nl=False)
+                        click.echo()
 
     except Exception as err:
         click.echo(f"Unexpected exception, {type(err).__name__}: {err}", err=True)
         exit_status = 1
     finally:
-        if remove_downloads:
+        if profiler:
+            profiling.enable(None)
+            profiler.write_trace(profile_path)
+            if cprofile_dir:
+                profiler.write_stage_profiles()
+            click.echo(profiler.summary(), err=True)
+        if remove_downloads and not exit_status:
             logging.info("removing downloads directory")
             shutil.rmtree(downloads_temp_dir)
+        elif not exit_status:
+            logging.info("removing run directory")
+            shutil.rmtree(run_dir_path)
+        else:
+            click.echo(
+                f"Downloads kept in {downloads_temp_dir}; to resume the run,"
+                f" specify `--downloads-temp-dir {downloads_temp_dir} --resume`",
+                err=True,
+            )
 
     context.exit(exit_status)
@@ -0,0 +1,52 @@
+import json
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from logilica_cli.browser_daemon import get_daemon_endpoint
+
+CREDENTIALS = {"domain": "myorg", "username": "me@example.com"}
+
+
+class TestBrowserDaemon(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.info_file = Path(self.temp_dir.name) / "browser_daemon.json"
+        patcher = patch(
+            "logilica_cli.browser_daemon.get_daemon_info_file",
+            return_value=self.info_file,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write_info(self, **overrides):
+        info = {
+            "endpoint": "http://127.0.0.1:9222",
+            "pid": os.getpid(),
+            **CREDENTIALS,
+            **overrides,
+        }
+        self.info_file.write_text(json.dumps(info))
+
+    def test_get_daemon_endpoint_not_running(self):
+        self.assertIsNone(get_daemon_endpoint(CREDENTIALS))
+
+    def test_get_daemon_endpoint(self):
+        self.write_info()
+        self.assertEqual("http://127.0.0.1:9222", get_daemon_endpoint(CREDENTIALS))
+
+    def test_get_daemon_endpoint_other_user(self):
+        self.write_info(username="someone@example.com")
+        self.assertIsNone(get_daemon_endpoint(CREDENTIALS))
+
+    @patch("logilica_cli.browser_daemon.os.kill", side_effect=ProcessLookupError)
+    def test_get_daemon_endpoint_stale(self, _kill):
+        self.write_info()
+        self.assertIsNone(get_daemon_endpoint(CREDENTIALS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 from pathlib import Path
 import shutil
+from unittest.mock import patch
 
 from click.testing import CliRunner
 from pytest import approx, fixture
@@ -63,6 +64,17 @@ def test_weekly_report_image_generation(setup_cli_isolated_env):
     ).exists()
 
 
+def test_weekly_report_charts(setup_cli_isolated_env):
+    runner = setup_cli_isolated_env
+
+    result = runner.invoke(cli, [*BASE_ARGS, "--output-type", "charts-only"])
+
+    assert result.exit_code == 0, result.output
+    assert sorted(path.name for path in Path(OUTPUT_DIR).iterdir()) == [
+        f"my-awesome-team-team-productivity-dashboard-{i}.png" for i in range(1, 5)
+    ]
+
+
 def test_weekly_report_markdown(setup_cli_isolated_env):
     runner = setup_cli_isolated_env
 
@@ -83,6 +95,18 @@ def test_weekly_report_markdown(setup_cli_isolated_env):
     ).exists()
 
 
+def test_weekly_report_markdown_lite(setup_cli_isolated_env):
+    runner = setup_cli_isolated_env
+
+    result = runner.invoke(cli, [*BASE_ARGS, "--output-type", "markdown-lite"])
+
+    assert result.exit_code == 0, result.output
+    output_file = Path(
+        f"{OUTPUT_DIR}/my-awesome-team-team-productivity-dashboard-lite.md"
+    )
+    assert output_file.read_text().startswith("## Developer Practices Dashboard")
+
+
 def test_weekly_report_html(setup_cli_isolated_env):
     runner = setup_cli_isolated_env
 
@@ -159,3 +183,70 @@ def test_weekly_report_console(setup_cli_isolated_env):
     files = list(Path(OUTPUT_DIR).rglob("*"))
     assert len(files) == 0
     assert len(result.output) == approx(234360, abs=25), "Unexpected document length"
+
+
+def test_weekly_report_leaves_no_run_files_in_the_downloads_dir(
+    setup_cli_isolated_env,
+):
+    runner = setup_cli_isolated_env
+    downloads = sorted(path.name for path in Path("downloads").iterdir())
+
+    result = runner.invoke(cli, [*BASE_ARGS, "--output-type", "console"])
+
+    assert result.exit_code == 0, result.output
+    # The manifest, the extracted images and the report were removed with the
+    # run directory.
+    assert sorted(path.name for path in Path("downloads").iterdir()) == downloads
+
+
+def test_weekly_report_console_with_jobs(setup_cli_isolated_env):
+    runner = setup_cli_isolated_env
+
+    result = runner.invoke(
+        cli,
+        [
+            *BASE_ARGS,
+            "--output-type",
+            "console",
+            "--jobs",
+            "2",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert len(result.output) == approx(234360, abs=25), "Unexpected document length"
+
+
+def test_weekly_report_unknown_convert_profile(setup_cli_isolated_env):
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, [*BASE_ARGS, "--output-type", "markdown", "--convert-profile", "slow"]
+    )
+
+    assert result.exit_code == 2
+    assert "Unknown --convert-profile 'slow'" in result.output
+
+
+def test_weekly_report_jobs_and_page_jobs_cannot_be_combined(setup_cli_isolated_env):
+    runner = setup_cli_isolated_env
+
+    result = runner.invoke(
+        cli,
+        [*BASE_ARGS, "--output-type", "console", "--jobs", "2", "--page-jobs", "2"],
+    )
+
+    assert result.exit_code == 2
+    assert "--page-jobs cannot be combined with --jobs" in result.output
+
+
+def test_weekly_report_checks_the_options_before_authorizing(setup_cli_isolated_env):
+    runner = setup_cli_isolated_env
+
+    with patch("logilica_cli.weekly_report.get_google_credentials") as credentials:
+        result = runner.invoke(
+            cli, [*BASE_ARGS, "--output-type", "gdoc", "--convert-profile", "slow"]
+        )
+
+    assert result.exit_code == 2
+    assert "Unknown --convert-profile 'slow'" in result.output
+    credentials.assert_not_called()
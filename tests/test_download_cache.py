@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+
+import click
+from pytest import raises
+
+from logilica_cli import Duration
+from logilica_cli.download_cache import DownloadCache
+
+URL = "https://logilica.io/dashboard/0123?variables=W10%3D&workstream=42"
+
+
+def test_store_and_fetch(tmp_path):
+    source = tmp_path / "export.pdf"
+    source.write_bytes(b"%PDF-1.4 mock export")
+    cache = DownloadCache(tmp_path / "cache", max_age=timedelta(hours=1))
+    assert not cache.fetch(URL, tmp_path / "restored.pdf")
+
+    cache.store(URL, source)
+    # A new instance reads the persisted index.
+    cache = DownloadCache(tmp_path / "cache", max_age=timedelta(hours=1))
+    assert cache.fetch(URL, tmp_path / "restored.pdf")
+    assert (tmp_path / "restored.pdf").read_bytes() == source.read_bytes()
+    # The filters are part of the key.
+    assert not cache.fetch(URL.replace("W10%3D", "WzFd"), tmp_path / "other.pdf")
+
+
+def test_stale_and_corrupt_entries(tmp_path):
+    source = tmp_path / "export.pdf"
+    source.write_bytes(b"%PDF-1.4 mock export")
+    cache = DownloadCache(tmp_path / "cache", max_age=timedelta(hours=1))
+    cache.store(URL, source)
+
+    entry = cache.index[cache.key(URL)]
+    entry["exported_at"] = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    assert not cache.fetch(URL, tmp_path / "restored.pdf")
+
+    entry["exported_at"] = datetime.now(timezone.utc).isoformat()
+    (tmp_path / "cache" / f"{entry['sha256']}.pdf").write_bytes(b"garbage")
+    assert not cache.fetch(URL, tmp_path / "restored.pdf")
+
+
+def test_restore(tmp_path):
+    teams = {
+        "Team 1": {
+            "team_dashboards": {
+                "Board 1": {"filename": "b1.pdf", "url": URL},
+                "Board 2": {"filename": "b2.pdf", "url": URL + "0"},
+            }
+        }
+    }
+    (tmp_path / "b1.pdf").write_bytes(b"%PDF-1.4 board 1")
+    cache = DownloadCache(tmp_path / "cache", max_age=timedelta(days=1))
+    cache.store(URL, tmp_path / "b1.pdf")
+    (tmp_path / "b1.pdf").unlink()
+
+    stale = cache.restore(teams, tmp_path)
+    assert list(stale["Team 1"]["team_dashboards"]) == ["Board 2"]
+    assert (tmp_path / "b1.pdf").exists()
+    index = json.loads((tmp_path / "cache" / "index.json").read_text())
+    assert [entry["url"] for entry in index.values()] == [URL]
+
+
+def test_only_replaced_exports_are_removed(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = DownloadCache(cache_dir, max_age=timedelta(hours=1))
+    # Files which the cache didn't create, e.g., from another run (whose
+    # index is not yet saved) or of the user's own, are left alone.
+    other_run_blob = cache_dir / ("0" * 64 + ".pdf")
+    other_run_blob.write_bytes(b"%PDF-1.4 other run")
+    (cache_dir / "notes.pdf").write_bytes(b"%PDF-1.4 user file")
+
+    source = tmp_path / "export.pdf"
+    source.write_bytes(b"%PDF-1.4 first export")
+    cache.store(URL, source)
+    first_blob = cache_dir / f"{cache.index[cache.key(URL)]['sha256']}.pdf"
+    source.write_bytes(b"%PDF-1.4 second export")
+    cache.store(URL, source)
+
+    assert not first_blob.exists()
+    assert sorted(path.name for path in cache_dir.glob("*.pdf")) == sorted(
+        [
+            other_run_blob.name,
+            "notes.pdf",
+            f"{cache.index[cache.key(URL)]['sha256']}.pdf",
+        ]
+    )
+
+
+def test_concurrent_instances_keep_each_others_entries(tmp_path):
+    cache_dir = tmp_path / "cache"
+    hourly = DownloadCache(cache_dir, max_age=timedelta(hours=1))
+    daily = DownloadCache(cache_dir, max_age=timedelta(days=1))
+    source = tmp_path / "export.pdf"
+
+    source.write_bytes(b"%PDF-1.4 board 1")
+    hourly.store(URL, source)
+    source.write_bytes(b"%PDF-1.4 board 2")
+    daily.store(URL + "0", source)
+    # A later export of the first board replaces the other run's entry.
+    source.write_bytes(b"%PDF-1.4 board 1, again")
+    daily.store(URL, source)
+    source.write_bytes(b"%PDF-1.4 board 3")
+    hourly.store(URL + "1", source)
+
+    index = DownloadCache(cache_dir, max_age=timedelta(days=1)).index
+    assert sorted(entry["url"] for entry in index.values()) == [
+        URL,
+        URL + "0",
+        URL + "1",
+    ]
+    assert (
+        index[daily.key(URL)]["sha256"]
+        == hashlib.sha256(b"%PDF-1.4 board 1, again").hexdigest()
+    )
+    # Only the PDFs which the index refers to are left.
+    assert sorted(path.name for path in cache_dir.glob("*.pdf")) == sorted(
+        f"{entry['sha256']}.pdf" for entry in index.values()
+    )
+
+
+def test_duration():
+    duration = Duration()
+    assert duration.convert("90", None, None) == timedelta(seconds=90)
+    assert duration.convert("15m", None, None) == timedelta(minutes=15)
+    assert duration.convert("1.5h", None, None) == timedelta(hours=1.5)
+    assert duration.convert("2d", None, None) == timedelta(days=2)
+    with raises(click.BadParameter):
+        duration.convert("two days", None, None)
@@ -0,0 +1,54 @@
+from logilica_cli.export_plan import normalize_dashboard_url, plan_exports
+
+# variables: base64 of {"b":1,"a":["x?"]}
+URL = (
+    "https://logilica.io/dashboard/0123"
+    "?workstream=42&variables=eyJiIjoxLCJhIjpbIng%2FIl19"
+)
+
+
+def test_normalize_dashboard_url():
+    equivalent = (
+        "HTTPS://Logilica.io/dashboard/0123/"
+        "?variables=eyJhIjpbIng/Il0sImIiOjF9&workstream=42"
+    )
+    assert normalize_dashboard_url(URL) == normalize_dashboard_url(equivalent)
+    assert normalize_dashboard_url(URL) != normalize_dashboard_url(
+        URL.replace("workstream=42", "workstream=43")
+    )
+
+
+def test_normalize_dashboard_url_variables_encodings():
+    # {"a":["x?"], "b":1}, in the URL-safe base64 alphabet without padding, and
+    # in the standard alphabet with (percent-encoded) padding
+    encodings = ("eyJhIjpbIng_Il0sICJiIjoxfQ", "eyJhIjpbIng%2FIl0sICJiIjoxfQ%3D%3D")
+    for variables in encodings:
+        equivalent = URL.replace("eyJiIjoxLCJhIjpbIng%2FIl19", variables)
+        assert normalize_dashboard_url(URL) == normalize_dashboard_url(equivalent)
+    # {"a": ["x?"], "b": 2}
+    assert normalize_dashboard_url(URL) != normalize_dashboard_url(
+        URL.replace("eyJiIjoxLCJhIjpbIng%2FIl19", "eyJhIjpbIng_Il0sImIiOjJ9")
+    )
+
+
+def test_plan_exports():
+    teams = {
+        "Sandbox": {
+            "team_dashboards": {
+                "Coding Velocity": {"filename": "sandbox_cv.pdf", "url": URL},
+                "Other": {"filename": "other.pdf", "url": URL + "0"},
+            }
+        },
+        "RHDH": {
+            "team_dashboards": {
+                "Velocity": {"filename": "rhdh_cv.pdf", "url": URL + "&"},
+            }
+        },
+    }
+    jobs = plan_exports(teams)
+    assert [len(job.entries) for job in jobs] == [2, 1]
+    assert jobs[0].url == URL
+    assert [entry[:2] for entry in jobs[0].entries] == [
+        ("Sandbox", "Coding Velocity"),
+        ("RHDH", "Velocity"),
+    ]
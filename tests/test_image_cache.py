@@ -0,0 +1,114 @@
+import pathlib
+from unittest.mock import patch
+
+from logilica_cli.image_cache import ImageCache
+from logilica_cli.pdf_extract import PDFExtract
+
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+def test_put_and_get(tmp_path):
+    cache = ImageCache(tmp_path / "cache", max_size=1000)
+    key = cache.key("0123", {"scale": 1.0})
+    assert cache.get(key) is None
+
+    cache.put(key, PNG + b"image")
+    cache.put("tiled", [PNG + b"tile 1", PNG + b"tile 2"])
+    # A new instance reads the persisted index.
+    cache = ImageCache(tmp_path / "cache", max_size=1000)
+    assert cache.get(key) == PNG + b"image"
+    assert cache.get("tiled") == [PNG + b"tile 1", PNG + b"tile 2"]
+    # The settings are part of the key.
+    assert cache.get(cache.key("0123", {"scale": 2.0})) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    image = PNG + bytes(92)
+    cache = ImageCache(tmp_path / "cache", max_size=250)
+    cache.put("a", image)
+    cache.put("b", image)
+    assert cache.get("a") == image
+    cache.put("c", image)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == image
+    assert sorted(path.name for path in (tmp_path / "cache").iterdir()) == [
+        "a.png",
+        "c.png",
+        "index.json",
+        "index.lock",
+    ]
+
+
+def test_only_evicted_and_replaced_images_are_removed(tmp_path):
+    image = PNG + bytes(92)
+    cache_dir = tmp_path / "cache"
+    cache = ImageCache(cache_dir, max_size=250)
+    # Files which the cache didn't create, e.g., from another run (whose
+    # index is not yet saved) or of the user's own, are left alone.
+    (cache_dir / "other-run.png").write_bytes(image)
+    (cache_dir / "notes.txt").write_text("notes")
+
+    cache.put("a", [image, image])
+    cache.put("a", image)
+    cache.put("b", image)
+    cache.put("c", image)
+
+    assert sorted(path.name for path in cache_dir.iterdir()) == [
+        "b.png",
+        "c.png",
+        "index.json",
+        "index.lock",
+        "notes.txt",
+        "other-run.png",
+    ]
+
+
+def test_concurrent_instances_keep_each_others_entries(tmp_path):
+    image = PNG + bytes(92)
+    cache_dir = tmp_path / "cache"
+    run_1 = ImageCache(cache_dir, max_size=250)
+    run_2 = ImageCache(cache_dir, max_size=250)
+
+    run_1.put("a", image)
+    run_2.put("b", image)
+    run_1.put("c", image)
+    assert sorted(ImageCache(cache_dir, max_size=250).index) == ["b", "c"]
+    # The entries of both runs count toward the size limit.
+    run_2.put("d", image)
+
+    assert sorted(ImageCache(cache_dir, max_size=250).index) == ["c", "d"]
+    assert sorted(path.name for path in cache_dir.glob("*.png")) == [
+        "c.png",
+        "d.png",
+    ]
+
+
+def test_missing_image_is_a_miss(tmp_path):
+    cache = ImageCache(tmp_path / "cache", max_size=1000)
+    cache.put("a", PNG)
+    (tmp_path / "cache" / "a.png").unlink()
+    assert cache.get("a") is None
+    assert "a" not in cache.index
+
+
+def test_extraction_reuses_cached_images(tmp_path):
+    config = {
+        "Team": {"team_dashboards": {"Dashboard": {"filename": "sample_report.pdf"}}}
+    }
+    fixtures_dir = pathlib.Path(__file__).parent / "fixtures"
+    image = PDFExtract(cache=ImageCache(tmp_path, 1 << 20)).get_pdf_objects(
+        config, fixtures_dir
+    )["Team"]["Dashboard"]
+
+    extract = PDFExtract(cache=ImageCache(tmp_path, 1 << 20))
+    with patch.object(extract, "render") as render:
+        result = extract.get_pdf_objects(config, fixtures_dir)
+    render.assert_not_called()
+    assert result["Team"]["Dashboard"] == image
+
+    # Images rendered at another scale are not reused.
+    extract = PDFExtract(scale=2.0, cache=ImageCache(tmp_path, 1 << 20))
+    with patch.object(extract, "render", return_value=PNG) as render:
+        extract.get_pdf_objects(config, fixtures_dir)
+    render.assert_called_once()
@@ -0,0 +1,67 @@
+from io import BytesIO
+import pathlib
+from unittest.mock import patch
+
+from PIL import Image
+import pymupdf
+from pytest import mark
+
+from logilica_cli.image_encoding import get_mime_type, ImageEncoder
+from logilica_cli.pdf_extract import PDFExtract
+from logilica_cli.update_gdoc import get_image_html
+
+
+def decode(image: bytes) -> Image.Image:
+    with Image.open(BytesIO(image)) as decoded:
+        return decoded.convert("RGB")
+
+
+def render(encoder: ImageEncoder) -> bytes:
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        return PDFExtract(encoder=encoder).get_report_image(pdf)
+
+
+@mark.parametrize(
+    "encoder, mime_type",
+    [
+        (ImageEncoder(), "image/png"),
+        (ImageEncoder("png", compression=9, colors=64), "image/png"),
+        (ImageEncoder("webp"), "image/webp"),
+        (ImageEncoder("webp", quality=80), "image/webp"),
+        (ImageEncoder("jpeg", quality=80), "image/jpeg"),
+    ],
+)
+def test_encoded_images_have_the_same_size(encoder, mime_type):
+    png = decode(render(ImageEncoder()))
+    image = render(encoder)
+    assert get_mime_type(image) == mime_type
+    assert f"data:{mime_type};base64," in get_image_html(image)
+    assert decode(image).size == png.size
+
+
+def test_lossless_encodings_are_smaller_and_identical():
+    png = render(ImageEncoder())
+    webp = render(ImageEncoder("webp"))
+    assert len(webp) < len(png)
+    assert decode(webp).tobytes() == decode(png).tobytes()
+
+
+def test_extraction_reports_bytes_saved():
+    extract = PDFExtract(encoder=ImageEncoder("png", colors=32), compare_with_png=True)
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        image = extract.get_report_image(pdf)
+    stats = extract.encoding_stats
+    assert stats["images"] == 1
+    assert stats["bytes"] == len(image)
+    assert stats["png_bytes"] > stats["bytes"]
+
+    # The second (PNG) encoding is only done if it is asked for.
+    extract = PDFExtract(encoder=ImageEncoder("png", colors=32))
+    with patch.object(pymupdf.Pixmap, "tobytes") as tobytes:
+        extract.encode_image(pymupdf.Pixmap(pymupdf.csRGB, (0, 0, 10, 10), False))
+    tobytes.assert_not_called()
+    assert "png_bytes" not in extract.encoding_stats
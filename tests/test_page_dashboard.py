@@ -0,0 +1,195 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
+
+from pytest import raises
+
+from logilica_cli.page_dashboard import dashboard_identity, DashboardPage, ExportRequest
+
+TEAMS = {
+    "Team 1": {
+        "team_dashboards": {
+            "Board 1": {"filename": "t1b1.pdf", "url": "https://example.com/t1b1"},
+            "Board 2": {"filename": "t1b2.pdf", "url": "https://example.com/t1b2"},
+        }
+    },
+    "Team 2": {
+        "team_dashboards": {
+            "Board 1": {"filename": "t2b1.pdf", "url": "https://example.com/t2b1"},
+        }
+    },
+}
+
+
+def mock_page() -> MagicMock:
+    """Returns a mock of a Playwright Page, with awaitable methods for the
+    calls made by DashboardPage.
+    """
+    page = MagicMock()
+    page.goto = AsyncMock()
+    page.close = AsyncMock()
+    page.context.new_page = AsyncMock(side_effect=lambda: mock_page())
+    page.get_by_role.return_value.click = AsyncMock()
+    page.get_by_role.return_value.nth.return_value.click = AsyncMock()
+    download_info = page.expect_download.return_value.__aenter__.return_value
+    download = MagicMock(save_as=AsyncMock())
+    type(download_info).value = PropertyMock(
+        side_effect=lambda: asyncio.sleep(0, result=download)
+    )
+    return page
+
+
+def test_download_failures_are_attributed():
+    page_mock = mock_page()
+    page_mock.goto.side_effect = [None, TimeoutError("export timed out"), None]
+
+    with raises(RuntimeError) as error:
+        asyncio.run(
+            DashboardPage(page=page_mock).download_team_dashboards(
+                teams=TEAMS, base_dir_path=Path("downloads")
+            )
+        )
+
+    failures = error.value.args[0]
+    assert list(failures) == [("Team 1", "Board 2")]
+    assert page_mock.goto.await_count == 3
+
+
+def test_download_team_dashboards_concurrently():
+    page_mock = mock_page()
+    asyncio.run(
+        DashboardPage(page=page_mock).download_team_dashboards(
+            teams=TEAMS, base_dir_path=Path("downloads"), concurrency=2
+        )
+    )
+    assert page_mock.context.new_page.await_count == 1
+
+
+@patch.object(DashboardPage, "RETRY_DELAY", 0.01)
+def test_download_retries_with_backoff(caplog):
+    page_mock = mock_page()
+    page_mock.goto.side_effect = [
+        None,
+        TimeoutError("export timed out"),
+        TimeoutError("export timed out"),
+        None,
+        None,
+    ]
+    manifest = MagicMock()
+
+    asyncio.run(
+        DashboardPage(page=page_mock).download_team_dashboards(
+            teams=TEAMS,
+            base_dir_path=Path("downloads"),
+            retries=2,
+            manifest=manifest,
+        )
+    )
+
+    assert page_mock.goto.await_count == 5
+    retries = [r.message for r in caplog.records if "retrying" in r.message]
+    assert len(retries) == 2
+    assert retries[1].endswith("retrying in 0.02 seconds")
+    assert manifest.record.call_count == 3
+
+
+def test_shared_dashboards_are_exported_once(tmp_path):
+    page_mock = mock_page()
+    download = page_mock.expect_download.return_value.__aenter__.return_value
+    type(download).value = PropertyMock(
+        side_effect=lambda: asyncio.sleep(
+            0,
+            result=MagicMock(
+                save_as=AsyncMock(side_effect=lambda path: path.write_bytes(b"PDF"))
+            ),
+        )
+    )
+    url = TEAMS["Team 1"]["team_dashboards"]["Board 1"]["url"]
+    teams = {
+        **TEAMS,
+        "Team 3": {"team_dashboards": {"Board": {"filename": "t3.pdf", "url": url}}},
+    }
+
+    asyncio.run(
+        DashboardPage(page=page_mock).download_team_dashboards(
+            teams=teams, base_dir_path=tmp_path
+        )
+    )
+
+    assert page_mock.goto.await_count == 3
+    assert (tmp_path / "t3.pdf").read_bytes() == (tmp_path / "t1b1.pdf").read_bytes()
+
+
+def test_dashboard_identity():
+    assert dashboard_identity(
+        "https://logilica.io/dashboard/0123-abcd?variables=W10%3D&workstream=42"
+    ) == ["0123-abcd", "W10="]
+    assert dashboard_identity(
+        "https://logilica.io/pm_issues?chartId=cafe&variables=W3t9XQ%3D%3D"
+    ) == ["cafe", "W3t9XQ=="]
+    assert dashboard_identity("https://logilica.io/dashboard/0123/") == ["0123"]
+
+
+def test_export_request_for_dashboard():
+    source_url = "https://logilica.io/dashboard/0123?variables=W10%3D"
+    export_request = ExportRequest(
+        method="POST",
+        url="https://api.logilica.io/export/0123",
+        headers={},
+        post_data='{"variables": "W10="}',
+        identity=dashboard_identity(source_url),
+        dashboard_url=source_url,
+    )
+    assert export_request.for_dashboard(source_url) == (
+        export_request.url,
+        export_request.post_data,
+    )
+    assert export_request.for_dashboard(
+        "https://logilica.io/dashboard/4567?variables=W3t9XQ%3D%3D"
+    ) == ("https://api.logilica.io/export/4567", '{"variables": "W3t9XQ=="}')
+    # The other dashboard has no filters, so the request can't be adapted.
+    assert export_request.for_dashboard("https://logilica.io/dashboard/4567") is None
+    # Every form of the identity is substituted.
+    assert export_request._replace(
+        url="https://api.logilica.io/export/0123?variables=W10%3D"
+    ).for_dashboard("https://logilica.io/dashboard/4567?variables=W3t9XQ%3D%3D") == (
+        "https://api.logilica.io/export/4567?variables=W3t9XQ%3D%3D",
+        '{"variables": "W3t9XQ=="}',
+    )
+    # The same dashboard with another parameter can't be told apart.
+    assert export_request.for_dashboard(source_url + "&workstream=42") is None
+    # A request which doesn't identify its dashboard can't be replayed.
+    assert (
+        export_request._replace(url="https://api.logilica.io/export").for_dashboard(
+            source_url
+        )
+        is None
+    )
+
+
+def test_export_falls_back_to_network_if_the_request_cannot_be_adapted(tmp_path):
+    page_mock = mock_page()
+    page_mock.context.request.fetch = AsyncMock()
+    dashboard_page = DashboardPage(page=page_mock)
+    source_url = "https://logilica.io/dashboard/0123?variables=W10%3D"
+    dashboard_page.export_request = ExportRequest(
+        method="POST",
+        url="https://api.logilica.io/export/0123",
+        headers={},
+        post_data='{"variables": "W10="}',
+        identity=dashboard_identity(source_url),
+        dashboard_url=source_url,
+    )
+    # The dashboard differs only in its workstream, which the request doesn't
+    # carry, so replaying it would export the first dashboard again.
+    url = source_url + "&workstream=42"
+    path = tmp_path / "board.pdf"
+
+    with patch.object(
+        DashboardPage, "capture_dashboard_to", AsyncMock()
+    ) as capture_dashboard_to:
+        asyncio.run(dashboard_page.export_dashboard_to(url, path, "replay"))
+
+    page_mock.context.request.fetch.assert_not_awaited()
+    page_mock.goto.assert_awaited_once_with(url=url)
+    capture_dashboard_to.assert_awaited_once_with(path=path)
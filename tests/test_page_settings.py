@@ -1,5 +1,6 @@
+import asyncio
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from pytest import raises
 import yaml
@@ -38,9 +39,31 @@ MISSING_ENTITIES = {
 }
 
 
+class PageMock(MagicMock):
+    """A mock of a Playwright Page (or Locator), whose methods which are
+    coroutines in the Playwright API return awaitables.
+    """
+
+    AWAITED = {
+        "clear",
+        "click",
+        "count",
+        "fill",
+        "is_visible",
+        "to_be_visible",
+        "wait_for",
+        "wait_for_timeout",
+    }
+
+    def _get_child_mock(self, **kwargs):
+        if kwargs.get("name") in self.AWAITED:
+            return AsyncMock(**kwargs)
+        return PageMock(**kwargs)
+
+
 def has_entity_id_imported_side_effect(*args, **kwargs):
     result = "miss" in kwargs.get("text", "") and kwargs.get("exact")
-    mock_for_missing_entry = MagicMock()
+    mock_for_missing_entry = PageMock()
     # chain: .nth(0).is_visible() => result
     mock_for_missing_entry.nth.return_value.is_visible.return_value = not result
     return mock_for_missing_entry
@@ -49,36 +72,36 @@ def has_entity_id_imported_side_effect(*args, **kwargs):
 def test_sync_repositories():
     for integrations in [GH_INTEGRATION_MEMBERSHIP, GH_INTEGRATION]:
         with patch("logilica_cli.page_settings.expect") as mock_expect:
-            page_mock = MagicMock()
+            page_mock = PageMock()
             page_mock.get_by_text.side_effect = has_entity_id_imported_side_effect
             mock_expect.return_value = page_mock
             page = SettingsPage(page=page_mock)
-            page.sync_integrations(integrations=integrations)
+            asyncio.run(page.sync_integrations(integrations=integrations))
             page_mock.get_by_role.assert_any_call("heading", name="GitHub Settings")
 
 
 def test_sync_boards():
     with patch("logilica_cli.page_settings.expect") as mock_expect:
-        page_mock = MagicMock()
+        page_mock = PageMock()
         page_mock.get_by_text.side_effect = has_entity_id_imported_side_effect
 
-        mock_locator = MagicMock()
+        mock_locator = PageMock()
         mock_locator.count.return_value = 1
         frv = page_mock.get_by_role.return_value.filter.return_value
         frv.get_by_role.return_value = mock_locator
 
         mock_expect.return_value = page_mock
         page = SettingsPage(page=page_mock)
-        page.sync_integrations(integrations=JIRA_INTEGRATION)
+        asyncio.run(page.sync_integrations(integrations=JIRA_INTEGRATION))
         page_mock.get_by_role.assert_any_call("heading", name="Jira Settings")
 
 
 def test_missing_entities():
     with patch("logilica_cli.page_settings.expect") as mock_expect:
-        page_mock = MagicMock()
+        page_mock = PageMock()
         page_mock.get_by_text.side_effect = has_entity_id_imported_side_effect
 
-        mock_locator = MagicMock()
+        mock_locator = PageMock()
         mock_locator.count.return_value = 1
         frv = page_mock.get_by_role.return_value.filter.return_value
         frv.get_by_role.return_value = mock_locator
@@ -87,9 +110,75 @@ def test_missing_entities():
         page = SettingsPage(page=page_mock)
 
         with raises(RuntimeError) as error:
-            page.sync_integrations(integrations=MISSING_ENTITIES)
+            asyncio.run(page.sync_integrations(integrations=MISSING_ENTITIES))
 
         failures = sum(len(value_list) for value_list in error.value.args[0].values())
         assert (
             failures == 2
         ), "There should be two integrations with 2 failures that failed to sync, not {failures}"
+
+
+def test_wait_for_stable_count():
+    page_mock = PageMock()
+    page = SettingsPage(page=page_mock)
+    locator = PageMock()
+
+    # The list fills up over a few polls, then settles.
+    locator.count.side_effect = [0, 0, 5, 12, 12, 12, 12]
+    assert asyncio.run(page.wait_for_stable_count(locator, timeout=54000)) == 12
+    assert locator.count.call_count == 6
+
+    # The timeout is an upper bound on the wait.
+    locator.count.reset_mock(side_effect=True)
+    locator.count.side_effect = range(100)
+    page_mock.wait_for_timeout.reset_mock()
+    assert asyncio.run(page.wait_for_stable_count(locator, timeout=5000)) == 4
+    assert page_mock.wait_for_timeout.call_count == 5
+
+
+def test_wait_for_available_entities_ignores_imported_rows():
+    page_mock = PageMock()
+    page = SettingsPage(page=page_mock)
+    # The rows of the imported repositories are shown from the start, while
+    # the available repositories take a few polls to arrive and settle.
+    page_mock.get_by_role.return_value.count.return_value = 3
+    search_field = page.search_available_repos_field
+    available_rows = search_field.locator.return_value.get_by_role.return_value
+    available_rows.count.side_effect = [0, 0, 0, 4, 6, 6, 6]
+
+    async def wait():
+        return [
+            entity_id
+            async for entity_id in page.wait_for_available_entities(
+                entity_ids=["org/repo"],
+                entity_type="Repository",
+                available_search_field=search_field,
+            )
+        ]
+
+    assert asyncio.run(wait()) == ["org/repo"]
+    search_field.locator.assert_called_once_with(SettingsPage.AVAILABLE_LIST_SELECTOR)
+    search_field.locator.return_value.get_by_role.assert_called_once_with("row")
+    assert available_rows.count.await_count == 7
+    assert page_mock.wait_for_timeout.await_count == 6
+
+
+def test_check_imported_entities_polls_until_present():
+    page_mock = PageMock()
+    page = SettingsPage(page=page_mock)
+    # Each entry appears on the second search for it.
+    searches = {}
+
+    async def search_function(entity_id):
+        searches[entity_id] = searches.get(entity_id, 0) + 1
+        return searches[entity_id] > 1
+
+    missing = asyncio.run(
+        page.check_imported_entities(
+            entity_ids=["org/repo1", "org/repo2"],
+            entity_type="Repository",
+            search_function=search_function,
+        )
+    )
+    assert missing == []
+    assert page_mock.wait_for_timeout.call_count == 2
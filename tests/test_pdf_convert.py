@@ -0,0 +1,183 @@
+import pathlib
+import shutil
+from types import SimpleNamespace
+
+from logilica_cli.pdf_convert import (
+    CONVERT_PROFILES,
+    ConvertProfile,
+    get_convert_profiles,
+    PDFConvert,
+)
+from logilica_cli.run_manifest import RunManifest
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures"
+
+TEAMS = {
+    "Team": {
+        "team_dashboards": {
+            f"Board {i}": {"filename": f"board{i}.pdf", "url": f"url{i}"}
+            for i in (1, 2, 3)
+        }
+    }
+}
+
+
+def setup_downloads(tmp_path):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    for i in (1, 2, 3):
+        shutil.copyfile(FIXTURES_DIR / "sample_report.pdf", downloads / f"board{i}.pdf")
+    return downloads
+
+
+class FakeConverter:
+    """Stands in for the docling converter, writing the name of the PDF file
+    as the document.
+    """
+
+    def __init__(self):
+        self.paths = []
+
+    def convert(self, path):
+        self.paths.append(path.name)
+        return SimpleNamespace(
+            document=SimpleNamespace(
+                save_as_markdown=lambda filename, image_mode: (
+                    filename.write_text(path.name)
+                )
+            )
+        )
+
+
+def test_to_format_multiple_skips_converted_dashboards(tmp_path):
+    downloads = setup_downloads(tmp_path)
+    output = tmp_path / "output"
+    convert = PDFConvert(output_dir_path=output, download_dir_path=downloads, scale=1)
+    convert.converter = FakeConverter()
+    manifest = RunManifest(tmp_path)
+    manifest.record(
+        "Team",
+        "Board 2",
+        TEAMS["Team"]["team_dashboards"]["Board 2"],
+        "converted",
+        **convert.get_settings("markdown", embed_images=True),
+    )
+
+    assert convert.to_markdowns(teams=TEAMS, manifest=manifest) == 2
+    assert convert.converter.paths == ["board1.pdf", "board3.pdf"]
+    assert (output / "team-board-3-with-images.md").read_text() == "board3.pdf"
+    assert not (output / "team-board-2-with-images.md").exists()
+    assert manifest.done(
+        "Team", "Board 3", TEAMS["Team"]["team_dashboards"]["Board 3"], "converted"
+    )
+
+
+def test_to_format_multiple_converts_in_worker_processes(tmp_path):
+    downloads = setup_downloads(tmp_path)
+    output = tmp_path / "output"
+    manifest = RunManifest(tmp_path)
+    with PDFConvert(
+        output_dir_path=output, download_dir_path=downloads, scale=1, jobs=2
+    ) as convert:
+        total = convert.to_format_multiple(
+            format="markdown-lite", teams=TEAMS, manifest=manifest
+        )
+        convert.to_format(
+            format="markdown-lite",
+            pdf_path=downloads / "board1.pdf",
+            team="Other",
+            dashboard="Board",
+        )
+
+    assert total == 3
+    assert sorted(path.name for path in output.iterdir()) == [
+        "other-board-lite.md",
+        *(f"team-board-{i}-lite.md" for i in (1, 2, 3)),
+    ]
+    assert all(
+        manifest.done("Team", dashboard, options, "converted", format="markdown-lite")
+        for dashboard, options in TEAMS["Team"]["team_dashboards"].items()
+    )
+
+
+def test_get_convert_profiles_merges_the_configured_profiles():
+    profiles = get_convert_profiles(
+        {
+            "docling": {
+                "profiles": {
+                    "fast": {"do_table_structure": False},
+                    "tables": {"do_ocr": False, "table_mode": "accurate"},
+                }
+            }
+        }
+    )
+
+    assert list(profiles) == ["default", "fast", "accurate", "tables"]
+    assert profiles["default"] == ConvertProfile()
+    assert profiles["fast"] == ConvertProfile("fast", do_table_structure=False)
+    assert profiles["tables"] == ConvertProfile(
+        "tables", do_ocr=False, table_mode="accurate"
+    )
+    assert get_convert_profiles({}) == CONVERT_PROFILES
+
+
+def test_converter_applies_the_profile(tmp_path):
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import TableFormerMode
+
+    convert = PDFConvert(
+        output_dir_path=tmp_path,
+        download_dir_path=tmp_path,
+        scale=2,
+        profile=CONVERT_PROFILES["accurate"],
+    )
+    options = convert.converter.format_to_options[InputFormat.PDF].pipeline_options
+
+    assert options.images_scale == 2
+    assert not options.do_ocr
+    assert options.table_structure_options.mode == TableFormerMode.ACCURATE
+    assert options.generate_page_images
+
+
+def test_conversions_are_timed_and_recorded_by_profile(tmp_path):
+    downloads = setup_downloads(tmp_path)
+    output = tmp_path / "output"
+    convert = PDFConvert(
+        output_dir_path=output,
+        download_dir_path=downloads,
+        scale=1,
+        profile=CONVERT_PROFILES["fast"],
+    )
+    convert.converter = FakeConverter()
+    fast = CONVERT_PROFILES["fast"]._asdict()
+    manifest = RunManifest(tmp_path)
+
+    assert convert.to_markdowns(teams=TEAMS, manifest=manifest) == 3
+    convert.to_format(
+        format="markdown-lite",
+        pdf_path=downloads / "board1.pdf",
+        team="Team",
+        dashboard="Board 1",
+    )
+
+    assert [(name, len(times)) for name, times in convert.conversion_times.items()] == [
+        ("fast", 3),
+        ("markdown-lite", 1),
+    ]
+    assert convert.conversions_summary().startswith(
+        "Converted 3 dashboards with profile fast: "
+    )
+    # The documents converted with another profile are converted again.
+    options = TEAMS["Team"]["team_dashboards"]["Board 1"]
+    settings = {"format": "markdown", "embed_images": True, "scale": 1}
+    assert manifest.done(
+        "Team", "Board 1", options, "converted", **settings, profile=fast
+    )
+    assert not manifest.done(
+        "Team",
+        "Board 1",
+        options,
+        "converted",
+        **settings,
+        profile=ConvertProfile()._asdict(),
+    )
@@ -1,8 +1,11 @@
 import pathlib
+from unittest.mock import patch
 
-from pytest import approx
+import pymupdf
+from pytest import approx, mark, raises
 
-from logilica_cli.pdf_extract import PDFExtract
+from logilica_cli.pdf_extract import PDFExtract, render_report_image
+from logilica_cli.run_manifest import RunManifest
 
 
 def test_get_pdf_objects():
@@ -22,3 +25,238 @@ def test_get_pdf_objects():
     assert len(result["Mock Team"]["Mock Team Dashboard"]) == approx(
         175640, abs=15
     ), "Unexpected image length"
+
+
+def test_get_pdf_objects_renders_identical_pdfs_once():
+    config = {
+        team: {"team_dashboards": {"Dashboard": {"filename": "sample_report.pdf"}}}
+        for team in ("Team 1", "Team 2")
+    }
+
+    extract = PDFExtract()
+    with patch.object(extract, "get_report_image", return_value=b"PNG") as render:
+        result = extract.get_pdf_objects(
+            config, pathlib.Path(__file__).parent / "fixtures"
+        )
+    assert render.call_count == 1
+    assert result["Team 2"]["Dashboard"] == b"PNG"
+
+
+def test_get_pdf_objects_with_jobs_reports_failures_per_dashboard(tmp_path):
+    fixtures_dir = pathlib.Path(__file__).parent / "fixtures"
+    (tmp_path / "sample_report.pdf").write_bytes(
+        (fixtures_dir / "sample_report.pdf").read_bytes()
+    )
+    (tmp_path / "broken.pdf").write_bytes(b"not a PDF")
+    config = {
+        "Team 1": {
+            "team_dashboards": {
+                "Broken": {"filename": "broken.pdf"},
+                "Dashboard": {"filename": "sample_report.pdf"},
+            }
+        }
+    }
+    run_dir_path = tmp_path / "run"
+    run_dir_path.mkdir()
+    manifest = RunManifest(run_dir_path)
+
+    with PDFExtract(jobs=2) as extract:
+        with raises(RuntimeError) as excinfo:
+            extract.get_pdf_objects(config, tmp_path, manifest)
+    assert list(excinfo.value.args[0]) == [("Team 1", "Broken")]
+    # The other dashboard was extracted regardless.
+    assert manifest.done(
+        "Team 1", "Dashboard", {"filename": "sample_report.pdf"}, "extracted", scale=1.0
+    )
+    # The image is saved in the manifest's directory, not next to the PDF.
+    assert (run_dir_path / "sample_report.pdf.png").exists()
+    assert not (tmp_path / "sample_report.pdf.png").exists()
+
+
+def test_iter_pdf_objects_extracts_lazily_in_order():
+    config = {
+        "Team 1": {"team_dashboards": {"Board 1": {"filename": "b1.pdf"}}},
+        "Team 2": {
+            "team_dashboards": {
+                "Board 2": {"filename": "b2.pdf"},
+                "Board 3": {"filename": "b3.pdf"},
+            }
+        },
+    }
+    extract = PDFExtract()
+    with patch.object(
+        extract,
+        "get_dashboard_image",
+        side_effect=lambda team, dashboard, *_: dashboard.encode(),
+    ) as get_image:
+        items = extract.iter_pdf_objects(config, pathlib.Path("."))
+        assert next(items) == ("Team 1", "Board 1", b"Board 1")
+        assert get_image.call_count == 1
+        assert list(items) == [
+            ("Team 2", "Board 2", b"Board 2"),
+            ("Team 2", "Board 3", b"Board 3"),
+        ]
+
+
+def test_strip_trailing_space():
+    extract = PDFExtract()
+    pix = pymupdf.Pixmap(pymupdf.csRGB, (0, 0, 40, 200), False)
+    pix.clear_with(255)
+    with raises(ValueError):
+        extract.strip_trailing_space(pix)
+
+    pix.set_pixel(39, 120, (0, 0, 0))
+    pix.set_pixel(3, 60, (0, 0, 0))
+    assert extract.strip_trailing_space(pix) == 120
+
+
+@mark.parametrize("scale", [1.0, 1.5, 2.0])
+def test_clipped_rendering_matches_full_pages(scale):
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        full = pymupdf.Pixmap(PDFExtract(scale=scale).get_report_image(pdf))
+        extract = PDFExtract(scale=scale, clip=True)
+        clipped = pymupdf.Pixmap(extract.get_report_image(pdf))
+        # The second page's content ends well above its footer.
+        clip, _ = extract.get_content_clip(pdf[1], extract.PAGE_HEADER_HEIGHT)
+        assert clip.y1 < pdf[1].rect.height * 0.6
+
+    assert (clipped.width, clipped.height) == (full.width, full.height)
+    assert clipped.samples == full.samples
+
+
+def test_tiled_image_fits_and_matches_whole_image(tmp_path):
+    config = {
+        "Team": {"team_dashboards": {"Dashboard": {"filename": "sample_report.pdf"}}}
+    }
+    (tmp_path / "sample_report.pdf").write_bytes(
+        (pathlib.Path(__file__).parent / "fixtures/sample_report.pdf").read_bytes()
+    )
+    whole = pymupdf.Pixmap(
+        PDFExtract(scale=2.0).get_pdf_objects(config, tmp_path)["Team"]["Dashboard"]
+    )
+
+    manifest = RunManifest(tmp_path)
+    extract = PDFExtract(scale=2.0, fit="tile")
+    tiles = extract.get_pdf_objects(config, tmp_path, manifest)["Team"]["Dashboard"]
+    pixmaps = [pymupdf.Pixmap(tile) for tile in tiles]
+    assert len(pixmaps) == 2
+    assert all(pix.height <= 2500 for pix in pixmaps)
+    assert b"".join(pix.samples for pix in pixmaps) == whole.samples
+
+    # The tiles are saved and read back on resumption.
+    resumed = PDFExtract(scale=2.0, fit="tile")
+    with patch.object(resumed, "get_report_image") as render:
+        assert resumed.get_pdf_objects(
+            config, tmp_path, RunManifest(tmp_path, True)
+        ) == {"Team": {"Dashboard": tiles}}
+    render.assert_not_called()
+
+
+def test_get_tile_breaks_prefers_blank_rows_and_page_breaks():
+    pix = pymupdf.Pixmap(pymupdf.csRGB, (0, 0, 10, 250), False)
+    pix.clear_with(255)
+    for y in range(250):
+        if y not in (40, 95):
+            pix.set_pixel(y % 10, y, (0, 0, 0))
+    extract = PDFExtract(fit="tile", max_size=100)
+    # Row 95 is blank and row 120 is a page break; there is neither below 220.
+    assert extract.get_tile_breaks(pix, [120]) == [95, 120, 220]
+
+
+def test_downscaled_image_fits():
+    get_pixmap = pymupdf.Page.get_pixmap
+    scales = []
+
+    def record_scale(page, matrix, **kwargs):
+        scales.append(matrix.a)
+        return get_pixmap(page, matrix=matrix, **kwargs)
+
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf, patch.object(pymupdf.Page, "get_pixmap", record_scale):
+        pix = pymupdf.Pixmap(
+            PDFExtract(scale=2.0, fit="downscale").get_report_image(pdf)
+        )
+    assert 2400 < max(pix.width, pix.height) <= 2500
+    # The pages are rendered at the reduced scale, rather than rendered at full
+    # scale and then resampled.
+    assert len(scales) == 3
+    assert all(scale == approx(1.27, abs=0.01) for scale in scales)
+
+
+def test_compact_blank_bands():
+    pix = pymupdf.Pixmap(pymupdf.csRGB, (0, 0, 10, 100), False)
+    pix.clear_with(255)
+    for y in (*range(0, 10), *range(40, 45), *range(80, 100)):
+        pix.set_pixel(y % 10, y, (0, 0, 0))
+    # A gray band within the white one is a separate band.
+    for y in range(60, 64):
+        for x in range(10):
+            pix.set_pixel(x, y, (128, 128, 128))
+    extract = PDFExtract(max_gap=8)
+    compacted, page_breaks = extract.compact_blank_bands(pix, [45, 100])
+
+    # 10-39 -> 8 rows; 45-59 -> 8 rows, 60-63 kept, 64-79 -> 8 rows
+    assert compacted.height == 10 + 8 + 5 + 8 + 4 + 8 + 20
+    assert page_breaks == [23, compacted.height]
+    assert compacted.pixel(3, 3) == (0, 0, 0)
+    assert compacted.pixel(0, 31) == (128, 128, 128)
+    assert compacted.pixel(0, 43) == (0, 0, 0)
+
+
+def test_compaction_shortens_the_sample():
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        full = pymupdf.Pixmap(PDFExtract().get_report_image(pdf))
+        compacted = pymupdf.Pixmap(PDFExtract(max_gap=10).get_report_image(pdf))
+    assert compacted.width == full.width
+    assert compacted.height < full.height
+
+
+@mark.parametrize("clip", [False, True])
+def test_pages_rendered_in_parallel_match(clip):
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        serial = PDFExtract(scale=1.5, clip=clip).get_report_image(pdf)
+        with PDFExtract(scale=1.5, clip=clip, page_jobs=2) as extract:
+            assert extract.get_report_image(pdf) == serial
+
+
+def test_worker_pools_are_spawned_and_not_nested():
+    with PDFExtract(jobs=2) as extract:
+        assert extract.pool._mp_context.get_start_method() == "spawn"
+        with patch.object(extract.pool, "submit") as submit:
+            submit.return_value.result.return_value = (b"", {})
+            extract.run_in_worker(render_report_image, pathlib.Path("report.pdf"))
+        # The workers render the pages themselves.
+        assert "page_jobs" not in submit.call_args.args[2]
+    with PDFExtract(page_jobs=2) as extract:
+        assert extract.page_pool._mp_context.get_start_method() == "spawn"
+    with raises(ValueError):
+        PDFExtract(jobs=2, page_jobs=2)
+
+
+def test_get_chart_rects_finds_the_chart_panels():
+    extract = PDFExtract(scale=2.0)
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        charts = [
+            (i, title, round(rect.height))
+            for i, page in enumerate(pdf)
+            for title, rect in extract.get_chart_rects(page, i)
+        ]
+        images = extract.get_chart_images(pdf)
+    assert charts == [
+        (0, "Sprint Issues - Storypoints", 339),
+        (1, "Sprint Issues - Acceptance Criteria", 339),
+        (2, "Deadline Driven Completion", 339),
+        (2, "Sprint Planning - Story Points", 339),
+    ]
+    assert [pymupdf.Pixmap(image).height for image in images] == approx(
+        [679] * 4, abs=1
+    )
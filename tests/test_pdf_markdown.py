@@ -0,0 +1,42 @@
+import pathlib
+
+import pymupdf
+
+from logilica_cli.pdf_markdown import get_block_markdown, pdf_to_markdown
+
+
+def test_pdf_to_markdown():
+    with pymupdf.open(
+        pathlib.Path(__file__).parent / "fixtures/sample_report.pdf"
+    ) as pdf:
+        markdown = pdf_to_markdown(pdf)
+
+    assert markdown.startswith("## Developer Practices Dashboard\n\n")
+    assert "\n\n## Deadline Driven Completion\n\n" in markdown
+    assert markdown.count("](data:image/png;base64,") == 4
+    assert "![Sprint Planning - Story Points](data:image/png;base64," in markdown
+    # The page headers and footers are left out.
+    assert "Time: Trailing 180 Days" not in markdown
+    assert "11:59:20 AM" not in markdown
+
+
+def test_get_block_markdown():
+    def span(text, size=12.0, flags=0):
+        return {"text": text, "size": size, "flags": flags}
+
+    block = {
+        "lines": [
+            {"spans": [span("Lead Time", 18.0, pymupdf.TEXT_FONT_BOLD)]},
+            {
+                "spans": [
+                    span("Days from "),
+                    span("start", flags=pymupdf.TEXT_FONT_BOLD),
+                ]
+            },
+            {"spans": [span("to finish.")]},
+            {"spans": [span("Large but not bold", 18.0)]},
+        ]
+    }
+    assert get_block_markdown(block, 12.0) == (
+        "## Lead Time\n\nDays from start  \nto finish.  \nLarge but not bold"
+    )
@@ -0,0 +1,66 @@
+import json
+import os
+from pathlib import Path
+import stat
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import platformdirs
+
+from logilica_cli.playwright_session import get_storage_state_file, save_storage_state
+from logilica_cli.update_gdoc import APPLICATION_NAME
+
+
+class TestPlaywrightSession(unittest.TestCase):
+    def test_get_storage_state_file_default(self):
+        credentials = {"domain": "my org", "username": "me@example.com"}
+        result = get_storage_state_file({}, credentials)
+        expected_dir = platformdirs.user_cache_path(APPLICATION_NAME)
+        self.assertEqual(
+            expected_dir / "logilica_session_my_org_me@example.com.json", result
+        )
+
+    def test_get_storage_state_file_sso(self):
+        credentials = {"domain": "myorg", "username": None}
+        result = get_storage_state_file({"logilica": {}}, credentials)
+        self.assertEqual("logilica_session_myorg_sso.json", result.name)
+
+    def test_get_storage_state_file_configured(self):
+        config = {"logilica": {"storage_state_file": "./state.json"}}
+        result = get_storage_state_file(config, {"domain": "myorg"})
+        self.assertEqual("state.json", result.name)
+        self.assertFalse(result.is_absolute())
+
+    def test_save_storage_state_is_never_readable_by_others(self):
+        state = {"cookies": [{"name": "session", "value": "secret"}]}
+        modes = []
+        replace = os.replace
+
+        def checked_replace(source, target):
+            modes.append(stat.S_IMODE(os.stat(source).st_mode))
+            replace(source, target)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "state.json"
+            path.write_text("{}")
+            path.chmod(0o644)
+            old_umask = os.umask(0)
+            try:
+                with patch(
+                    "logilica_cli.playwright_session.os.replace", checked_replace
+                ):
+                    save_storage_state(path, state)
+            finally:
+                os.umask(old_umask)
+
+            # The file is written in full, with its final mode, before it
+            # replaces the existing one.
+            self.assertEqual([0o600], modes)
+            self.assertEqual(0o600, stat.S_IMODE(path.stat().st_mode))
+            self.assertEqual(state, json.loads(path.read_text()))
+            self.assertEqual(["state.json"], os.listdir(temp_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import json
+
+from logilica_cli import profiling
+
+
+def test_spans_are_not_recorded_when_disabled():
+    profiling.enable(None)
+    with profiling.span("extract"):
+        pass  # No profiler, so nothing to check other than no failure
+
+
+def test_spans_trace_and_summary(tmp_path):
+    profiler = profiling.Profiler(cprofile_dir=tmp_path / "stages")
+    profiling.enable(profiler)
+    try:
+        with profiling.span("process", stage=True, dashboard="Board 1"):
+            for page in range(2):
+                with profiling.span("get_pixmap", page=page):
+                    sum(range(1000))
+    finally:
+        profiling.enable(None)
+
+    profiler.write_trace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans["process"]["args"] == {"dashboard": "Board 1"}
+    # The inner spans lie within the outer one, on the same track.
+    inner, outer = spans["get_pixmap"], spans["process"]
+    assert inner["tid"] == outer["tid"]
+    assert outer["ts"] <= inner["ts"] <= outer["ts"] + outer["dur"]
+
+    profiler.write_stage_profiles()
+    assert (tmp_path / "stages" / "process.prof").exists()
+
+    summary = profiler.summary().splitlines()
+    assert summary[1].split()[:2] == ["process", "1"]
+    assert summary[2].split()[:2] == ["get_pixmap", "2"]
@@ -0,0 +1,86 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from pytest import raises
+
+from logilica_cli.report_pipeline import run_pipeline
+
+ENTRIES = [("Team", f"Board {i}", {"filename": f"b{i}.pdf"}) for i in range(6)]
+
+
+def run(produce, process, consume, concurrency=1):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        asyncio.run(
+            run_pipeline(
+                produce=produce,
+                process=process,
+                consume=consume,
+                executor=executor,
+                concurrency=concurrency,
+                queue_size=2,
+            )
+        )
+
+
+def test_stages_overlap():
+    events = []
+
+    async def produce(put):
+        for entry in ENTRIES:
+            events.append(("downloaded", entry[1]))
+            await put(entry)
+            await asyncio.sleep(0.01)
+
+    def process(entry):
+        events.append(("processed", entry[1]))
+        return entry[1].upper()
+
+    consumed = {}
+    run(produce, process, lambda entry, result: consumed.update({entry[1]: result}))
+
+    assert consumed == {entry[1]: entry[1].upper() for entry in ENTRIES}
+    # The first dashboard is processed before the last one is downloaded.
+    assert events.index(("processed", "Board 0")) < events.index(
+        ("downloaded", "Board 5")
+    )
+
+
+def test_concurrent_processing():
+    async def produce(put):
+        for entry in ENTRIES:
+            await put(entry)
+
+    barrier = threading.Barrier(3, timeout=5)
+
+    def process(entry):
+        # Fails unless three dashboards are processed at once.
+        barrier.wait()
+        return entry[1]
+
+    consumed = []
+    run(produce, process, lambda entry, _: consumed.append(entry), concurrency=3)
+    assert sorted(consumed, key=lambda entry: entry[1]) == ENTRIES
+
+
+def test_producer_failure_is_raised_after_draining():
+    async def produce(put):
+        await put(ENTRIES[0])
+        raise RuntimeError({("Team", "Board 1"): "TimeoutError"})
+
+    consumed = []
+    with raises(RuntimeError):
+        run(produce, lambda entry: entry, lambda entry, _: consumed.append(entry))
+    assert consumed == ENTRIES[:1]
+
+
+def test_processing_failure_cancels_pipeline():
+    async def produce(put):
+        for entry in ENTRIES:
+            await put(entry)
+
+    def process(entry):
+        raise ValueError("Page appears to be blank!")
+
+    with raises(ValueError):
+        run(produce, process, lambda entry, _: None)
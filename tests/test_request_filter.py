@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from logilica_cli.request_filter import RequestFilter
+
+
+def mock_route(resource_type: str, url: str) -> AsyncMock:
+    route = AsyncMock()
+    route.request = MagicMock(resource_type=resource_type, url=url)
+    route.fetch.return_value = MagicMock(body=AsyncMock(return_value=b"x" * 100))
+    return route
+
+
+def test_from_config():
+    assert RequestFilter.from_config({}) is None
+    assert RequestFilter.from_config({"logilica": {}}) is None
+    request_filter = RequestFilter.from_config(
+        {"logilica": {"request_filter": {"block_resource_types": ["font"]}}}
+    )
+    assert request_filter.should_block("font", "https://fonts.example.com/a.woff")
+
+
+def test_should_block():
+    request_filter = RequestFilter(
+        block_resource_types=["image", "font"],
+        block_hosts=["analytics.example.com"],
+        allow_hosts=["logilica.io"],
+    )
+    assert request_filter.should_block("font", "https://fonts.example.com/a.woff")
+    assert request_filter.should_block("script", "https://analytics.example.com/a.js")
+    assert request_filter.should_block("xhr", "https://eu.analytics.example.com/")
+    assert not request_filter.should_block("script", "https://logilica.io/main.js")
+    # The allow list takes precedence over the block list.
+    assert not request_filter.should_block("image", "https://cdn.logilica.io/a.png")
+    assert not request_filter.should_block("xhr", "https://notanalytics.example.com/")
+
+
+def test_handle():
+    request_filter = RequestFilter(block_resource_types=["image"])
+    allowed = mock_route("document", "https://logilica.io/")
+    blocked = mock_route("image", "https://avatars.example.com/me.png")
+    asyncio.run(request_filter.handle(allowed))
+    asyncio.run(request_filter.handle(blocked))
+
+    allowed.continue_.assert_called_once()
+    blocked.abort.assert_called_once()
+    assert request_filter.allowed == 1
+    assert request_filter.blocked == {"image": 1}
+
+
+def test_handle_dry_run():
+    request_filter = RequestFilter(block_resource_types=["image"], dry_run=True)
+    route = mock_route("image", "https://avatars.example.com/me.png")
+    asyncio.run(request_filter.handle(route))
+
+    route.abort.assert_not_called()
+    route.fulfill.assert_called_once_with(response=route.fetch.return_value)
+    assert request_filter.blocked == {"image": 1}
+    assert request_filter.blocked_bytes == 100
+
+
+def test_install_only_if_there_is_something_to_block():
+    context = AsyncMock()
+    asyncio.run(RequestFilter(allow_hosts=["logilica.io"]).install(context))
+    context.route.assert_not_called()
+
+    request_filter = RequestFilter(block_hosts=["intercom.io"])
+    asyncio.run(request_filter.install(context))
+    context.route.assert_called_once_with("**/*", request_filter.handle)
@@ -0,0 +1,64 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from logilica_cli.run_manifest import RunManifest
+
+TEAMS = {
+    "Team 1": {
+        "team_dashboards": {
+            "Board 1": {"filename": "t1b1.pdf", "url": "https://example.com/t1b1"},
+            "Board 2": {"filename": "t1b2.pdf", "url": "https://example.com/t1b2"},
+        }
+    },
+}
+BOARD_1 = TEAMS["Team 1"]["team_dashboards"]["Board 1"]
+
+
+class TestRunManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir_path = Path(self.temp_dir.name)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_pending(self):
+        manifest = RunManifest(self.dir_path)
+        manifest.record("Team 1", "Board 1", BOARD_1, "downloaded")
+        pending = manifest.pending(TEAMS, "downloaded")
+        self.assertEqual(["Board 2"], list(pending["Team 1"]["team_dashboards"]))
+        self.assertEqual(
+            2, len(manifest.pending(TEAMS, "extracted")["Team 1"]["team_dashboards"])
+        )
+
+    def test_resume(self):
+        RunManifest(self.dir_path).record(
+            "Team 1", "Board 1", BOARD_1, "extracted", scale=1.0
+        )
+        resumed = RunManifest(self.dir_path, resume=True)
+        self.assertTrue(resumed.done("Team 1", "Board 1", BOARD_1, "extracted"))
+        self.assertTrue(
+            resumed.done("Team 1", "Board 1", BOARD_1, "extracted", scale=1.0)
+        )
+        self.assertFalse(
+            resumed.done("Team 1", "Board 1", BOARD_1, "extracted", scale=2.0)
+        )
+        self.assertFalse(
+            RunManifest(self.dir_path).done("Team 1", "Board 1", BOARD_1, "extracted")
+        )
+
+    def test_changed_dashboard_is_not_done(self):
+        manifest = RunManifest(self.dir_path)
+        manifest.record("Team 1", "Board 1", BOARD_1, "downloaded")
+        changed = {**BOARD_1, "url": "https://example.com/other"}
+        self.assertFalse(manifest.done("Team 1", "Board 1", changed, "downloaded"))
+
+    def test_report_step(self):
+        manifest = RunManifest(self.dir_path)
+        self.assertFalse(manifest.report_step("uploaded"))
+        manifest.record_report_step("uploaded", url="https://docs/1")
+        resumed = RunManifest(self.dir_path, resume=True)
+        self.assertEqual("https://docs/1", resumed.report_step("uploaded")["url"])
+
+
+if __name__ == "__main__":
+    unittest.main()
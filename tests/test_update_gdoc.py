@@ -21,6 +21,7 @@ from logilica_cli.update_gdoc import (
     get_google_credentials,
     get_token_file,
     upload_doc,
+    write_html,
 )
 
 CUT = "logilica_cli.update_gdoc."
@@ -324,6 +325,9 @@ class TestUpdateGDoc(unittest.TestCase):
                     "team5-dashboard2": b"This is image t5d2.",
                 },
             },
+            {
+                "team6": {"team6-dashboard1": [b"This is tile 1.", b"And tile 2."]},
+            },
         )
 
         for scenario in scenarios:
@@ -335,11 +339,55 @@ class TestUpdateGDoc(unittest.TestCase):
             )
             for team, dashboards in scenario.items():
                 self.assertTrue(f"<hr><h2>{team}</h2>" in result)
-                for image in dashboards.values():
-                    image_data = base64.b64encode(image).decode()
-                    self.assertTrue(
-                        f'<img src="data:image/png;base64,{image_data}' in result
-                    )
+                for contents in dashboards.values():
+                    images = [contents] if isinstance(contents, bytes) else contents
+                    image_tags = [
+                        f'<img src="data:image/png;base64,{base64.b64encode(image).decode()}'
+                        for image in images
+                    ]
+                    # The tiles of an image are inserted in order.
+                    positions = [result.index(tag) for tag in image_tags]
+                    self.assertEqual(sorted(positions), positions)
+
+    def test_write_html(self):
+        pdf_items = {
+            "team1": {"team1-dashboard1": b"image 1"},
+            "team2": {},
+            "team3": {"team3-dashboard1": [b"tile 1", b"tile 2"]},
+        }
+        header = "<!DOCTYPE html><html><body><h1>Logilica Weekly Report</h1>"
+        image_1 = (
+            '<img src="data:image/png;base64,aW1hZ2UgMQ==" width="80%" height="80%" />'
+        )
+        tiles = (
+            '<img src="data:image/png;base64,dGlsZSAx" width="80%" height="80%" />'
+            '<img src="data:image/png;base64,dGlsZSAy" width="80%" height="80%" />'
+        )
+        out = StringIO()
+        # What had been written when each dashboard was taken
+        written = []
+
+        def dashboards(team):
+            for dashboard, image in pdf_items[team].items():
+                written.append(out.getvalue())
+                yield dashboard, image
+
+        write_html(out, ((team, dashboards(team)) for team in pdf_items))
+        self.assertEqual(
+            header
+            + f"<hr><h2>team1</h2>{image_1}<hr><h2>team2</h2><hr><h2>team3</h2>"
+            + f"{tiles}<hr></body></html>",
+            out.getvalue(),
+        )
+        # Each image was written out before the next dashboard was taken.
+        self.assertEqual(
+            [
+                f"{header}<hr><h2>team1</h2>",
+                f"{header}<hr><h2>team1</h2>{image_1}<hr><h2>team2</h2>"
+                "<hr><h2>team3</h2>",
+            ],
+            written,
+        )
 
 
 if __name__ == "__main__":